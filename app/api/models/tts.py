@@ -1,13 +1,88 @@
 from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.core.config import settings
+from app.services.voice_registry import voice_key
 
 class TTSRequest(BaseModel):
     text: str = Field(..., min_length=1, max_length=1000)
     voice_profile: str = Field(..., min_length=1)
+    format: str = Field("wav", pattern="^(wav|flac|ogg|pcm)$")
+    sample_rate: Optional[int] = Field(None, ge=8000, le=48000)
+    preset: Optional[str] = Field(None, min_length=1)
+    nfe_step: Optional[int] = Field(None, ge=1)
+    cfg_strength: Optional[float] = Field(None, ge=0)
+    speed: Optional[float] = Field(None, gt=0)
+    # Stop sampling early once the flow has converged
+    adaptive: Optional[bool] = None
+    # Sample of the profile to condition on, e.g. one matching the wanted prosody
+    reference: Optional[str] = Field(None, min_length=1, max_length=128, pattern="^[^:/]+$")
+    
+    @property
+    def voice(self) -> str:
+        """Key of the voice profile and requested reference sample used by the service"""
+        return voice_key(self.voice_profile, self.reference)
     
     class Config:
         schema_extra = {
             "example": {
                 "text": "Hello, this is a test message.",
-                "voice_profile": "Bane"
+                "voice_profile": "Bane",
+                "format": "wav",
+                "preset": "realtime"
+            }
+        }
+
+class TTSStreamRequest(TTSRequest):
+    format: str = Field("wav", pattern="^(wav|pcm)$")
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "text": "Hello, this is a test message. It is streamed sentence by sentence.",
+                "voice_profile": "Bane",
+                "format": "wav"
+            }
+        }
+
+class TTSBatchItem(TTSRequest):
+    id: Optional[str] = Field(None, max_length=128)
+
+class TTSBatchRequest(BaseModel):
+    items: List[TTSBatchItem] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "items": [
+                    {"id": "chapter-1", "text": "It was a bright cold day in April.", "voice_profile": "Bane"},
+                    {"id": "chapter-2", "text": "The clocks were striking thirteen.", "voice_profile": "Bane", "format": "flac"}
+                ]
+            }
+        }
+
+class TTSJobRequest(TTSRequest):
+    text: str = Field(..., min_length=1, max_length=settings.JOB_MAX_TEXT_CHARS)
+    webhook_url: Optional[str] = Field(None, pattern="^https?://", max_length=2048)
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "text": "A long chapter of text...",
+                "voice_profile": "Bane",
+                "format": "flac",
+                "webhook_url": "https://example.com/tts-callback"
+            }
+        }
+
+class TTSLongFormRequest(TTSStreamRequest):
+    text: str = Field(..., min_length=1, max_length=settings.LONGFORM_MAX_TEXT_CHARS)
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "text": "Chapter one. It was a bright cold day in April...",
+                "voice_profile": "Bane",
+                "format": "wav",
+                "preset": "balanced"
             }
-        } 
\ No newline at end of file
+        }
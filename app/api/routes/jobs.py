@@ -0,0 +1,143 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import FileResponse
+from app.core.security import TokenClaims, get_claims, require_voice
+from app.api.models.tts import TTSJobRequest
+from app.services.audio import AUDIO_FORMATS
+from app.services.jobs import check_webhook_url
+from app.services.presets import resolve_inference_params
+from app.services.rate_limit import RateLimitExceededError
+from app.services.runtime import runtime
+from app.services.text_frontend import UnsupportedTextError
+import asyncio
+import logging
+import os
+from app.core.config import settings
+
+router = APIRouter(prefix="/jobs")
+logger = logging.getLogger(__name__)
+
+def _job_urls(job_id: str) -> dict:
+    return {
+        "status_url": f"{settings.API_V1_STR}/jobs/{job_id}",
+        "result_url": f"{settings.API_V1_STR}/jobs/{job_id}/result",
+    }
+
+async def _get_job(job_id: str, claims: TokenClaims):
+    job = await asyncio.to_thread(runtime.get_jobs().store.get, job_id)
+    # Jobs of other clients are reported as missing so their ids are not confirmed
+    if job is None or job.client != claims.client:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+@router.post("", status_code=202)
+async def submit_job(
+    request: TTSJobRequest,
+    claims: TokenClaims = Depends(get_claims)
+):
+    """
+    Queue a synthesis job and return its id immediately
+    """
+    if not settings.JOBS_ENABLED:
+        raise HTTPException(status_code=404, detail="Jobs are disabled")
+    require_voice(claims, request.voice_profile)
+    limiter = runtime.get_rate_limiter()
+    if limiter is not None:
+        try:
+            limiter.check(claims.client)
+        except RateLimitExceededError as e:
+            logger.warning(f"Rate limiting client {claims.client}: {str(e)}")
+            raise HTTPException(
+                status_code=429,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)}
+            )
+    try:
+        params = resolve_inference_params(
+            preset=request.preset,
+            nfe_step=request.nfe_step,
+            cfg_strength=request.cfg_strength,
+            speed=request.speed,
+            adaptive=request.adaptive
+        )
+    except ValueError as e:
+        logger.error(f"Invalid inference parameters: {str(e)}")
+        raise HTTPException(status_code=422, detail=str(e))
+        
+    try:
+        # Fail fast on unknown voices and unsupported text instead of in the worker
+        service = await asyncio.to_thread(runtime.get_service)
+        await asyncio.to_thread(service.voices.get, request.voice)
+        await asyncio.to_thread(service.validate_text, request.text)
+        if request.webhook_url:
+            await asyncio.to_thread(
+                check_webhook_url, request.webhook_url, runtime.get_jobs().webhook_allowed_hosts
+            )
+        
+        job = await asyncio.to_thread(
+            runtime.get_jobs().submit,
+            {
+                "text": request.text,
+                "voice_profile": request.voice_profile,
+                "reference": request.reference,
+                "format": request.format,
+                "sample_rate": request.sample_rate,
+                "params": params.to_dict(),
+                # Chunks are queued and audio is charged for the submitting client
+                "client": claims.client,
+                "weight": claims.weight,
+            },
+            request.webhook_url
+        )
+        return {**job.to_dict(), **_job_urls(job.id)}
+        
+    except FileNotFoundError as e:
+        logger.error(f"Voice profile not available: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except UnsupportedTextError as e:
+        logger.error(f"Unsupported text: {str(e)}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except ValueError as e:
+        logger.error(f"Invalid job request: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error submitting job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: str, claims: TokenClaims = Depends(get_claims)):
+    """
+    Report a job's status and progress in text chunks
+    """
+    job = await _get_job(job_id, claims)
+    return {**job.to_dict(), **_job_urls(job.id)}
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str, claims: TokenClaims = Depends(get_claims)):
+    """
+    Download the audio of a finished job
+    """
+    job = await _get_job(job_id, claims)
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(status_code=404, detail="Job result has expired")
+        
+    ext = AUDIO_FORMATS[job.request.get("format", "wav")][3]
+    return FileResponse(
+        job.result_path,
+        media_type=job.media_type,
+        filename=f"{job.id}.{ext}"
+    )
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str, claims: TokenClaims = Depends(get_claims)):
+    """
+    Cancel a queued job
+    """
+    job = await _get_job(job_id, claims)
+    cancelled = await asyncio.to_thread(runtime.get_jobs().cancel, job_id)
+    if not cancelled:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status} and can no longer be cancelled")
+    return {**(await _get_job(job_id, claims)).to_dict(), **_job_urls(job_id)}
@@ -1,47 +1,569 @@
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import FileResponse
-from app.core.security import validate_token
-from app.api.models.tts import TTSRequest
-from app.services.tts_service import F5TTSService
+from fastapi.responses import Response, StreamingResponse
+from app.core.metrics import AUDIO_SECONDS, REAL_TIME_FACTOR, REQUEST_SECONDS, REQUESTS, STAGE_SECONDS
+from app.core.security import TokenClaims, get_claims, get_verifier, require_voice, validate_token
+from app.api.models.tts import TTSBatchRequest, TTSLongFormRequest, TTSRequest, TTSStreamRequest
+from app.services.audio import AUDIO_FORMATS, encode_audio, resample
+from app.services.bulk import BulkItem, build_archive, synthesize_bulk
+from app.services.executor import InferenceTimeoutError, QueueFullError
+from app.services.longform import normalize_text, segment_text, synthesize_segments
+from app.services.presets import resolve_inference_params
+from app.services.rate_limit import RateLimitExceededError
+from app.services.runtime import runtime
+from app.services.streaming import StreamingCrossfader, pcm16_bytes, wav_stream_header
+from app.services.text_frontend import UnsupportedTextError
+from app.services.voice_registry import split_voice_key
+import asyncio
 import logging
 import os
+import time
 from app.core.config import settings
 
 router = APIRouter(prefix="/tts")
 logger = logging.getLogger(__name__)
-tts_service = None
+
+def _resolve_params(request: TTSRequest):
+    """Resolve sampling parameters, rejecting out-of-bounds values"""
+    try:
+        return resolve_inference_params(
+            preset=request.preset,
+            nfe_step=request.nfe_step,
+            cfg_strength=request.cfg_strength,
+            speed=request.speed,
+            adaptive=request.adaptive
+        )
+    except ValueError as e:
+        logger.error(f"Invalid inference parameters: {str(e)}")
+        raise HTTPException(status_code=422, detail=str(e))
+
+def _check_rate_limit(claims: TokenClaims):
+    """Take a request token for the client, rejecting it with 429 when exhausted"""
+    limiter = runtime.get_rate_limiter()
+    if limiter is None:
+        return
+    try:
+        limiter.check(claims.client)
+    except RateLimitExceededError as e:
+        logger.warning(f"Rate limiting client {claims.client}: {str(e)}")
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+def _charge_audio(claims: TokenClaims, seconds: float):
+    limiter = runtime.get_rate_limiter()
+    if limiter is not None:
+        limiter.charge_audio(claims.client, seconds)
+
+async def _validate_text(endpoint: str, request: TTSRequest, started: float):
+    """Reject text the model cannot synthesize before it takes a queue slot"""
+    try:
+        service = await asyncio.to_thread(runtime.get_service)
+        await asyncio.to_thread(service.validate_text, request.text)
+    except UnsupportedTextError as e:
+        _observe_request(endpoint, request.voice_profile, "invalid", started)
+        logger.error(f"Unsupported text: {str(e)}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        _observe_request(endpoint, request.voice_profile, "error", started)
+        logger.error(f"Error validating text: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _media_type(request: TTSRequest, service) -> tuple:
+    """Media type and sample rate of a request's encoded output"""
+    sample_rate = request.sample_rate or service.sample_rate
+    media_type = AUDIO_FORMATS[request.format][2]
+    if request.format == "pcm":
+        media_type = f"{media_type};rate={sample_rate};channels=1"
+    return media_type, sample_rate
+
+def _audio_response(audio: bytes, media_type: str, fmt: str, cache_status: str) -> Response:
+    return Response(
+        content=audio,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="synthesized_speech.{AUDIO_FORMATS[fmt][3]}"',
+            "X-Cache": cache_status
+        }
+    )
+
+def _observe_request(endpoint: str, voice_profile: str, outcome: str, started: float, audio_seconds: float = 0.0):
+    """Record the outcome, latency and real-time factor of a request"""
+    elapsed = time.perf_counter() - started
+    if voice_profile not in runtime.get_catalog():
+        # Names are caller-controlled and may be rejected before any lookup;
+        # only existing profiles become labels so cardinality stays bounded
+        voice_profile = "unknown"
+    REQUESTS.inc(endpoint=endpoint, voice_profile=voice_profile, outcome=outcome)
+    REQUEST_SECONDS.observe(elapsed, endpoint=endpoint)
+    if audio_seconds > 0 and elapsed > 0:
+        AUDIO_SECONDS.inc(audio_seconds, endpoint=endpoint)
+        REAL_TIME_FACTOR.observe(audio_seconds / elapsed, endpoint=endpoint)
+
+def _encode_audio(*args):
+    with STAGE_SECONDS.time(stage="encode"):
+        return encode_audio(*args)
+
+class _StreamCompletion:
+    """Returns a streamed request's queue slot and records its outcome, exactly once"""
+
+    def __init__(self, endpoint: str, voice_profile: str, claims: TokenClaims, executor, started: float,
+                 sample_rate: int):
+        self.endpoint = endpoint
+        self.voice_profile = voice_profile
+        self.claims = claims
+        self.executor = executor
+        self.started = started
+        self.sample_rate = sample_rate
+        self.outcome = "error"
+        self.samples = 0
+        self._closed = False
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.executor.release()
+        seconds = self.samples / self.sample_rate
+        _charge_audio(self.claims, seconds)
+        _observe_request(self.endpoint, self.voice_profile, self.outcome, self.started, seconds)
+
+class _GuardedStreamingResponse(StreamingResponse):
+    """
+    Streaming response that runs on_close however it ends
+
+    The body generator's finally block does not run when the client
+    disconnects before the body is iterated, and background tasks are
+    skipped on disconnects, so on_close runs after the response instead.
+    """
+    def __init__(self, content, on_close, **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.on_close()
 
 @router.post("/synthesize")
 async def synthesize_speech(
     request: TTSRequest,
-    token: str = Depends(validate_token)
+    claims: TokenClaims = Depends(get_claims)
 ):
     """
     Synthesize speech from text using specified voice profile
     """
+    started = time.perf_counter()
+    outcome = "error"
+    audio_seconds = 0.0
     try:
-        global tts_service
-        if tts_service is None:
-            logger.info("Initializing TTS service")
-            tts_service = F5TTSService(
-                model_dir=settings.MODEL_DIR,
-                voice_profile=request.voice_profile
-            )
+        executor = runtime.get_executor()
+        scheduler = runtime.get_scheduler()
+        cache = runtime.get_cache()
+        outcome = "rate_limited"
+        _check_rate_limit(claims)
+        outcome = "invalid"
+        require_voice(claims, request.voice_profile)
+        params = _resolve_params(request)
+        outcome = "error"
         
-        logger.info(f"Synthesizing speech for text: {request.text[:50]}...")
-        output_path = tts_service.synthesize(
-            text=request.text
+        # Cache lookups must not queue behind running batches
+        service = await asyncio.to_thread(runtime.get_service)
+        key = await asyncio.to_thread(
+            service.result_key,
+            request.text,
+            request.voice,
+            params,
+            format=request.format,
+            sample_rate=request.sample_rate
         )
+        if cache is not None:
+            audio = await asyncio.to_thread(cache.get, key)
+            if audio is not None:
+                logger.info(f"Serving cached speech for text: {request.text[:50]}...")
+                outcome = "cache_hit"
+                media_type, _ = _media_type(request, service)
+                return _audio_response(audio, media_type, request.format, cache_status="hit")
+        
+        await asyncio.to_thread(service.validate_text, request.text)
+        async with executor.admission():
+            logger.info(f"Synthesizing speech for text: {request.text[:50]}...")
+            wave = await executor.wait_for(scheduler.submit(
+                text=request.text,
+                voice_profile=request.voice,
+                options=params,
+                priority=claims.priority,
+                client=claims.client,
+                weight=claims.weight
+            ))
         
-        if not output_path:
+        if wave is None:
             raise HTTPException(status_code=500, detail="Speech synthesis failed")
             
-        return FileResponse(
-            output_path,
-            media_type="audio/wav",
-            filename="synthesized_speech.wav"
+        audio, media_type = await asyncio.to_thread(
+            _encode_audio,
+            wave,
+            service.sample_rate,
+            request.format,
+            request.sample_rate
         )
+        if cache is not None:
+            await asyncio.to_thread(cache.put, key, audio)
+        outcome = "success"
+        audio_seconds = len(wave) / service.sample_rate
+        _charge_audio(claims, audio_seconds)
+        return _audio_response(audio, media_type, request.format, cache_status="miss")
         
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        outcome = "rejected"
+        logger.warning(f"Rejecting synthesis request: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except InferenceTimeoutError as e:
+        outcome = "timeout"
+        logger.error(f"Speech synthesis timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except FileNotFoundError as e:
+        outcome = "not_found"
+        logger.error(f"Voice profile not available: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except UnsupportedTextError as e:
+        outcome = "invalid"
+        logger.error(f"Unsupported text: {str(e)}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except ValueError as e:
+        outcome = "invalid"
+        logger.error(f"Invalid synthesis request: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error in speech synthesis: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        _observe_request("synthesize", request.voice_profile, outcome, started, audio_seconds)
+
+@router.post("/stream")
+async def stream_speech(
+    request: TTSStreamRequest,
+    claims: TokenClaims = Depends(get_claims)
+):
+    """
+    Stream speech sentence by sentence as each chunk is vocoded
+    """
+    started = time.perf_counter()
+    executor = runtime.get_executor()
+    vocoder = runtime.get_vocoder()
+    try:
+        _check_rate_limit(claims)
+    except HTTPException:
+        _observe_request("stream", request.voice_profile, "rate_limited", started)
+        raise
+    try:
+        require_voice(claims, request.voice_profile)
+        params = _resolve_params(request)
+    except HTTPException:
+        _observe_request("stream", request.voice_profile, "invalid", started)
+        raise
+    await _validate_text("stream", request, started)
+    try:
+        executor.try_admit()
+    except QueueFullError as e:
+        _observe_request("stream", request.voice_profile, "rejected", started)
+        logger.warning(f"Rejecting streaming request: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+        
+    try:
+        # Setup stays off the inference pool so the first chunk is not queued behind it
+        service = await asyncio.to_thread(runtime.get_service)
+        chunks = await asyncio.to_thread(
+            service.split_text,
+            request.text,
+            request.voice,
+            settings.STREAM_MAX_CHUNK_CHARS,
+            params.speed
+        )
+    except asyncio.CancelledError:
+        # The client went away during setup
+        executor.release()
+        raise
+    except FileNotFoundError as e:
+        executor.release()
+        _observe_request("stream", request.voice_profile, "not_found", started)
+        logger.error(f"Voice profile not available: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        executor.release()
+        _observe_request("stream", request.voice_profile, "invalid", started)
+        logger.error(f"Invalid synthesis request: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        executor.release()
+        _observe_request("stream", request.voice_profile, "error", started)
+        logger.error(f"Error in speech streaming: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+        
+    logger.info(f"Streaming {len(chunks)} chunks for text: {request.text[:50]}...")
+    
+    media_type, sample_rate = _media_type(request, service)
+    completion = _StreamCompletion("stream", request.voice_profile, claims, executor, started, sample_rate)
+    
+    async def generate_chunk(chunk: str):
+        # Sampled on the inference pool, then decoded on the vocoder stage
+        mels = await executor.wait_for(executor.run(
+            service.sample, [chunk], request.voice, params, client=claims.client, weight=claims.weight
+        ))
+        waves = await executor.wait_for(vocoder.decode(mels, request.voice))
+        return resample(waves[0], service.sample_rate, sample_rate)
+        
+    async def audio_stream():
+        crossfader = StreamingCrossfader(sample_rate=sample_rate)
+        pending = None
+        try:
+            if request.format == "wav":
+                yield wav_stream_header(sample_rate)
+            # Keep the next chunk sampling while the current one is sent
+            for index in range(len(chunks)):
+                current = pending or asyncio.ensure_future(generate_chunk(chunks[index]))
+                pending = None
+                if index + 1 < len(chunks):
+                    pending = asyncio.ensure_future(generate_chunk(chunks[index + 1]))
+                wave = await current
+                completion.samples += len(wave)
+                yield pcm16_bytes(crossfader.push(wave))
+            yield pcm16_bytes(crossfader.flush())
+            completion.outcome = "success"
+        except InferenceTimeoutError as e:
+            completion.outcome = "timeout"
+            logger.error(f"Speech streaming timed out: {str(e)}")
+        except Exception as e:
+            # Headers are already sent, so the stream just ends early
+            logger.error(f"Error in speech streaming: {str(e)}")
+        finally:
+            if pending is not None:
+                pending.cancel()
+            completion.close()
+            
+    return _GuardedStreamingResponse(
+        audio_stream(),
+        on_close=completion.close,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="synthesized_speech.{request.format}"'}
+    )
+
+@router.post("/longform")
+async def stream_longform_speech(
+    request: TTSLongFormRequest,
+    claims: TokenClaims = Depends(get_claims)
+):
+    """
+    Stream speech for a whole document
+    
+    The text is normalized and segmented, and the segments run through a
+    pipeline that vocodes one batch while the next is sampled.
+    """
+    started = time.perf_counter()
+    executor = runtime.get_executor()
+    vocoder = runtime.get_vocoder()
+    try:
+        _check_rate_limit(claims)
+    except HTTPException:
+        _observe_request("longform", request.voice_profile, "rate_limited", started)
+        raise
+    try:
+        require_voice(claims, request.voice_profile)
+        params = _resolve_params(request)
+    except HTTPException:
+        _observe_request("longform", request.voice_profile, "invalid", started)
+        raise
+    await _validate_text("longform", request, started)
+    try:
+        executor.try_admit()
+    except QueueFullError as e:
+        _observe_request("longform", request.voice_profile, "rejected", started)
+        logger.warning(f"Rejecting long-form request: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+        
+    try:
+        service = await asyncio.to_thread(runtime.get_service)
+        text = normalize_text(request.text)
+        segments = await asyncio.to_thread(segment_text, text, service, request.voice, params.speed)
+    except asyncio.CancelledError:
+        # The client went away during setup
+        executor.release()
+        raise
+    except FileNotFoundError as e:
+        executor.release()
+        _observe_request("longform", request.voice_profile, "not_found", started)
+        logger.error(f"Voice profile not available: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        executor.release()
+        _observe_request("longform", request.voice_profile, "invalid", started)
+        logger.error(f"Invalid synthesis request: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        executor.release()
+        _observe_request("longform", request.voice_profile, "error", started)
+        logger.error(f"Error in long-form synthesis: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+        
+    logger.info(f"Streaming {len(segments)} long-form segments ({len(text)} characters)")
+    
+    media_type, sample_rate = _media_type(request, service)
+    completion = _StreamCompletion("longform", request.voice_profile, claims, executor, started, sample_rate)
+    
+    async def audio_stream():
+        crossfader = StreamingCrossfader(sample_rate=sample_rate)
+        try:
+            if request.format == "wav":
+                yield wav_stream_header(sample_rate)
+            async for wave in synthesize_segments(
+                segments,
+                request.voice,
+                params,
+                service,
+                executor,
+                vocoder,
+                batch_size=settings.LONGFORM_BATCH_SIZE,
+                client=claims.client,
+                weight=claims.weight
+            ):
+                wave = resample(wave, service.sample_rate, sample_rate)
+                completion.samples += len(wave)
+                yield pcm16_bytes(crossfader.push(wave))
+            yield pcm16_bytes(crossfader.flush())
+            completion.outcome = "success"
+        except InferenceTimeoutError as e:
+            completion.outcome = "timeout"
+            logger.error(f"Long-form synthesis timed out: {str(e)}")
+        except Exception as e:
+            # Headers are already sent, so the stream just ends early
+            logger.error(f"Error in long-form synthesis: {str(e)}")
+        finally:
+            completion.close()
+            
+    return _GuardedStreamingResponse(
+        audio_stream(),
+        on_close=completion.close,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="synthesized_speech.{request.format}"'}
+    )
+
+@router.post("/batch")
+async def synthesize_batch(
+    request: TTSBatchRequest,
+    claims: TokenClaims = Depends(get_claims)
+):
+    """
+    Synthesize many items in one request and return them as a zip archive
+    
+    Items that fail are reported in the archive's manifest.json instead of
+    failing the whole batch.
+    """
+    started = time.perf_counter()
+    _check_rate_limit(claims)
+    executor = runtime.get_executor()
+    cache = runtime.get_cache()
+    
+    items = []
+    for index, item in enumerate(request.items):
+        bulk_item = BulkItem(
+            index=index,
+            text=item.text,
+            voice_profile=item.voice,
+            format=item.format,
+            sample_rate=item.sample_rate,
+            id=item.id
+        )
+        try:
+            bulk_item.params = resolve_inference_params(
+                preset=item.preset,
+                nfe_step=item.nfe_step,
+                cfg_strength=item.cfg_strength,
+                speed=item.speed,
+                adaptive=item.adaptive
+            )
+        except ValueError as e:
+            bulk_item.error = str(e)
+        if not claims.allows_voice(item.voice_profile):
+            bulk_item.error = f"Token does not grant voice profile: {item.voice_profile}"
+        items.append(bulk_item)
+        
+    try:
+        # The whole batch occupies a single queue slot
+        async with executor.admission():
+            logger.info(f"Synthesizing batch of {len(items)} items")
+            service = await asyncio.to_thread(runtime.get_service)
+            results = await synthesize_bulk(
+                items,
+                service,
+                executor,
+                cache=cache,
+                slice_size=settings.BULK_SLICE_SIZE,
+                vocoder=runtime.get_vocoder(),
+                client=claims.client,
+                weight=claims.weight,
+                on_audio=lambda seconds: _charge_audio(claims, seconds)
+            )
+        archive = await asyncio.to_thread(build_archive, results, {"format_version": 1})
+    except QueueFullError as e:
+        logger.warning(f"Rejecting batch request: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        logger.error(f"Error in batch synthesis: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+        
+    succeeded = sum(result.status == "succeeded" for result in results)
+    for item, result in zip(items, results):
+        outcome = "success" if result.status == "succeeded" else "error"
+        voice_profile = split_voice_key(item.voice_profile)[0] if outcome == "success" else "unknown"
+        REQUESTS.inc(endpoint="batch", voice_profile=voice_profile, outcome=outcome)
+    REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="batch")
+    
+    return Response(
+        content=archive,
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="synthesized_speech.zip"',
+            "X-Batch-Succeeded": str(succeeded),
+            "X-Batch-Failed": str(len(results) - succeeded)
+        }
+    )
+
+@router.get("/stats")
+async def synthesis_stats(token: str = Depends(validate_token)):
+    """
+    Report batching and inference queue statistics
+    """
+    cache = runtime.get_cache()
+    limiter = runtime.get_rate_limiter()
+    return {
+        "startup": runtime.readiness(),
+        "batching": runtime.get_scheduler().stats(),
+        "inference": runtime.get_executor().stats(),
+        "vocoder": runtime.get_vocoder().stats(),
+        "cache": cache.stats() if cache is not None else None,
+        "workers": runtime.worker_stats(),
+        "text": runtime.text_stats(),
+        "auth": get_verifier().stats(),
+        "rate_limit": limiter.stats() if limiter is not None else None,
+        "voices": runtime.get_catalog().stats()
+    }
@@ -1,6 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.core.security import validate_token
-import os
+from fastapi import APIRouter, HTTPException, Depends, File, Form, UploadFile
+from app.core.security import TokenClaims, get_claims, require_voice, require_voice_admin
+from app.services.executor import QueueFullError
+from app.services.runtime import runtime
+from app.services.voice_catalog import validate_voice_name
+from typing import List
+import asyncio
 from app.core.config import settings
 import logging
 
@@ -8,19 +12,135 @@ router = APIRouter(prefix="/voices")
 logger = logging.getLogger(__name__)
 
 @router.get("/list")
-async def list_voice_profiles(token: str = Depends(validate_token)):
+async def list_voice_profiles(claims: TokenClaims = Depends(get_claims)):
     """
-    List available voice profiles
+    List the voice profiles the token grants, with their samples and readiness
     """
     try:
-        profiles_dir = settings.VOICE_PROFILES_DIR
-        if not os.path.exists(profiles_dir):
-            return {"profiles": []}
-            
-        profiles = [d for d in os.listdir(profiles_dir) 
-                   if os.path.isdir(os.path.join(profiles_dir, d))]
-        return {"profiles": profiles}
-        
+        voices = runtime.get_catalog().list()
+        if claims.voices is not None:
+            voices = [voice for voice in voices if claims.allows_voice(voice["name"])]
+        return {"profiles": [voice["name"] for voice in voices], "voices": voices}
+
     except Exception as e:
         logger.error(f"Error listing voice profiles: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{voice_profile}")
+async def get_voice_profile(voice_profile: str, claims: TokenClaims = Depends(get_claims)):
+    """
+    Describe one voice profile
+    """
+    require_voice(claims, voice_profile)
+    entry = runtime.get_catalog().get(voice_profile)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Voice profile not found: {voice_profile}")
+    return entry.to_dict()
+
+async def _create_voice_profile(
+    voice_profile: str,
+    files: List[UploadFile],
+    transcripts: List[str],
+    replace: bool,
+    claims: TokenClaims
+):
+    require_voice_admin(claims)
+    require_voice(claims, voice_profile)
+    try:
+        validate_voice_name(voice_profile)
+        if voice_profile == "list":
+            raise ValueError("Invalid voice profile name: list")
+        if len(files) > settings.VOICE_MAX_UPLOAD_FILES:
+            raise ValueError(f"Got {len(files)} audio files, at most {settings.VOICE_MAX_UPLOAD_FILES} are allowed")
+        if len(transcripts) > len(files):
+            raise ValueError(f"Got {len(transcripts)} transcripts for {len(files)} audio files")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    samples = []
+    max_bytes = settings.VOICE_MAX_UPLOAD_MB * 1024 * 1024
+    for index, upload in enumerate(files):
+        data = await upload.read(max_bytes + 1)
+        if len(data) > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Audio file {upload.filename} exceeds {settings.VOICE_MAX_UPLOAD_MB} MB"
+            )
+        # Samples without a transcript are transcribed when their features are computed
+        samples.append((data, transcripts[index] if index < len(transcripts) else ""))
+
+    try:
+        catalog = runtime.get_catalog()
+        service = await asyncio.to_thread(runtime.get_service)
+        executor = runtime.get_executor()
+        # Reference features are computed by the inference pool, in turn with synthesis requests
+        async with executor.admission():
+            entry = await executor.run(
+                catalog.create, voice_profile, samples, service.prepare_voice, replace,
+                client=claims.client, weight=claims.weight
+            )
+        return entry.to_dict()
+
+    except HTTPException:
+        raise
+    except FileExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        logger.error(f"Invalid voice profile upload: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        logger.warning(f"Rejecting voice profile upload: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        logger.error(f"Error creating voice profile: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{voice_profile}", status_code=201)
+async def create_voice_profile(
+    voice_profile: str,
+    files: List[UploadFile] = File(...),
+    transcripts: List[str] = Form(default=[]),
+    claims: TokenClaims = Depends(get_claims)
+):
+    """
+    Create a voice profile from reference audio files and their transcripts
+
+    The audio is validated and the reference features are precomputed
+    before the profile becomes visible; 409 if the profile exists.
+    """
+    return await _create_voice_profile(voice_profile, files, transcripts, False, claims)
+
+@router.put("/{voice_profile}")
+async def replace_voice_profile(
+    voice_profile: str,
+    files: List[UploadFile] = File(...),
+    transcripts: List[str] = Form(default=[]),
+    claims: TokenClaims = Depends(get_claims)
+):
+    """
+    Create or replace a voice profile; requests already using it finish with the old samples
+    """
+    return await _create_voice_profile(voice_profile, files, transcripts, True, claims)
+
+@router.delete("/{voice_profile}")
+async def delete_voice_profile(voice_profile: str, claims: TokenClaims = Depends(get_claims)):
+    """
+    Delete a voice profile
+    """
+    require_voice_admin(claims)
+    require_voice(claims, voice_profile)
+    try:
+        await asyncio.to_thread(runtime.get_catalog().delete, voice_profile)
+        return {"deleted": voice_profile}
+
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error deleting voice profile: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
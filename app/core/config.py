@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 
 class Settings(BaseSettings):
@@ -10,10 +10,138 @@ class Settings(BaseSettings):
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # "secret" verifies HS256 tokens with SECRET_KEY, "jwks" uses the public keys in JWT_JWKS_FILE
+    JWT_BACKEND: str = os.getenv("JWT_BACKEND", "secret")
+    JWT_ALGORITHMS: str = os.getenv("JWT_ALGORITHMS", "")
+    JWT_JWKS_FILE: str = os.getenv("JWT_JWKS_FILE", "")
+    JWT_AUDIENCE: str = os.getenv("JWT_AUDIENCE", "")
+    JWT_ISSUER: str = os.getenv("JWT_ISSUER", "")
+    JWT_CACHE_SIZE: int = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+    JWT_CACHE_TTL_S: float = float(os.getenv("JWT_CACHE_TTL_S", "300"))
+    
+    # Rate tiers from the token's "tier" claim; lower priorities are scheduled first
+    TIER_PRIORITIES: Dict[str, int] = {"premium": 0, "standard": 1, "free": 2}
+    # Share of the inference pool each client of a tier gets while others wait
+    TIER_WEIGHTS: Dict[str, float] = {"premium": 4.0, "standard": 2.0, "free": 1.0}
+    DEFAULT_TIER: str = os.getenv("DEFAULT_TIER", "standard")
+    
+    # Per-client (JWT "sub") token bucket rate limits; a rate of 0 disables that limit
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
+    # "memory" or "package.module:ClassName" of a RateLimitBackend
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_REQUESTS_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_REQUESTS_PER_MINUTE", "60"))
+    RATE_LIMIT_REQUEST_BURST: float = float(os.getenv("RATE_LIMIT_REQUEST_BURST", "20"))
+    RATE_LIMIT_AUDIO_SECONDS_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_AUDIO_SECONDS_PER_MINUTE", "600"))
+    RATE_LIMIT_AUDIO_SECONDS_BURST: float = float(os.getenv("RATE_LIMIT_AUDIO_SECONDS_BURST", "1200"))
     
     # TTS Settings
     MODEL_DIR: str = os.getenv("MODEL_DIR", "weights")
+    # Checkpoint file in MODEL_DIR, empty for a converted .safetensors file if present, else the .pt file
+    MODEL_CHECKPOINT: str = os.getenv("MODEL_CHECKPOINT", "")
     VOICE_PROFILES_DIR: str = os.getenv("VOICE_PROFILES_DIR", "voice_profiles")
+    VOCODER_DIR: str = os.getenv("VOCODER_DIR", "vocos-mel-24khz")
+    VOICE_CACHE_SIZE: int = int(os.getenv("VOICE_CACHE_SIZE", "32"))
+    VOICE_CACHE_MAX_MB: int = int(os.getenv("VOICE_CACHE_MAX_MB", "512"))
+    VOICE_CATALOG_POLL_S: float = float(os.getenv("VOICE_CATALOG_POLL_S", "2"))
+    VOICE_MIN_SECONDS: float = float(os.getenv("VOICE_MIN_SECONDS", "1"))
+    VOICE_MAX_SECONDS: float = float(os.getenv("VOICE_MAX_SECONDS", "30"))
+    VOICE_MAX_UPLOAD_MB: int = int(os.getenv("VOICE_MAX_UPLOAD_MB", "20"))
+    VOICE_MAX_UPLOAD_FILES: int = int(os.getenv("VOICE_MAX_UPLOAD_FILES", "10"))
+    # Token scope needed to create, replace and delete voice profiles
+    VOICE_ADMIN_SCOPE: str = os.getenv("VOICE_ADMIN_SCOPE", "voices:write")
+    # A profile conditions on its shortest sample meeting these thresholds
+    VOICE_REF_MIN_SECONDS: float = float(os.getenv("VOICE_REF_MIN_SECONDS", "3"))
+    VOICE_REF_MIN_SNR_DB: float = float(os.getenv("VOICE_REF_MIN_SNR_DB", "20"))
+    VOICE_REF_MAX_CLIPPING: float = float(os.getenv("VOICE_REF_MAX_CLIPPING", "0.001"))
+    
+    # "f5" for the real model, "stub" for the latency-only stand-in used by benchmarks
+    TTS_BACKEND: str = os.getenv("TTS_BACKEND", "f5")
+    STUB_BATCH_LATENCY_MS: float = float(os.getenv("STUB_BATCH_LATENCY_MS", "50"))
+    STUB_STEP_LATENCY_MS: float = float(os.getenv("STUB_STEP_LATENCY_MS", "2"))
+    STUB_ITEM_LATENCY_MS: float = float(os.getenv("STUB_ITEM_LATENCY_MS", "5"))
+    
+    # Startup
+    EAGER_LOAD: bool = os.getenv("EAGER_LOAD", "true").lower() == "true"
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_VOICE: str = os.getenv("WARMUP_VOICE", "")
+    WARMUP_TEXT: str = os.getenv("WARMUP_TEXT", "Warming up the speech model.")
+    
+    # Batching
+    BATCH_MAX_SIZE: int = int(os.getenv("BATCH_MAX_SIZE", "8"))
+    BATCH_MAX_WAIT_MS: float = float(os.getenv("BATCH_MAX_WAIT_MS", "20"))
+    BATCH_LENGTH_BUCKET_CHARS: int = int(os.getenv("BATCH_LENGTH_BUCKET_CHARS", "100"))
+    
+    # Bulk synthesis
+    BULK_MAX_ITEMS: int = int(os.getenv("BULK_MAX_ITEMS", "500"))
+    BULK_SLICE_SIZE: int = int(os.getenv("BULK_SLICE_SIZE", "8"))
+    
+    # Long-form synthesis
+    LONGFORM_MAX_TEXT_CHARS: int = int(os.getenv("LONGFORM_MAX_TEXT_CHARS", "200000"))
+    LONGFORM_BATCH_SIZE: int = int(os.getenv("LONGFORM_BATCH_SIZE", "4"))
+    
+    # Asynchronous jobs
+    JOBS_ENABLED: bool = os.getenv("JOBS_ENABLED", "true").lower() == "true"
+    JOBS_DIR: str = os.getenv("JOBS_DIR", "jobs")
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "1"))
+    JOB_MAX_TEXT_CHARS: int = int(os.getenv("JOB_MAX_TEXT_CHARS", "100000"))
+    JOB_TTL_S: float = float(os.getenv("JOB_TTL_S", "86400"))
+    JOB_WEBHOOK_TIMEOUT_S: float = float(os.getenv("JOB_WEBHOOK_TIMEOUT_S", "10"))
+    JOB_WEBHOOK_RETRIES: int = int(os.getenv("JOB_WEBHOOK_RETRIES", "3"))
+    # Comma-separated hosts webhooks may target; empty allows any public host
+    JOB_WEBHOOK_ALLOWED_HOSTS: str = os.getenv("JOB_WEBHOOK_ALLOWED_HOSTS", "")
+    
+    # Inference worker pool
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", "1"))
+    INFERENCE_QUEUE_SIZE: int = int(os.getenv("INFERENCE_QUEUE_SIZE", "32"))
+    INFERENCE_TIMEOUT_S: float = float(os.getenv("INFERENCE_TIMEOUT_S", "120"))
+    VOCODER_BATCH_SIZE: int = int(os.getenv("VOCODER_BATCH_SIZE", "8"))
+    
+    # Execution mode of the model
+    INFERENCE_DTYPE: str = os.getenv("INFERENCE_DTYPE", "fp32")
+    INFERENCE_COMPILE: bool = os.getenv("INFERENCE_COMPILE", "false").lower() == "true"
+    INFERENCE_QUANTIZE: str = os.getenv("INFERENCE_QUANTIZE", "none")
+    CPU_THREADS: int = int(os.getenv("CPU_THREADS", "0"))
+    CPU_INTEROP_THREADS: int = int(os.getenv("CPU_INTEROP_THREADS", "0"))
+    
+    # Text front end: spell out numbers and abbreviations, cache tokenized inputs
+    TEXT_NORMALIZATION: bool = os.getenv("TEXT_NORMALIZATION", "true").lower() == "true"
+    TEXT_CACHE_SIZE: int = int(os.getenv("TEXT_CACHE_SIZE", "4096"))
+    
+    # Inference worker processes (0 runs the model in the API process)
+    WORKER_PROCESSES: int = int(os.getenv("WORKER_PROCESSES", "0"))
+    WORKER_DEVICES: str = os.getenv("WORKER_DEVICES", "auto")
+    WORKER_AFFINITY_SLACK: int = int(os.getenv("WORKER_AFFINITY_SLACK", "2"))
+    WORKER_START_TIMEOUT_S: float = float(os.getenv("WORKER_START_TIMEOUT_S", "600"))
+    
+    # Result cache
+    RESULT_CACHE_ENABLED: bool = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+    RESULT_CACHE_DIR: str = os.getenv("RESULT_CACHE_DIR", "result_cache")
+    RESULT_CACHE_MEMORY_MB: int = int(os.getenv("RESULT_CACHE_MEMORY_MB", "64"))
+    RESULT_CACHE_DISK_MB: int = int(os.getenv("RESULT_CACHE_DISK_MB", "1024"))
+    RESULT_CACHE_TTL_S: float = float(os.getenv("RESULT_CACHE_TTL_S", "604800"))
+    
+    # Inference presets, selected per request with "preset"
+    INFERENCE_PRESETS: Dict[str, Dict[str, float]] = {
+        "realtime": {"nfe_step": 12, "cfg_strength": 2.0, "sway_sampling_coef": -1.0},
+        "balanced": {"nfe_step": 20, "cfg_strength": 2.0, "sway_sampling_coef": -1.0},
+        "quality": {"nfe_step": 32, "cfg_strength": 2.0, "sway_sampling_coef": -1.0},
+    }
+    DEFAULT_PRESET: str = os.getenv("DEFAULT_PRESET", "quality")
+    NFE_STEP_MIN: int = int(os.getenv("NFE_STEP_MIN", "4"))
+    NFE_STEP_MAX: int = int(os.getenv("NFE_STEP_MAX", "64"))
+    CFG_STRENGTH_MAX: float = float(os.getenv("CFG_STRENGTH_MAX", "5.0"))
+    SPEED_MIN: float = float(os.getenv("SPEED_MIN", "0.5"))
+    SPEED_MAX: float = float(os.getenv("SPEED_MAX", "2.0"))
+    
+    # Adaptive sampling: default for requests that do not set "adaptive",
+    # and its step-size control (check with scripts/calibrate_adaptive.py)
+    ADAPTIVE_SAMPLING: bool = os.getenv("ADAPTIVE_SAMPLING", "false").lower() == "true"
+    ADAPTIVE_TOLERANCE: float = float(os.getenv("ADAPTIVE_TOLERANCE", "0.05"))
+    ADAPTIVE_MIN_STEPS: int = int(os.getenv("ADAPTIVE_MIN_STEPS", "6"))
+    ADAPTIVE_MAX_STRIDE: int = int(os.getenv("ADAPTIVE_MAX_STRIDE", "8"))
+    
+    # Streaming
+    STREAM_MAX_CHUNK_CHARS: int = int(os.getenv("STREAM_MAX_CHUNK_CHARS", "100"))
     
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
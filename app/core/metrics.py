@@ -0,0 +1,275 @@
+import math
+import os
+import resource
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Latency buckets in seconds, from sub-millisecond stages to long syntheses
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+RTF_BUCKETS = (0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 20.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class Registry:
+    """
+    Collection of metrics rendered in the Prometheus text format
+    """
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric"):
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Sample lines of the metric in the text exposition format"""
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+GaugeFn = Callable[[], Union[float, Dict[LabelValues, float], None]]
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down
+
+    Either set explicitly or computed at scrape time from a callback
+    returning a value (or, for labelled gauges, a dict of label tuples to
+    values).
+    """
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[GaugeFn] = None
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def set_function(self, function: GaugeFn):
+        self._function = function
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                result = self._function()
+            except Exception:
+                result = None
+            if result is None:
+                values = []
+            elif isinstance(result, dict):
+                values = sorted(result.items())
+            else:
+                values = [((), result)]
+        else:
+            with self._lock:
+                values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> (bucket counts, sum)
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        """Observe the wall time of the enclosed block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+def process_resident_memory_bytes() -> Optional[float]:
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return float(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"))
+    except (OSError, ValueError, IndexError):
+        # Peak RSS is the best portable fallback (kilobytes on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return float(peak if os.uname().sysname == "Darwin" else peak * 1024)
+
+# Request level
+REQUESTS = Counter(
+    "tts_requests_total",
+    "Synthesis requests by endpoint, voice profile and outcome",
+    ["endpoint", "voice_profile", "outcome"]
+)
+REQUEST_SECONDS = Histogram(
+    "tts_request_duration_seconds",
+    "Total request latency",
+    ["endpoint"]
+)
+STAGE_SECONDS = Histogram(
+    "tts_stage_duration_seconds",
+    "Time spent per pipeline stage",
+    ["stage"]
+)
+REAL_TIME_FACTOR = Histogram(
+    "tts_real_time_factor",
+    "Seconds of audio produced per second of request wall time",
+    ["endpoint"],
+    buckets=RTF_BUCKETS
+)
+AUDIO_SECONDS = Counter(
+    "tts_audio_seconds_total",
+    "Seconds of audio synthesized",
+    ["endpoint"]
+)
+
+# Sampling
+SAMPLING_STEPS = Histogram(
+    "tts_sampling_steps",
+    "Model evaluations per sampled batch by sampling mode",
+    ["mode"],
+    buckets=(4, 8, 12, 16, 20, 24, 32, 48, 64)
+)
+SAMPLING_SPEEDUP = Histogram(
+    "tts_sampling_speedup",
+    "Scheduled steps per step taken by adaptive sampling",
+    buckets=(1.0, 1.25, 1.5, 2.0, 2.5, 3.0, 4.0, 6.0, 8.0)
+)
+SAMPLING_ESTIMATED_ERROR = Histogram(
+    "tts_sampling_estimated_error",
+    "Estimated relative deviation of adaptive sampling from the full schedule",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+
+# Memory
+PROCESS_MEMORY = Gauge("process_resident_memory_bytes", "Resident memory size in bytes")
+PROCESS_MEMORY.set_function(process_resident_memory_bytes)
+MODEL_MEMORY = Gauge(
+    "tts_model_memory_bytes",
+    "Bytes held by model weights and device allocations",
+    ["component"]
+)
+VOICE_CACHE_BYTES = Gauge("tts_voice_cache_bytes", "Bytes held by cached voice profiles")
+JOBS = Gauge("tts_jobs", "Jobs in the job store by status", ["status"])
+INFERENCE_QUEUE_DEPTH = Gauge("tts_inference_queue_depth", "Requests admitted to the inference queue")
+
+# Vocoder stage
+VOCODER_BUSY_SECONDS = Counter("tts_vocoder_busy_seconds_total", "Time the vocoder stage spent decoding")
+VOCODER_UTILIZATION = Gauge("tts_vocoder_utilization", "Fraction of the last minute the vocoder stage was busy")
+VOCODER_BATCH_SIZE = Histogram(
+    "tts_vocoder_batch_size",
+    "Mel spectrograms decoded per vocoder stage batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
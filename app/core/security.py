@@ -1,39 +1,232 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
-from datetime import datetime
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 security = HTTPBearer()
 
-def validate_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+@dataclass(frozen=True)
+class TokenClaims:
+    """Claims of a verified token that handlers act on"""
+    subject: Optional[str]
+    tier: str
+    # None allows every voice profile
+    voices: Optional[FrozenSet[str]]
+    expires_at: float
+    # Space-separated "scope" claim
+    scopes: FrozenSet[str] = frozenset()
+
+    def allows_voice(self, voice_profile: str) -> bool:
+        return self.voices is None or voice_profile in self.voices
+
+    @property
+    def manages_voices(self) -> bool:
+        """Whether the token may create, replace and delete voice profiles"""
+        return settings.VOICE_ADMIN_SCOPE in self.scopes
+
+    @property
+    def client(self) -> str:
+        """Key of the client for rate limits and fair scheduling"""
+        return self.subject or "anonymous"
+
+    @property
+    def weight(self) -> float:
+        """Fair share of the token's tier relative to other clients"""
+        weights = settings.TIER_WEIGHTS
+        return weights.get(self.tier, weights.get(settings.DEFAULT_TIER, 1.0))
+
+    @property
+    def priority(self) -> int:
+        """Scheduling priority of the token's tier, lower runs first"""
+        priorities = settings.TIER_PRIORITIES
+        return priorities.get(self.tier, priorities.get(settings.DEFAULT_TIER, 0))
+
+class _JWKSKeys:
+    def __init__(self, path: str):
+        """Public keys of a local JWKS file, reloaded when the file changes"""
+        self.path = path
+        self._mtime: Optional[float] = None
+        self._keys: Dict[Optional[str], jwt.PyJWK] = {}
+        self._lock = threading.Lock()
+
+    def get(self, kid: Optional[str]) -> jwt.PyJWK:
+        with self._lock:
+            mtime = os.stat(self.path).st_mtime
+            if mtime != self._mtime:
+                with open(self.path) as f:
+                    keys = jwt.PyJWKSet.from_dict(json.load(f)).keys
+                self._keys = {key.key_id: key for key in keys}
+                self._mtime = mtime
+                logger.info(f"Loaded {len(self._keys)} keys from {self.path}")
+            if kid is None and len(self._keys) == 1:
+                return next(iter(self._keys.values()))
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f"Unknown signing key: {kid}")
+        return key
+
+class TokenVerifier:
+    def __init__(
+        self,
+        backend: str = "secret",
+        secret_key: Optional[str] = None,
+        algorithms: Optional[List[str]] = None,
+        jwks_file: Optional[str] = None,
+        audience: Optional[str] = None,
+        issuer: Optional[str] = None,
+        cache_size: int = 10000,
+        cache_ttl_s: float = 300.0
+    ):
+        """
+        JWT verification with a cache of verified tokens
+
+        A verified token is cached until it expires or cache_ttl_s passes,
+        whichever comes first, so repeated requests with the same token skip
+        signature verification.
+
+        Args:
+            backend: "secret" for a shared secret (HS256), "jwks" for public
+                keys read from a local JWKS file (RS256, ES256, ...)
+            secret_key: Shared secret of the "secret" backend
+            algorithms: Accepted signing algorithms
+            jwks_file: Path of the JWKS file of the "jwks" backend
+            audience: Required "aud" claim, None to skip the check
+            issuer: Required "iss" claim, None to skip the check
+            cache_size: Maximum number of cached tokens, 0 disables the cache
+            cache_ttl_s: Maximum time a token stays cached
+        """
+        if backend not in ("secret", "jwks"):
+            raise ValueError(f"Unknown JWT backend: {backend}")
+        if backend == "jwks" and not jwks_file:
+            raise ValueError("The jwks backend needs a JWKS file")
+        self.backend = backend
+        self.secret_key = secret_key
+        self.algorithms = algorithms or (["HS256"] if backend == "secret" else ["RS256", "ES256"])
+        self.audience = audience or None
+        self.issuer = issuer or None
+        self.cache_size = max(0, cache_size)
+        self.cache_ttl = max(0.0, cache_ttl_s)
+        self._jwks = _JWKSKeys(jwks_file) if backend == "jwks" else None
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls) -> "TokenVerifier":
+        return cls(
+            backend=settings.JWT_BACKEND,
+            secret_key=settings.SECRET_KEY,
+            algorithms=[a.strip() for a in settings.JWT_ALGORITHMS.split(",") if a.strip()] or None,
+            jwks_file=settings.JWT_JWKS_FILE,
+            audience=settings.JWT_AUDIENCE,
+            issuer=settings.JWT_ISSUER,
+            cache_size=settings.JWT_CACHE_SIZE,
+            cache_ttl_s=settings.JWT_CACHE_TTL_S
+        )
+
+    def verify(self, token: str) -> TokenClaims:
+        """
+        Verify a token and return its claims
+
+        Raises:
+            jwt.InvalidTokenError: If the token is malformed, has a bad
+                signature, has no "exp" claim or has expired
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(token)
+            if entry is not None:
+                claims, valid_until = entry
+                if now < valid_until:
+                    self._cache.move_to_end(token)
+                    self.hits += 1
+                    return claims
+                del self._cache[token]
+            self.misses += 1
+
+        claims = self._decode(token)
+        if self.cache_size:
+            with self._lock:
+                self._cache[token] = (claims, min(claims.expires_at, now + self.cache_ttl))
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return claims
+
+    def _decode(self, token: str) -> TokenClaims:
+        if self._jwks is not None:
+            key = self._jwks.get(jwt.get_unverified_header(token).get("kid")).key
+        else:
+            key = self.secret_key
+        payload = jwt.decode(
+            token,
+            key,
+            algorithms=self.algorithms,
+            audience=self.audience,
+            issuer=self.issuer,
+            options={"require": ["exp"], "verify_aud": self.audience is not None}
+        )
+        voices = payload.get("voices")
+        if isinstance(voices, str):
+            voices = [voices]
+        scope = payload.get("scope") or ""
+        return TokenClaims(
+            subject=payload.get("sub"),
+            tier=str(payload.get("tier") or settings.DEFAULT_TIER),
+            voices=frozenset(voices) if voices is not None else None,
+            expires_at=float(payload["exp"]),
+            scopes=frozenset(scope.split() if isinstance(scope, str) else scope)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "size": len(self._cache),
+                "max_size": self.cache_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+_verifier: Optional[TokenVerifier] = None
+_verifier_lock = threading.Lock()
+
+def get_verifier() -> TokenVerifier:
+    """Return the shared token verifier, created from settings on first use"""
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = TokenVerifier.from_settings()
+    return _verifier
+
+async def get_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenClaims:
     """
-    Validate JWT token
+    Validate the bearer token and return its claims
     """
+    # Runs on the event loop: cache hits are cheap and misses are a single signature check
     try:
-        token = credentials.credentials
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=["HS256"]
-        )
-        
-        # Check if token has expired
-        exp = payload.get('exp')
-        if exp is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token has no expiration"
-            )
-            
-        if datetime.utcnow().timestamp() > exp:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token has expired"
-            )
-            
-        return token
-        
+        return get_verifier().verify(credentials.credentials)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has expired"
+        )
+    except jwt.MissingRequiredClaimError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has no expiration" if e.claim == "exp" else str(e)
+        )
     except jwt.InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -43,4 +236,37 @@ def validate_token(credentials: HTTPAuthorizationCredentials = Depends(security)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e)
-        ) 
\ No newline at end of file
+        )
+
+async def validate_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+    """
+    Validate JWT token
+    """
+    await get_claims(credentials)
+    return credentials.credentials
+
+def require_voice(claims: TokenClaims, voice_profile: str):
+    """
+    Reject voice profiles the token does not grant
+
+    Raises:
+        HTTPException: 403 if the token's "voices" claim excludes the profile
+    """
+    if not claims.allows_voice(voice_profile):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Token does not grant voice profile: {voice_profile}"
+        )
+
+def require_voice_admin(claims: TokenClaims):
+    """
+    Reject tokens that may not change voice profiles
+
+    Raises:
+        HTTPException: 403 if the token's "scope" claim lacks VOICE_ADMIN_SCOPE
+    """
+    if not claims.manages_voices:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Token lacks the {settings.VOICE_ADMIN_SCOPE} scope needed to change voice profiles"
+        )
@@ -1,8 +1,11 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import tts, voices
+from app.api.routes import jobs, tts, voices
 from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, REGISTRY
+from app.services.runtime import runtime
 import uvicorn
 import logging
 
@@ -10,15 +13,26 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Indexes the voice profiles and watches them for changes
+    runtime.get_catalog().start()
+    if settings.EAGER_LOAD:
+        # Load in the background so /health answers while the model loads
+        runtime.start()
+    if settings.JOBS_ENABLED:
+        # Picks up jobs queued or interrupted before a restart
+        runtime.get_jobs().start()
+    yield
+    await runtime.shutdown()
+
 app = FastAPI(
     title="F5-TTS API",
     description="Text-to-Speech API using F5-TTS model",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Security
-security = HTTPBearer()
-
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -31,12 +45,22 @@ app.add_middleware(
 # Include routers
 app.include_router(tts.router, prefix="/api/v1", tags=["tts"])
 app.include_router(voices.router, prefix="/api/v1", tags=["voices"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
 
 @app.get("/health")
 async def health_check():
     logger.info("Health check endpoint called")
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    readiness = runtime.readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+@app.get("/metrics")
+async def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     logger.info(f"Starting FastAPI application on port {settings.PORT}")
     uvicorn.run(app, host="0.0.0.0", port=settings.PORT) 
\ No newline at end of file
@@ -0,0 +1,128 @@
+import logging
+import warnings
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, List
+import torch
+import torch.nn as nn
+
+logger = logging.getLogger(__name__)
+
+DTYPES = {"fp32": torch.float32, "bf16": torch.bfloat16, "fp16": torch.float16}
+QUANTIZATION_MODES = ("none", "int8")
+
+@dataclass(frozen=True)
+class ExecutionMode:
+    """How the model is executed on its device"""
+    dtype: str = "fp32"
+    compile: bool = False
+    quantize: str = "none"
+    threads: int = 0
+    interop_threads: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def resolve_mode(mode: ExecutionMode, device: torch.device) -> ExecutionMode:
+    """
+    Validate an execution mode and adapt it to the device
+
+    fp16 is only used on CUDA (bf16 is used on CPU instead), and int8
+    dynamic quantization is CPU-only and runs with fp32 activations.
+
+    Raises:
+        ValueError: If the dtype or quantization mode is unknown
+    """
+    if mode.dtype not in DTYPES:
+        raise ValueError(f"Unknown inference dtype: {mode.dtype} (expected one of {', '.join(DTYPES)})")
+    if mode.quantize not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode: {mode.quantize} (expected one of {', '.join(QUANTIZATION_MODES)})")
+
+    if mode.quantize == "int8" and device.type != "cpu":
+        logger.warning("int8 quantization is only supported on CPU, running unquantized")
+        mode = replace(mode, quantize="none")
+    if mode.quantize == "int8" and mode.dtype != "fp32":
+        logger.warning(f"int8 quantization runs with fp32 activations, ignoring dtype {mode.dtype}")
+        mode = replace(mode, dtype="fp32")
+    if mode.dtype == "fp16" and device.type == "cpu":
+        logger.warning("fp16 is slow on CPU, using bf16 instead")
+        mode = replace(mode, dtype="bf16")
+    return mode
+
+def configure_threads(mode: ExecutionMode):
+    """Apply the CPU thread settings of an execution mode"""
+    if mode.threads > 0:
+        torch.set_num_threads(mode.threads)
+    if mode.interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(mode.interop_threads)
+        except RuntimeError as e:
+            # Only allowed before the first parallel operation
+            logger.warning(f"Could not set inter-op threads: {e}")
+
+def optimize_model(model: nn.Module, mode: ExecutionMode) -> nn.Module:
+    """
+    Apply an execution mode to a loaded CFM model
+
+    Only the transformer is converted; the mel spectrogram used for
+    reference audio stays in fp32. With compile, each transformer block is
+    compiled separately, which keeps compile time short and leaves the
+    text-embedding cache in the DiT outside the compiled graphs.
+    """
+    if mode.quantize == "int8":
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            model.transformer = torch.ao.quantization.quantize_dynamic(
+                model.transformer, {nn.Linear}, dtype=torch.qint8
+            )
+    elif mode.dtype != "fp32":
+        model.transformer.to(DTYPES[mode.dtype])
+
+    if mode.compile:
+        # torch.compile wraps the module (nn.Module.compile needs torch >= 2.2)
+        blocks = model.transformer.transformer_blocks
+        for index, block in enumerate(blocks):
+            blocks[index] = torch.compile(block, dynamic=True)
+    return model
+
+def optimize_vocoder(vocoder: nn.Module, mode: ExecutionMode) -> nn.Module:
+    """
+    Apply an execution mode to the Vocos vocoder
+
+    The vocoder stays in fp32 since its ISTFT head loses too much precision
+    in half precision; only its backbone is compiled.
+    """
+    if mode.compile:
+        vocoder.backbone = torch.compile(vocoder.backbone, dynamic=True)
+    return vocoder
+
+def module_bytes(module: nn.Module) -> int:
+    """Bytes held by a module's state, including quantized packed weights"""
+    total = 0
+    for value in module.state_dict(keep_vars=True).values():
+        tensors = value if isinstance(value, tuple) else (value,)
+        for tensor in tensors:
+            if isinstance(tensor, torch.Tensor):
+                total += tensor.numel() * tensor.element_size()
+    return total
+
+def compare_outputs(reference: List[torch.Tensor], candidate: List[torch.Tensor]) -> Dict[str, float]:
+    """
+    Compare outputs of an execution mode against the fp32 baseline
+
+    Returns:
+        Dictionary with the largest relative L2 error and the lowest cosine
+        similarity over all output pairs
+    """
+    if len(reference) != len(candidate):
+        raise ValueError(f"Output count differs: {len(reference)} != {len(candidate)}")
+    max_error, min_cosine = 0.0, 1.0
+    for expected, actual in zip(reference, candidate):
+        expected = torch.as_tensor(expected, dtype=torch.float32).flatten()
+        actual = torch.as_tensor(actual, dtype=torch.float32).flatten()
+        if expected.shape != actual.shape:
+            raise ValueError(f"Output shape differs: {tuple(expected.shape)} != {tuple(actual.shape)}")
+        error = torch.linalg.vector_norm(actual - expected) / torch.linalg.vector_norm(expected).clamp_min(1e-8)
+        cosine = torch.nn.functional.cosine_similarity(actual, expected, dim=0)
+        max_error = max(max_error, float(error))
+        min_cosine = min(min_cosine, float(cosine))
+    return {"relative_error": max_error, "cosine_similarity": min_cosine}
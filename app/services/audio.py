@@ -0,0 +1,62 @@
+import io
+import logging
+from typing import Optional, Tuple
+import numpy as np
+import soundfile as sf
+import torch
+import torchaudio
+
+logger = logging.getLogger(__name__)
+
+# format -> (soundfile format, subtype, media type, file extension)
+AUDIO_FORMATS = {
+    "wav": ("WAV", "PCM_16", "audio/wav", "wav"),
+    "flac": ("FLAC", "PCM_16", "audio/flac", "flac"),
+    "ogg": ("OGG", "OPUS", "audio/ogg", "ogg"),
+    "pcm": (None, None, "audio/L16", "pcm"),
+}
+
+# Sample rates supported by the Opus encoder
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+def resample(audio: np.ndarray, sample_rate: int, target_sample_rate: Optional[int]) -> np.ndarray:
+    """Resample a mono float wave, returning it unchanged if rates match"""
+    if not target_sample_rate or target_sample_rate == sample_rate:
+        return audio
+    wave = torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32))
+    return torchaudio.functional.resample(wave, sample_rate, target_sample_rate).numpy()
+
+def encode_audio(
+    audio: np.ndarray,
+    sample_rate: int,
+    fmt: str = "wav",
+    target_sample_rate: Optional[int] = None
+) -> Tuple[bytes, str]:
+    """
+    Encode a float wave into an in-memory audio file
+    
+    Args:
+        audio: Mono float wave in [-1, 1]
+        sample_rate: Sample rate of the wave
+        fmt: Output format, one of AUDIO_FORMATS
+        target_sample_rate: Optional output sample rate
+        
+    Returns:
+        Tuple of (encoded bytes, media type)
+    """
+    if fmt not in AUDIO_FORMATS:
+        raise ValueError(f"Unsupported audio format: {fmt}")
+    sf_format, subtype, media_type, _ = AUDIO_FORMATS[fmt]
+    
+    audio = resample(audio, sample_rate, target_sample_rate)
+    sample_rate = target_sample_rate or sample_rate
+    if fmt == "ogg" and sample_rate not in OPUS_SAMPLE_RATES:
+        raise ValueError(f"Opus supports sample rates {OPUS_SAMPLE_RATES}, got {sample_rate}")
+        
+    if sf_format is None:
+        data = (np.clip(audio, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+        return data, f"{media_type};rate={sample_rate};channels=1"
+        
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, subtype, format=sf_format)
+    return buffer.getvalue(), media_type
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from app.core.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# process_batch(voice_profile, texts, options) -> one result per text, or an awaitable of them
+BatchFn = Callable[[str, List[str], Any], Union[List[Any], Awaitable[List[Any]]]]
+# runner(fn, *args) -> awaitable result of fn(*args) off the event loop
+Runner = Callable[..., Awaitable[Any]]
+
+
+class _BatchItem:
+    __slots__ = ("text", "voice_profile", "options", "priority", "client", "weight", "future", "enqueued_at")
+
+    def __init__(
+        self,
+        text: str,
+        voice_profile: str,
+        options: Any,
+        priority: int,
+        client: Optional[str],
+        weight: float,
+        future: asyncio.Future
+    ):
+        self.text = text
+        self.voice_profile = voice_profile
+        self.options = options
+        self.priority = priority
+        self.client = client
+        self.weight = max(weight, 1e-3)
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class BatchScheduler:
+    def __init__(
+        self,
+        process_batch: BatchFn,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 20.0,
+        length_bucket_chars: int = 100,
+        max_concurrent_batches: int = 1,
+        runner: Optional[Runner] = None
+    ):
+        """
+        Dynamic batching scheduler for synthesis requests
+
+        Requests arriving within max_wait_ms of each other are grouped by
+        voice profile, options (e.g. sampling parameters) and similar text
+        length and handed to process_batch as one padded batch. Each caller
+        receives its own result. While every batch slot is busy, waiting
+        batches are dispatched by priority first; within a priority, clients
+        take turns in proportion to their weight (weighted round-robin)
+        instead of first come, first served.
+
+        Args:
+            process_batch: Callable synthesizing a list of texts for one voice;
+                coroutine functions are awaited directly instead of using runner
+            max_batch_size: Maximum number of requests per batch
+            max_wait_ms: How long to wait for more requests to fill a batch
+            length_bucket_chars: Width of the text-length buckets used for grouping
+            max_concurrent_batches: Number of batches dispatched at the same time
+            runner: Coroutine function used to run process_batch off the event loop
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.length_bucket_chars = max(1, length_bucket_chars)
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self.runner = runner or self._run_in_default_executor
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatches: set = set()
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes: Dict[int, int] = defaultdict(int)
+        self.total_wait = 0.0
+
+    @staticmethod
+    async def _run_in_default_executor(fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, fn, *args)
+
+    def _ensure_started(self):
+        """Start the collector task on the running event loop"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker = asyncio.get_running_loop().create_task(self._collect())
+
+    async def submit(
+        self,
+        text: str,
+        voice_profile: str,
+        options: Any = None,
+        priority: int = 0,
+        client: Optional[str] = None,
+        weight: float = 1.0
+    ) -> Any:
+        """
+        Queue a text for synthesis and wait for its result
+
+        Args:
+            text: Text to synthesize
+            voice_profile: Name of the voice profile to use
+            options: Hashable options passed through to process_batch;
+                only requests with equal options share a batch
+            priority: Scheduling priority, lower values are dispatched first
+            client: Client the request is queued for, used for fair ordering
+            weight: Client's share relative to other clients of the same priority
+
+        Returns:
+            The result produced by process_batch for this text
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_BatchItem(text, voice_profile, options, priority, client, weight, future))
+        return await future
+
+    async def stop(self):
+        """Stop the collector and wait for dispatched batches"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+
+    async def _collect(self):
+        """Gather requests into batches and dispatch them"""
+        while True:
+            items = [await self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+
+            # Keep collecting until the window closes or a batch can be filled
+            while len(items) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Drain anything else already waiting so it can join a group
+            while not self._queue.empty():
+                items.append(self._queue.get_nowait())
+
+            pending = self._group(items)
+            while pending:
+                await self._slots.acquire()
+                # Requests that arrived while every slot was busy compete for this one too
+                if not self._queue.empty():
+                    items = [item for batch in pending for item in batch]
+                    while not self._queue.empty():
+                        items.append(self._queue.get_nowait())
+                    pending = self._group(items)
+                batch = pending.pop(0)
+                task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+                self._dispatches.add(task)
+                task.add_done_callback(self._dispatches.discard)
+
+    @staticmethod
+    def _fair_order(items: List[_BatchItem]) -> List[_BatchItem]:
+        """Order items by priority, then weighted round-robin across clients"""
+        turns: Dict[Tuple[int, Any], int] = defaultdict(int)
+        keys = {}
+        for item in sorted(items, key=lambda item: item.enqueued_at):
+            # A client's n-th waiting request gets its turn at n / weight
+            turn = turns[(item.priority, item.client)]
+            turns[(item.priority, item.client)] += 1
+            keys[id(item)] = (item.priority, turn / item.weight, item.enqueued_at)
+        return sorted(items, key=lambda item: keys[id(item)])
+
+    def _group(self, items: List[_BatchItem]) -> List[List[_BatchItem]]:
+        """Group items by voice profile, options and text length bucket, most urgent first"""
+        groups: Dict[Tuple[str, Any, int], List[_BatchItem]] = defaultdict(list)
+        for item in self._fair_order(items):
+            bucket = len(item.text.encode("utf-8")) // self.length_bucket_chars
+            groups[(item.voice_profile, item.options, bucket)].append(item)
+
+        batches = []
+        # Groups keep the order of their most urgent item
+        for key in groups:
+            group = groups[key]
+            for start in range(0, len(group), self.max_batch_size):
+                batches.append(group[start:start + self.max_batch_size])
+        return batches
+
+    async def _dispatch(self, batch: List[_BatchItem]):
+        """Run one batch and resolve the callers' futures"""
+        try:
+            started = time.perf_counter()
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_sizes[len(batch)] += 1
+            for item in batch:
+                self.total_wait += started - item.enqueued_at
+                STAGE_SECONDS.observe(started - item.enqueued_at, stage="batch_wait")
+
+            voice_profile = batch[0].voice_profile
+            logger.info(f"Dispatching batch of {len(batch)} for voice profile: {voice_profile}")
+            try:
+                texts = [item.text for item in batch]
+                if asyncio.iscoroutinefunction(self.process_batch):
+                    results = await self.process_batch(voice_profile, texts, batch[0].options)
+                else:
+                    results = await self.runner(self.process_batch, voice_profile, texts, batch[0].options)
+            except Exception as e:
+                logger.error(f"Error processing batch: {e}")
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                return
+
+            for item, result in zip(batch, results):
+                if not item.future.done():
+                    item.future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch fill statistics"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "mean_batch_fill": self.items / (self.batches * self.max_batch_size) if self.batches else 0.0,
+            "mean_queue_wait_ms": self.total_wait / self.items * 1000.0 if self.items else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
@@ -0,0 +1,206 @@
+import asyncio
+import io
+import json
+import logging
+import zipfile
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.core.metrics import STAGE_SECONDS
+from app.services.audio import AUDIO_FORMATS, encode_audio
+from app.services.cache import ResultCache
+from app.services.executor import InferenceExecutor, InferenceTimeoutError
+from app.services.inference import InferenceParams
+from app.services.vocoder_stage import VocoderStage, synthesize_pipelined
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class BulkItem:
+    """One item of a bulk synthesis request"""
+    index: int
+    text: str
+    voice_profile: str
+    format: str = "wav"
+    sample_rate: Optional[int] = None
+    params: Optional[InferenceParams] = None
+    id: Optional[str] = None
+    # Set when the item was rejected before synthesis
+    error: Optional[str] = None
+
+@dataclass
+class BulkResult:
+    """Outcome of one bulk item"""
+    index: int
+    id: Optional[str]
+    status: str = "failed"
+    error: Optional[str] = None
+    filename: Optional[str] = None
+    cached: bool = False
+    duplicate_of: Optional[int] = None
+    audio: Optional[bytes] = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "filename": self.filename,
+            "cached": self.cached,
+            "duplicate_of": self.duplicate_of,
+        }
+
+async def synthesize_bulk(
+    items: List[BulkItem],
+    service,
+    executor: InferenceExecutor,
+    cache: Optional[ResultCache] = None,
+    slice_size: int = 8,
+    vocoder: Optional[VocoderStage] = None,
+    client: Optional[str] = None,
+    weight: float = 1.0,
+    on_audio: Optional[Callable[[float], None]] = None
+) -> List[BulkResult]:
+    """
+    Synthesize many items with per-item error reporting
+
+    Identical items (same text, voice, parameters and output options) are
+    synthesized once. The remaining work is grouped by voice profile and
+    parameters and sorted by text length so each padded batch packs well.
+    Groups are submitted to the inference pool in slices of slice_size
+    texts, letting interactive requests interleave with long bulk jobs.
+
+    Args:
+        items: Items to synthesize
+        service: TTS service providing result_key and synthesize_batch
+        executor: Inference worker pool
+        cache: Optional result cache consulted before and filled after synthesis
+        slice_size: Number of texts per call to the inference pool
+        vocoder: Optional vocoder stage; slices are then only sampled on
+            the inference pool and decoded on the stage
+        client: Client the slices are queued for on the inference pool
+        weight: Client's share of the inference pool while other clients wait
+        on_audio: Called with the seconds of every synthesized wave
+
+    Returns:
+        One result per item, in input order
+    """
+    results = [BulkResult(index=item.index, id=item.id) for item in items]
+    # result key -> positions of the items sharing it, first one synthesized
+    by_key: Dict[str, List[int]] = {}
+
+    for position, item in enumerate(items):
+        if item.error is not None:
+            results[position].error = item.error
+            continue
+        try:
+            await asyncio.to_thread(service.validate_text, item.text)
+            key = await asyncio.to_thread(
+                service.result_key,
+                item.text,
+                item.voice_profile,
+                item.params,
+                format=item.format,
+                sample_rate=item.sample_rate
+            )
+        except FileNotFoundError as e:
+            results[position].error = f"Voice profile not available: {e}"
+            continue
+        except Exception as e:
+            results[position].error = str(e)
+            continue
+        by_key.setdefault(key, []).append(position)
+
+    audio: Dict[str, bytes] = {}
+    if cache is not None:
+        for key in by_key:
+            data = await asyncio.to_thread(cache.get, key)
+            if data is not None:
+                audio[key] = data
+    cached = set(audio)
+
+    # (voice, params) -> [(key, item)], synthesizing one item per key
+    groups: Dict[Tuple[str, Any], List[Tuple[str, BulkItem]]] = defaultdict(list)
+    for key, positions in by_key.items():
+        if key not in audio:
+            item = items[positions[0]]
+            groups[(item.voice_profile, item.params)].append((key, item))
+
+    errors: Dict[str, str] = {}
+    for (voice_profile, params), group in sorted(groups.items(), key=lambda g: g[0][0]):
+        group.sort(key=lambda entry: len(entry[1].text.encode("utf-8")))
+        for start in range(0, len(group), max(1, slice_size)):
+            batch = group[start:start + max(1, slice_size)]
+            try:
+                texts = [item.text for _, item in batch]
+                if vocoder is not None:
+                    waves = await executor.wait_for(synthesize_pipelined(
+                        texts, voice_profile, params, service, executor, vocoder, client=client, weight=weight
+                    ))
+                else:
+                    waves = await executor.wait_for(executor.run(
+                        service.synthesize_batch, texts, voice_profile, params, client=client, weight=weight
+                    ))
+            except InferenceTimeoutError as e:
+                waves = [None] * len(batch)
+                for key, _ in batch:
+                    errors[key] = str(e)
+            except Exception as e:
+                logger.error(f"Error in bulk synthesis for {voice_profile}: {e}")
+                waves = [None] * len(batch)
+                for key, _ in batch:
+                    errors[key] = str(e)
+
+            for (key, item), wave in zip(batch, waves):
+                if wave is None:
+                    errors.setdefault(key, "Speech synthesis failed")
+                    continue
+                if on_audio is not None:
+                    on_audio(len(wave) / service.sample_rate)
+                with STAGE_SECONDS.time(stage="encode"):
+                    data, _ = await asyncio.to_thread(
+                        encode_audio, wave, service.sample_rate, item.format, item.sample_rate
+                    )
+                audio[key] = data
+                if cache is not None:
+                    await asyncio.to_thread(cache.put, key, data)
+
+    for key, positions in by_key.items():
+        first = positions[0]
+        for position in positions:
+            result = results[position]
+            if key not in audio:
+                result.error = errors.get(key, "Speech synthesis failed")
+                continue
+            result.status = "succeeded"
+            result.cached = key in cached
+            result.filename = f"{items[first].index:04d}.{AUDIO_FORMATS[items[first].format][3]}"
+            if position == first:
+                result.audio = audio[key]
+            else:
+                result.duplicate_of = items[first].index
+
+    logger.info(
+        f"Bulk synthesis finished: {sum(r.status == 'succeeded' for r in results)}/{len(results)} succeeded, "
+        f"{len(by_key)} unique, {len(cached)} cached"
+    )
+    return results
+
+def build_archive(results: List[BulkResult], metadata: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Pack bulk results into a zip archive
+
+    Each unique result is stored once; manifest.json lists every item with
+    its status, error and the file holding its audio.
+    """
+    buffer = io.BytesIO()
+    # Encoded audio barely compresses, so store it as is
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for result in results:
+            if result.audio is not None:
+                archive.writestr(result.filename, result.audio)
+        manifest = dict(metadata or {})
+        manifest["items"] = [result.to_dict() for result in results]
+        archive.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+    return buffer.getvalue()
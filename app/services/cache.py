@@ -0,0 +1,214 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+def cache_key(**fields: Any) -> str:
+    """
+    Build a stable content digest from synthesis inputs
+
+    Unlike the builtin hash(), the digest is identical across processes,
+    restarts and workers.
+    """
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    def __init__(
+        self,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 1024 * 1024 * 1024,
+        ttl_seconds: Optional[float] = None
+    ):
+        """
+        Two-tier cache of encoded synthesis results
+
+        Args:
+            memory_max_bytes: Size budget of the in-memory LRU tier
+            disk_dir: Directory of the on-disk tier, None to disable it
+            disk_max_bytes: Size budget of the on-disk tier
+            ttl_seconds: Maximum age of disk entries, None to keep them until evicted
+        """
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # key -> (size, last access time), oldest first
+        self._disk: "OrderedDict[str, list]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.bin")
+
+    def _load_disk_index(self):
+        """Rebuild the disk index from files left by earlier processes"""
+        entries = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith(".bin"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for mtime, key, size in sorted(entries):
+            self._disk[key] = [size, mtime]
+            self._disk_bytes += size
+        logger.info(f"Result cache index loaded: {len(self._disk)} entries, {self._disk_bytes} bytes")
+        with self._lock:
+            self._evict_disk()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached bytes for a key, or None on a miss"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return data
+            entry = self._disk.get(key) if self.disk_dir else None
+            if entry is not None and self._expired(entry):
+                self._remove_disk(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            now = time.time()
+            os.utime(self._path(key), (now, now))
+        except OSError:
+            with self._lock:
+                self._remove_disk(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            if key in self._disk:
+                self._disk[key][1] = now
+                self._disk.move_to_end(key)
+            self.disk_hits += 1
+            self._put_memory(key, data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Store bytes in memory and, if enabled, on disk"""
+        with self._lock:
+            self._put_memory(key, data)
+
+        if not self.disk_dir or len(data) > self.disk_max_bytes:
+            return
+        try:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write atomically so concurrent writers of the same key never
+            # expose a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write result cache entry {key}: {e}")
+            return
+
+        with self._lock:
+            if key in self._disk:
+                self._disk_bytes -= self._disk[key][0]
+            self._disk[key] = [len(data), time.time()]
+            self._disk.move_to_end(key)
+            self._disk_bytes += len(data)
+            self._evict_disk()
+
+    def _expired(self, entry: list) -> bool:
+        return self.ttl_seconds is not None and time.time() - entry[1] > self.ttl_seconds
+
+    def _put_memory(self, key: str, data: bytes):
+        """Insert into the memory tier and evict LRU entries (lock held)"""
+        if len(data) > self.memory_max_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.memory_evictions += 1
+
+    def _remove_disk(self, key: str):
+        """Delete a disk entry (lock held)"""
+        entry = self._disk.pop(key, None)
+        if entry is None:
+            return
+        self._disk_bytes -= entry[0]
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        """Drop expired entries, then LRU entries over the size budget (lock held)"""
+        if self.ttl_seconds is not None:
+            for key in [k for k, entry in self._disk.items() if self._expired(entry)]:
+                self._remove_disk(key)
+                self.expirations += 1
+        while self._disk and self._disk_bytes > self.disk_max_bytes:
+            key = next(iter(self._disk))
+            self._remove_disk(key)
+            self.evictions += 1
+
+    def clear(self):
+        """Remove all cached results"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for key in list(self._disk):
+                self._remove_disk(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss and size statistics"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_max_bytes": self.memory_max_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "disk_max_bytes": self.disk_max_bytes if self.disk_dir else 0,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_evictions": self.memory_evictions,
+                "disk_evictions": self.evictions,
+                "evictions": self.memory_evictions + self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from app.core.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the inference queue cannot admit another request"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class InferenceTimeoutError(Exception):
+    """Raised when a request does not finish within its deadline"""
+
+
+class InferenceExecutor:
+    def __init__(
+        self,
+        max_workers: int = 1,
+        max_queue: int = 32,
+        timeout: float = 120.0,
+        thread_name_prefix: str = "inference"
+    ):
+        """
+        Dedicated worker pool for blocking model calls
+
+        Requests are admitted up to max_queue at a time (queued plus running);
+        beyond that they are rejected immediately so the caller can retry
+        later instead of piling up on the event loop.
+
+        Jobs waiting for a thread are queued per client and handed out by
+        smooth weighted round-robin, so a client with many queued jobs (bulk
+        or long-form work) gets its share of the threads without delaying
+        other clients' jobs behind all of its own.
+
+        Args:
+            max_workers: Number of inference threads
+            max_queue: Maximum number of admitted requests
+            timeout: Default per-request timeout in seconds
+            thread_name_prefix: Name prefix of the worker threads
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(1, max_queue)
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        # client -> queued (job, future); credit of smooth weighted round-robin
+        self._queues: Dict[Optional[str], Deque[Tuple[Callable, Future]]] = {}
+        self._weights: Dict[Optional[str], float] = {}
+        self._credits: Dict[Optional[str], float] = {}
+        self._dispatched = 0
+
+        self.admitted = 0
+        self.running = 0
+        self.pending_jobs = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def retry_after(self) -> int:
+        """Estimate in seconds when a rejected request could be admitted"""
+        with self._lock:
+            mean_run = self.total_run / self.completed if self.completed else 1.0
+            return max(1, math.ceil(mean_run * self.admitted / self.max_workers))
+
+    def try_admit(self):
+        """
+        Reserve a queue slot, to be returned with release()
+
+        Raises:
+            QueueFullError: If max_queue requests are already admitted
+        """
+        with self._lock:
+            full = self.admitted >= self.max_queue
+            if full:
+                self.rejected += 1
+            else:
+                self.admitted += 1
+        if full:
+            raise QueueFullError("Inference queue is full", retry_after=self.retry_after())
+
+    def release(self):
+        """Return a queue slot reserved with try_admit()"""
+        with self._lock:
+            self.admitted -= 1
+
+    @asynccontextmanager
+    async def admission(self):
+        """
+        Reserve a queue slot for the duration of a request
+
+        Raises:
+            QueueFullError: If max_queue requests are already admitted
+        """
+        self.try_admit()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def run(self, fn: Callable, *args, client: Optional[str] = None, weight: float = 1.0) -> Any:
+        """
+        Run a blocking callable on the inference pool
+
+        Args:
+            fn: Callable to run
+            *args: Arguments of fn
+            client: Client the job is queued for, None for shared work
+            weight: Share of the threads the client gets while others wait
+        """
+        submitted = time.perf_counter()
+        future: Future = Future()
+
+        def job():
+            started = time.perf_counter()
+            with self._lock:
+                self.pending_jobs -= 1
+                self.running += 1
+                wait = started - submitted
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            STAGE_SECONDS.observe(wait, stage="queue_wait")
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.total_run += time.perf_counter() - started
+
+        with self._lock:
+            self.pending_jobs += 1
+            self._queues.setdefault(client, deque()).append((job, future))
+            self._weights[client] = max(weight, 1e-3)
+        self._dispatch()
+        return await asyncio.wrap_future(future)
+
+    def _next_client(self) -> Optional[str]:
+        """Pick the client whose job runs next (smooth weighted round-robin)"""
+        total = 0.0
+        chosen = None
+        for client in self._queues:
+            weight = self._weights[client]
+            self._credits[client] = self._credits.get(client, 0.0) + weight
+            total += weight
+            if chosen is None or self._credits[client] > self._credits[chosen]:
+                chosen = client
+        self._credits[chosen] -= total
+        return chosen
+
+    def _dispatch(self):
+        """Hand queued jobs to free threads"""
+        jobs = []
+        with self._lock:
+            while self._dispatched < self.max_workers and self._queues:
+                client = self._next_client()
+                queue = self._queues[client]
+                jobs.append(queue.popleft())
+                if not queue:
+                    # Idle clients do not keep credit
+                    del self._queues[client], self._weights[client], self._credits[client]
+                self._dispatched += 1
+        for job, future in jobs:
+            try:
+                self._pool.submit(self._execute, job, future)
+            except RuntimeError as e:
+                # The pool has been shut down
+                with self._lock:
+                    self._dispatched -= 1
+                    self.pending_jobs -= 1
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+
+    def _execute(self, job: Callable, future: Future):
+        try:
+            if not future.set_running_or_notify_cancel():
+                # The caller went away while the job was queued
+                with self._lock:
+                    self.pending_jobs -= 1
+                return
+            try:
+                future.set_result(job())
+            except BaseException as e:
+                future.set_exception(e)
+        finally:
+            with self._lock:
+                self._dispatched -= 1
+            self._dispatch()
+
+    async def wait_for(self, awaitable, timeout: float = None) -> Any:
+        """
+        Await a result within the per-request timeout
+
+        Raises:
+            InferenceTimeoutError: If the timeout expires first
+        """
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise InferenceTimeoutError(f"Inference did not finish within {timeout:.0f}s")
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work and release the worker threads"""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and wait time statistics"""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self.admitted,
+                "pending_jobs": self.pending_jobs,
+                "running_jobs": self.running,
+                "queued_clients": len(self._queues),
+                "completed_jobs": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "mean_wait_ms": self.total_wait / self.completed * 1000.0 if self.completed else 0.0,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "mean_run_ms": self.total_run / self.completed * 1000.0 if self.completed else 0.0,
+            }
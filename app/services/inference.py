@@ -0,0 +1,157 @@
+import re
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import soundfile as sf
+import torch
+import torchaudio
+
+logger = logging.getLogger(__name__)
+
+TARGET_SAMPLE_RATE = 24000
+HOP_LENGTH = 256
+TARGET_RMS = 0.1
+CROSS_FADE_DURATION = 0.15
+
+MEL_SPEC_KWARGS = dict(
+    n_fft=1024,
+    hop_length=HOP_LENGTH,
+    win_length=1024,
+    n_mel_channels=100,
+    target_sample_rate=TARGET_SAMPLE_RATE,
+    mel_spec_type="vocos"
+)
+
+@dataclass(frozen=True)
+class InferenceParams:
+    """Sampling parameters of one synthesis request"""
+    nfe_step: int = 32
+    cfg_strength: float = 2.0
+    sway_sampling_coef: float = -1.0
+    speed: float = 1.0
+    # Span several schedule steps once the flow is straight (see sampling.py)
+    adaptive: bool = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def load_reference_wave(path: str) -> Tuple[torch.Tensor, float]:
+    """
+    Load a preprocessed reference clip as a mono, RMS-normalized 24kHz wave
+
+    Args:
+        path: Path to the preprocessed reference audio
+
+    Returns:
+        Tuple of (wave tensor of shape [1, samples], original RMS)
+    """
+    audio, sr = sf.read(path, dtype="float32", always_2d=True)
+    return prepare_reference_wave(torch.from_numpy(audio.T.copy()), sr)
+
+def prepare_reference_wave(audio: torch.Tensor, sr: int) -> Tuple[torch.Tensor, float]:
+    """Downmix, loudness-normalize and resample a reference wave"""
+    if audio.shape[0] > 1:
+        audio = torch.mean(audio, dim=0, keepdim=True)
+
+    rms = float(torch.sqrt(torch.mean(torch.square(audio))))
+    if rms < TARGET_RMS:
+        audio = audio * TARGET_RMS / rms
+    if sr != TARGET_SAMPLE_RATE:
+        audio = torchaudio.functional.resample(audio, sr, TARGET_SAMPLE_RATE)
+    return audio, rms
+
+def chunk_text(text: str, max_chars: int = 135) -> List[str]:
+    """
+    Split text into sentence batches of at most max_chars bytes
+
+    Mirrors the chunking done inside f5_tts infer_process so batched and
+    single-request synthesis produce the same segments.
+    """
+    chunks = []
+    current_chunk = ""
+    sentences = re.split(r"(?<=[;:,.!?])\s+|(?<=[；：，。！？])", text)
+
+    for sentence in sentences:
+        if not sentence:
+            continue
+        if len(current_chunk.encode("utf-8")) + len(sentence.encode("utf-8")) <= max_chars:
+            current_chunk += sentence + " " if len(sentence[-1].encode("utf-8")) == 1 else sentence
+        else:
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+            current_chunk = sentence + " " if len(sentence[-1].encode("utf-8")) == 1 else sentence
+
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+
+    return chunks
+
+def max_chunk_chars(ref_wave: torch.Tensor, ref_text: str, speed: float = 1.0) -> int:
+    """Maximum chunk size so reference plus generated audio stays under ~22s"""
+    ref_seconds = ref_wave.shape[-1] / TARGET_SAMPLE_RATE
+    return max(1, int(len(ref_text.encode("utf-8")) / ref_seconds * (22 - ref_seconds) * speed))
+
+def estimate_duration(ref_frames: int, ref_text: str, gen_text: str, speed: float = 1.0) -> int:
+    """
+    Estimate the total mel length (reference + generated frames) of a chunk
+
+    Args:
+        ref_frames: Number of mel frames in the reference audio
+        ref_text: Reference transcript
+        gen_text: Text to generate
+        speed: Speaking rate multiplier
+    """
+    # Very short chunks are spoken slower, as in f5_tts infer_batch_process
+    if len(gen_text.encode("utf-8")) < 10:
+        speed = 0.3
+    ref_text_len = len(ref_text.encode("utf-8"))
+    gen_text_len = len(gen_text.encode("utf-8"))
+    return ref_frames + int(ref_frames / ref_text_len * gen_text_len / speed)
+
+def cross_fade(waves: List[np.ndarray], duration: float = CROSS_FADE_DURATION,
+               sample_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """
+    Join consecutive chunk waves with a linear cross-fade
+
+    The float32 output is allocated once and every chunk is written into it
+    a single time, so joining stays linear in the total length.
+
+    Args:
+        waves: Chunk waves in playback order
+        duration: Cross-fade duration in seconds
+        sample_rate: Sample rate of the waves
+    """
+    if not waves:
+        return np.zeros(0, dtype=np.float32)
+    fade_samples = max(int(duration * sample_rate), 0)
+
+    # Overlap of each chunk with the audio joined before it
+    overlaps, total = [0], len(waves[0])
+    for wave in waves[1:]:
+        samples = min(fade_samples, total, len(wave))
+        overlaps.append(samples)
+        total += len(wave) - samples
+
+    final_wave = np.empty(total, dtype=np.float32)
+    end = 0
+    for wave, samples in zip(waves, overlaps):
+        if samples > 0:
+            fade_in = np.linspace(0, 1, samples, dtype=np.float32)
+            overlap = final_wave[end - samples:end]
+            overlap *= fade_in[::-1]
+            overlap += wave[:samples] * fade_in
+        final_wave[end:end + len(wave) - samples] = wave[samples:]
+        end += len(wave) - samples
+    return final_wave
+
+def stitch_waves(waves: List[List[np.ndarray]]) -> List[Optional[np.ndarray]]:
+    """Cross-fade the chunk waves of each text into one utterance, None if empty"""
+    results: List[Optional[np.ndarray]] = []
+    for parts in waves:
+        audio = cross_fade(parts) if parts else None
+        if audio is None or len(audio) == 0:
+            logger.error("Generated audio is empty")
+            audio = None
+        results.append(audio)
+    return results
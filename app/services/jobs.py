@@ -0,0 +1,512 @@
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Optional, Tuple
+import numpy as np
+from app.core.metrics import REQUESTS
+from app.services.audio import AUDIO_FORMATS, encode_audio
+from app.services.executor import InferenceExecutor
+from app.services.inference import InferenceParams, cross_fade
+from app.services.longform import normalize_text, segment_text
+from app.services.voice_registry import voice_key
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    webhook_url TEXT,
+    progress_done INTEGER NOT NULL DEFAULT 0,
+    progress_total INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    result_path TEXT,
+    media_type TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+@dataclass
+class Job:
+    """A persisted synthesis job"""
+    id: str
+    status: str
+    request: Dict[str, Any]
+    webhook_url: Optional[str] = None
+    progress_done: int = 0
+    progress_total: int = 0
+    error: Optional[str] = None
+    result_path: Optional[str] = None
+    media_type: Optional[str] = None
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    expires_at: Optional[float] = None
+
+    @property
+    def client(self) -> Optional[str]:
+        """Client that submitted the job"""
+        return self.request.get("client")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public view of the job, without server paths"""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "progress": {
+                "done": self.progress_done,
+                "total": self.progress_total,
+                "fraction": self.progress_done / self.progress_total if self.progress_total else 0.0,
+            },
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "expires_at": self.expires_at,
+        }
+
+class JobStore:
+    def __init__(self, path: str):
+        """
+        SQLite-backed job table
+
+        Args:
+            path: Database file, created if missing
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> Job:
+        values = dict(row)
+        values["request"] = json.loads(values["request"])
+        return Job(**values)
+
+    def create(self, request: Dict[str, Any], webhook_url: Optional[str] = None) -> Job:
+        """Insert a new queued job"""
+        job = Job(
+            id=uuid.uuid4().hex,
+            status="queued",
+            request=request,
+            webhook_url=webhook_url,
+            created_at=time.time()
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, request, webhook_url, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.status, json.dumps(request, ensure_ascii=False), webhook_url, job.created_at)
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+
+    def claim(self) -> Optional[Job]:
+        """Mark the oldest queued job as running and return it"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                started_at = time.time()
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?",
+                    (started_at, row["id"])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = self._job(row)
+        job.status = "running"
+        job.started_at = started_at
+        return job
+
+    def update_progress(self, job_id: str, done: int, total: int):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress_done = ?, progress_total = ? WHERE id = ?",
+                (done, total, job_id)
+            )
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        ttl_seconds: float,
+        error: Optional[str] = None,
+        result_path: Optional[str] = None,
+        media_type: Optional[str] = None
+    ):
+        """Record the final state of a job and when it expires"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, result_path = ?, media_type = ?, "
+                "finished_at = ?, expires_at = ? WHERE id = ?",
+                (status, error, result_path, media_type, now, now + ttl_seconds, job_id)
+            )
+
+    def cancel(self, job_id: str, ttl_seconds: float) -> bool:
+        """Cancel a job that has not started yet"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ?, expires_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (now, now + ttl_seconds, job_id)
+            )
+        return cursor.rowcount > 0
+
+    def requeue_running(self) -> int:
+        """Return jobs interrupted by a restart to the queue"""
+        with self._lock:
+            cursor = self._conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+        return cursor.rowcount
+
+    def expired(self, now: Optional[float] = None) -> List[Job]:
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # A redirect could point a checked webhook at an internal address
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+_webhook_opener = urllib.request.build_opener(_NoRedirect)
+
+def check_webhook_url(url: str, allowed_hosts: Optional[Collection[str]] = None):
+    """
+    Reject webhook targets the server must not call
+
+    With an allow-list, only its hosts are accepted and they are trusted
+    as they are. Without one, the host must resolve to public addresses
+    only, so a job cannot make the server POST to loopback, private or
+    link-local services.
+
+    Raises:
+        ValueError: If the URL is not http(s), its host is not allowed or
+            resolves to a non-public address
+    """
+    parsed = urllib.parse.urlsplit(url)
+    host = (parsed.hostname or "").lower()
+    if parsed.scheme not in ("http", "https") or not host:
+        raise ValueError(f"Invalid webhook URL: {url}")
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise ValueError(f"Webhook host is not allowed: {host}")
+        return
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port, type=socket.SOCK_STREAM)}
+    except socket.gaierror as e:
+        raise ValueError(f"Cannot resolve webhook host {host}: {e}")
+    for address in addresses:
+        if not ipaddress.ip_address(address.split("%")[0]).is_global:
+            raise ValueError(f"Webhook host {host} resolves to a non-public address: {address}")
+
+# process(job, work_dir, progress) -> (encoded audio, media type)
+ProcessFn = Callable[[Job, str, Callable[[int, int], None]], Awaitable[Tuple[bytes, str]]]
+
+class JobQueue:
+    def __init__(
+        self,
+        store: JobStore,
+        jobs_dir: str,
+        process: ProcessFn,
+        workers: int = 1,
+        ttl_seconds: float = 86400.0,
+        poll_interval: float = 1.0,
+        cleanup_interval: float = 60.0,
+        webhook_timeout: float = 10.0,
+        webhook_retries: int = 3,
+        webhook_allowed_hosts: Optional[Collection[str]] = None
+    ):
+        """
+        Persistent background queue for synthesis jobs
+
+        Jobs survive restarts: queued jobs stay in the store and jobs that
+        were running are queued again on start(). Workers keep finished
+        chunks in a per-job work directory, so a resumed job only
+        synthesizes what is missing. Results are kept for ttl_seconds.
+
+        Args:
+            store: Job table
+            jobs_dir: Directory for results and per-job work files
+            process: Coroutine function synthesizing one job
+            workers: Number of jobs processed concurrently
+            ttl_seconds: How long finished jobs and their results are kept
+            poll_interval: Fallback polling interval of idle workers
+            cleanup_interval: Interval between expiry sweeps
+            webhook_timeout: Timeout of one webhook delivery attempt
+            webhook_retries: Number of webhook delivery attempts
+            webhook_allowed_hosts: Hosts webhooks may be sent to, None for
+                any host with public addresses (see check_webhook_url)
+        """
+        self.store = store
+        self.jobs_dir = jobs_dir
+        self.results_dir = os.path.join(jobs_dir, "results")
+        self.work_root = os.path.join(jobs_dir, "work")
+        self.process = process
+        self.workers = max(1, workers)
+        self.ttl_seconds = ttl_seconds
+        self.poll_interval = poll_interval
+        self.cleanup_interval = cleanup_interval
+        self.webhook_timeout = webhook_timeout
+        self.webhook_retries = max(1, webhook_retries)
+        self.webhook_allowed_hosts = frozenset(h.lower() for h in webhook_allowed_hosts or ())
+        os.makedirs(self.results_dir, exist_ok=True)
+        os.makedirs(self.work_root, exist_ok=True)
+
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        """Requeue interrupted jobs and start the workers on the running loop"""
+        if self._tasks:
+            return
+        requeued = self.store.requeue_running()
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted jobs")
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [loop.create_task(self._worker(index)) for index in range(self.workers)]
+        self._tasks.append(loop.create_task(self._cleaner()))
+
+    async def stop(self):
+        """Stop the workers; running jobs are resumed on the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, request: Dict[str, Any], webhook_url: Optional[str] = None) -> Job:
+        """Persist a new job and wake an idle worker"""
+        job = self.store.create(request, webhook_url)
+        logger.info(f"Queued job {job.id}")
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        return self.store.cancel(job_id, self.ttl_seconds)
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim)
+            except Exception as e:
+                logger.error(f"Failed to claim job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Job):
+        """Process one claimed job and record its outcome"""
+        logger.info(f"Running job {job.id}")
+        work_dir = os.path.join(self.work_root, job.id)
+        os.makedirs(work_dir, exist_ok=True)
+
+        def progress(done: int, total: int):
+            self.store.update_progress(job.id, done, total)
+
+        try:
+            audio, media_type = await self.process(job, work_dir, progress)
+            ext = AUDIO_FORMATS[job.request.get("format", "wav")][3]
+            result_path = os.path.join(self.results_dir, f"{job.id}.{ext}")
+            await asyncio.to_thread(self._write_result, result_path, audio)
+            await asyncio.to_thread(
+                self.store.finish, job.id, "succeeded", self.ttl_seconds,
+                result_path=result_path, media_type=media_type
+            )
+            logger.info(f"Job {job.id} succeeded")
+            REQUESTS.inc(endpoint="job", voice_profile=job.request.get("voice_profile", "unknown"), outcome="success")
+        except asyncio.CancelledError:
+            # Shutdown: the job stays running in the store and is requeued on start
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            await asyncio.to_thread(self.store.finish, job.id, "failed", self.ttl_seconds, error=str(e))
+            REQUESTS.inc(endpoint="job", voice_profile="unknown", outcome="error")
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+        if job.webhook_url:
+            finished = await asyncio.to_thread(self.store.get, job.id)
+            if finished is not None:
+                await asyncio.to_thread(self._notify, finished)
+
+    @staticmethod
+    def _write_result(path: str, audio: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+    def _notify(self, job: Job):
+        """POST the job status to its webhook, retrying with backoff"""
+        body = json.dumps(job.to_dict()).encode("utf-8")
+        for attempt in range(self.webhook_retries):
+            try:
+                # Checked again on delivery since the host may resolve differently by now
+                check_webhook_url(job.webhook_url, self.webhook_allowed_hosts)
+                request = urllib.request.Request(
+                    job.webhook_url,
+                    data=body,
+                    headers={"Content-Type": "application/json"},
+                    method="POST"
+                )
+                with _webhook_opener.open(request, timeout=self.webhook_timeout) as response:
+                    if response.status < 300:
+                        return
+            except Exception as e:
+                logger.warning(f"Webhook delivery for job {job.id} failed (attempt {attempt + 1}): {e}")
+            if attempt + 1 < self.webhook_retries:
+                time.sleep(2 ** attempt)
+        logger.error(f"Giving up webhook delivery for job {job.id}")
+
+    async def _cleaner(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.purge_expired)
+            except Exception as e:
+                logger.error(f"Failed to purge expired jobs: {e}")
+            await asyncio.sleep(self.cleanup_interval)
+
+    def purge_expired(self) -> int:
+        """Delete finished jobs past their TTL together with their results"""
+        expired = self.store.expired()
+        for job in expired:
+            if job.result_path:
+                try:
+                    os.remove(job.result_path)
+                except OSError:
+                    pass
+            shutil.rmtree(os.path.join(self.work_root, job.id), ignore_errors=True)
+            self.store.delete(job.id)
+        if expired:
+            logger.info(f"Purged {len(expired)} expired jobs")
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "jobs": self.store.counts()}
+
+def _save_chunk(path: str, wave: np.ndarray):
+    # Written atomically so an interrupted save is never mistaken for a finished chunk
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.save(f, wave)
+    os.replace(tmp_path, path)
+
+async def synthesize_job(
+    job: Job,
+    work_dir: str,
+    progress: Callable[[int, int], None],
+    service,
+    executor: InferenceExecutor,
+    params: InferenceParams,
+    on_audio: Optional[Callable[[float], None]] = None
+) -> Tuple[bytes, str]:
+    """
+    Synthesize a job's text chunk by chunk, checkpointing each chunk
+
+    Generated chunks are saved as .npy files in work_dir; chunks already
+    present (from a run interrupted by a restart) are not synthesized again.
+    Chunks are queued on the executor for the job's client (request
+    "client" and "weight"), and on_audio is called with the seconds of
+    every newly synthesized chunk.
+
+    Returns:
+        Tuple of (encoded audio, media type)
+    """
+    request = job.request
+    voice = voice_key(request["voice_profile"], request.get("reference"))
+    text = normalize_text(request["text"])
+    chunks = await asyncio.to_thread(segment_text, text, service, voice, params.speed)
+    total = len(chunks)
+    paths = [os.path.join(work_dir, f"{index:05d}.npy") for index in range(total)]
+    missing = [index for index in range(total) if not os.path.exists(paths[index])]
+    # progress writes to the job store, which must not block the event loop
+    await asyncio.to_thread(progress, total - len(missing), total)
+
+    for start in range(0, len(missing), service.max_batch_size):
+        batch = missing[start:start + service.max_batch_size]
+        waves = await executor.wait_for(executor.run(
+            service.generate,
+            [chunks[index] for index in batch],
+            voice,
+            params,
+            client=request.get("client"),
+            weight=request.get("weight", 1.0)
+        ))
+        for index, wave in zip(batch, waves):
+            await asyncio.to_thread(_save_chunk, paths[index], wave)
+            if on_audio is not None:
+                on_audio(len(wave) / service.sample_rate)
+        await asyncio.to_thread(progress, total - len(missing) + start + len(batch), total)
+
+    # Chunks are memory-mapped and copied straight into the joined wave
+    waves = [np.load(path, mmap_mode="r") for path in paths]
+    audio = await asyncio.to_thread(cross_fade, waves)
+    if len(audio) == 0:
+        raise ValueError("Generated audio is empty")
+    return await asyncio.to_thread(
+        encode_audio, audio, service.sample_rate, request.get("format", "wav"), request.get("sample_rate")
+    )
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional
+import numpy as np
+from app.services.executor import InferenceExecutor
+from app.services.inference import InferenceParams
+from app.services.text_frontend import normalize_text
+from app.services.vocoder_stage import VocoderStage
+
+logger = logging.getLogger(__name__)
+
+def segment_text(text: str, service, voice_profile: str, speed: float = 1.0) -> List[str]:
+    """
+    Split normalized text into model-sized segments
+
+    Segments never span paragraphs, so paragraph breaks fall on chunk
+    boundaries.
+    """
+    segments = []
+    for paragraph in text.split("\n\n"):
+        segments.extend(service.split_text(paragraph, voice_profile, speed=speed))
+    return segments
+
+async def synthesize_segments(
+    segments: List[str],
+    voice_profile: str,
+    params: InferenceParams,
+    service,
+    executor: InferenceExecutor,
+    vocoder: VocoderStage,
+    batch_size: int = 4,
+    client: Optional[str] = None,
+    weight: float = 1.0
+) -> AsyncIterator[np.ndarray]:
+    """
+    Synthesize segments as a two-stage pipeline, yielding waves in order
+
+    Consecutive segments are sampled in batches on the inference pool while
+    the previous batch is vocoded on the vocoder stage, so decoding of batch
+    N overlaps sampling of batch N+1. At most one batch is sampled ahead of
+    the consumer, which keeps memory bounded for any input length.
+
+    Args:
+        segments: Text segments in playback order
+        voice_profile: Name of the voice profile to use
+        params: Sampling parameters
+        service: TTS service providing sample() and vocode()
+        executor: Pool running CFM sampling
+        vocoder: Stage running vocoder decode
+        batch_size: Number of consecutive segments sampled together
+        client: Client the sampling jobs are queued for on the executor
+        weight: Client's share of the executor while other clients wait
+    """
+    batch_size = max(1, batch_size)
+    batches = [segments[start:start + batch_size] for start in range(0, len(segments), batch_size)]
+    if not batches:
+        return
+
+    def sample(batch):
+        return asyncio.ensure_future(
+            executor.wait_for(executor.run(
+                service.sample, batch, voice_profile, params, client=client, weight=weight
+            ))
+        )
+
+    pending = sample(batches[0])
+    try:
+        for index in range(len(batches)):
+            mels = await pending
+            pending = sample(batches[index + 1]) if index + 1 < len(batches) else None
+            waves = await executor.wait_for(vocoder.decode(mels, voice_profile))
+            del mels
+            for wave in waves:
+                yield wave
+    finally:
+        if pending is not None:
+            pending.cancel()
@@ -0,0 +1,58 @@
+import logging
+from typing import Optional
+from app.core.config import settings
+from app.services.inference import InferenceParams
+
+logger = logging.getLogger(__name__)
+
+def resolve_inference_params(
+    preset: Optional[str] = None,
+    nfe_step: Optional[int] = None,
+    cfg_strength: Optional[float] = None,
+    speed: Optional[float] = None,
+    adaptive: Optional[bool] = None
+) -> InferenceParams:
+    """
+    Resolve a request's sampling parameters
+    
+    Starts from the named preset (or DEFAULT_PRESET), applies explicit
+    overrides and enforces the server-side limits.
+    
+    Args:
+        preset: Name of a preset in INFERENCE_PRESETS
+        nfe_step: Number of ODE function evaluations
+        cfg_strength: Classifier-free guidance strength
+        speed: Speaking rate multiplier
+        adaptive: Use adaptive sampling, defaults to the preset's setting
+            or ADAPTIVE_SAMPLING
+        
+    Raises:
+        ValueError: If the preset is unknown or a value is out of bounds
+    """
+    preset = preset or settings.DEFAULT_PRESET
+    if preset not in settings.INFERENCE_PRESETS:
+        raise ValueError(
+            f"Unknown preset: {preset}. Available presets: {', '.join(sorted(settings.INFERENCE_PRESETS))}"
+        )
+    values = dict(settings.INFERENCE_PRESETS[preset])
+    
+    if nfe_step is not None:
+        values["nfe_step"] = nfe_step
+    if cfg_strength is not None:
+        values["cfg_strength"] = cfg_strength
+    if speed is not None:
+        values["speed"] = speed
+    if adaptive is not None:
+        values["adaptive"] = adaptive
+        
+    if "nfe_step" in values:
+        values["nfe_step"] = int(values["nfe_step"])
+    values["adaptive"] = bool(values.get("adaptive", settings.ADAPTIVE_SAMPLING))
+    params = InferenceParams(**values)
+    if not settings.NFE_STEP_MIN <= params.nfe_step <= settings.NFE_STEP_MAX:
+        raise ValueError(f"nfe_step must be between {settings.NFE_STEP_MIN} and {settings.NFE_STEP_MAX}")
+    if not 0.0 <= params.cfg_strength <= settings.CFG_STRENGTH_MAX:
+        raise ValueError(f"cfg_strength must be between 0 and {settings.CFG_STRENGTH_MAX}")
+    if not settings.SPEED_MIN <= params.speed <= settings.SPEED_MAX:
+        raise ValueError(f"speed must be between {settings.SPEED_MIN} and {settings.SPEED_MAX}")
+    return params
@@ -0,0 +1,178 @@
+import importlib
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceededError(Exception):
+    """Raised when a client has used up one of its rate limits"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage of token buckets
+
+    Backends shared between API processes (e.g. Redis) implement take()
+    atomically; the in-process MemoryRateLimitBackend is the default.
+    """
+
+    @abstractmethod
+    def take(self, key: str, amount: float, rate: float, capacity: float, strict: bool) -> float:
+        """
+        Refill a bucket and take tokens from it
+
+        Args:
+            key: Bucket key
+            amount: Tokens to take
+            rate: Refill rate in tokens per second
+            capacity: Size of the bucket, new buckets start full
+            strict: Only take the tokens if the bucket holds enough; otherwise
+                they are always taken and the bucket may go negative
+
+        Returns:
+            0 if the tokens were taken, else seconds until the bucket will
+            hold enough
+        """
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, idle_seconds: float = 3600.0):
+        """
+        Token buckets in a dict of this process
+
+        Args:
+            idle_seconds: Buckets untouched for this long are dropped (they
+                would be full again anyway)
+        """
+        self.idle_seconds = idle_seconds
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def take(self, key: str, amount: float, rate: float, capacity: float, strict: bool) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if strict and tokens < amount:
+                self._buckets[key] = (tokens, now)
+                return (amount - tokens) / rate if rate > 0 else math.inf
+            self._buckets[key] = (tokens - amount, now)
+            if now - self._last_prune > self.idle_seconds:
+                self._prune(now)
+        return 0.0
+
+    def _prune(self, now: float):
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items() if now - bucket[1] < self.idle_seconds
+        }
+        self._last_prune = now
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"buckets": len(self._buckets)}
+
+
+def load_backend(name: str) -> RateLimitBackend:
+    """Create a backend from "memory" or a "package.module:ClassName" path"""
+    if name == "memory":
+        return MemoryRateLimitBackend()
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown rate limit backend: {name}")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        backend: Optional[RateLimitBackend] = None,
+        requests_per_minute: float = 60.0,
+        request_burst: float = 20.0,
+        audio_seconds_per_minute: float = 600.0,
+        audio_seconds_burst: float = 1200.0
+    ):
+        """
+        Per-client token bucket limits on requests and synthesized audio
+
+        A request takes one token from the client's request bucket. Audio
+        length is only known once it has been synthesized, so audio seconds
+        are charged afterwards and may overdraw the audio bucket; further
+        requests are rejected until it has refilled. A rate of 0 disables
+        that limit.
+
+        Args:
+            backend: Bucket storage, defaults to MemoryRateLimitBackend
+            requests_per_minute: Sustained request rate per client
+            request_burst: Requests a client can make at once
+            audio_seconds_per_minute: Sustained seconds of synthesized audio per client
+            audio_seconds_burst: Seconds of audio a client can synthesize at once
+        """
+        self.backend = backend or MemoryRateLimitBackend()
+        self.request_rate = max(0.0, requests_per_minute) / 60.0
+        self.request_burst = max(1.0, request_burst)
+        self.audio_rate = max(0.0, audio_seconds_per_minute) / 60.0
+        self.audio_burst = max(1.0, audio_seconds_burst)
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+        self.audio_seconds = 0.0
+
+    def check(self, client: str):
+        """
+        Take a request token for a client
+
+        Raises:
+            RateLimitExceededError: If the client is out of request tokens or
+                has overdrawn its audio budget
+        """
+        wait, limit = 0.0, None
+        if self.audio_rate > 0:
+            # Amount 0: only fails while earlier audio has overdrawn the bucket
+            wait = self.backend.take(f"audio:{client}", 0.0, self.audio_rate, self.audio_burst, strict=True)
+            limit = "audio seconds"
+        if not wait and self.request_rate > 0:
+            wait = self.backend.take(f"requests:{client}", 1.0, self.request_rate, self.request_burst, strict=True)
+            limit = "requests"
+        with self._lock:
+            if wait:
+                self.limited += 1
+            else:
+                self.allowed += 1
+        if wait:
+            raise RateLimitExceededError(
+                f"Rate limit exceeded ({limit})",
+                retry_after=max(1, math.ceil(min(wait, 3600.0)))
+            )
+
+    def charge_audio(self, client: str, seconds: float):
+        """Charge seconds of synthesized audio to a client"""
+        if self.audio_rate <= 0 or seconds <= 0:
+            return
+        self.backend.take(f"audio:{client}", seconds, self.audio_rate, self.audio_burst, strict=False)
+        with self._lock:
+            self.audio_seconds += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                "requests_per_minute": self.request_rate * 60.0,
+                "audio_seconds_per_minute": self.audio_rate * 60.0,
+                "allowed": self.allowed,
+                "limited": self.limited,
+                "charged_audio_seconds": self.audio_seconds,
+            }
+        stats.update(self.backend.stats())
+        return stats
@@ -0,0 +1,371 @@
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.core.metrics import INFERENCE_QUEUE_DEPTH, JOBS, MODEL_MEMORY, VOCODER_UTILIZATION, VOICE_CACHE_BYTES
+from app.services.acceleration import ExecutionMode
+from app.services.batching import BatchScheduler
+from app.services.cache import ResultCache
+from app.services.executor import InferenceExecutor
+from app.services.inference import InferenceParams
+from app.services.jobs import Job, JobQueue, JobStore, synthesize_job
+from app.services.rate_limit import RateLimiter, load_backend
+from app.services.sampling import AdaptiveSampling
+from app.services.tts_service import F5TTSService
+from app.services.voice_catalog import VoiceCatalog
+from app.services.vocoder_stage import VocoderStage, synthesize_pipelined
+
+logger = logging.getLogger(__name__)
+
+class TTSRuntime:
+    """
+    Process-wide holder for the shared TTS service and its scheduler
+    """
+    def __init__(self):
+        self._service: Optional[F5TTSService] = None
+        self._scheduler: Optional[BatchScheduler] = None
+        self._executor: Optional[InferenceExecutor] = None
+        self._vocoder: Optional[VocoderStage] = None
+        self._cache: Optional[ResultCache] = None
+        self._jobs: Optional[JobQueue] = None
+        self._rate_limiter: Optional[RateLimiter] = None
+        self._catalog: Optional[VoiceCatalog] = None
+        self._lock = threading.Lock()
+        # Separate lock so the other getters never wait for a model load
+        self._service_lock = threading.Lock()
+        
+        # Readiness
+        self.state = "not_started"
+        self.error: Optional[str] = None
+        self.startup_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        
+        # Gauges are read at scrape time and stay empty until loaded
+        MODEL_MEMORY.set_function(self._model_memory)
+        VOICE_CACHE_BYTES.set_function(
+            lambda: self._service.voices.stats()["bytes"] if self._service is not None else None
+        )
+        INFERENCE_QUEUE_DEPTH.set_function(
+            lambda: self._executor.stats()["queue_depth"] if self._executor is not None else None
+        )
+        VOCODER_UTILIZATION.set_function(
+            lambda: self._vocoder.utilization() if self._vocoder is not None else None
+        )
+        JOBS.set_function(
+            lambda: {(status,): count for status, count in self._jobs.store.counts().items()}
+            if self._jobs is not None else None
+        )
+        
+    def get_service(self) -> F5TTSService:
+        """Return the shared TTS service, loading the model on first use"""
+        if self._service is None:
+            with self._service_lock:
+                if self._service is None:
+                    logger.info("Initializing TTS service")
+                    # Loaded by start(), _load reports readiness once warm-up is done;
+                    # loaded lazily by a first request, the service is ready once created
+                    lazy = self.state == "not_started"
+                    if lazy:
+                        self.state = "loading"
+                    self._service = self._create_service()
+                    if lazy:
+                        self.state = "ready"
+        return self._service
+        
+    def _create_service(self) -> F5TTSService:
+        if settings.WORKER_PROCESSES > 0:
+            return self._create_worker_pool()
+        if settings.TTS_BACKEND == "stub":
+            from app.services.stub_service import StubTTSService
+            logger.warning("Using the stub TTS backend, no speech will be generated")
+            return StubTTSService(
+                batch_latency_ms=settings.STUB_BATCH_LATENCY_MS,
+                step_latency_ms=settings.STUB_STEP_LATENCY_MS,
+                item_latency_ms=settings.STUB_ITEM_LATENCY_MS,
+                max_voices=settings.VOICE_CACHE_SIZE,
+                max_batch_size=settings.BATCH_MAX_SIZE
+            )
+        return F5TTSService(
+            model_dir=settings.MODEL_DIR,
+            voice_profiles_dir=settings.VOICE_PROFILES_DIR,
+            max_voices=settings.VOICE_CACHE_SIZE,
+            max_voice_bytes=settings.VOICE_CACHE_MAX_MB * 1024 * 1024,
+            max_batch_size=settings.BATCH_MAX_SIZE,
+            vocoder_dir=settings.VOCODER_DIR,
+            execution=ExecutionMode(
+                dtype=settings.INFERENCE_DTYPE,
+                compile=settings.INFERENCE_COMPILE,
+                quantize=settings.INFERENCE_QUANTIZE,
+                threads=settings.CPU_THREADS,
+                interop_threads=settings.CPU_INTEROP_THREADS
+            ),
+            text_cache_size=settings.TEXT_CACHE_SIZE,
+            expand_text=settings.TEXT_NORMALIZATION,
+            reference_min_seconds=settings.VOICE_REF_MIN_SECONDS,
+            reference_min_snr_db=settings.VOICE_REF_MIN_SNR_DB,
+            reference_max_clipping=settings.VOICE_REF_MAX_CLIPPING,
+            checkpoint_file=settings.MODEL_CHECKPOINT or None,
+            adaptive=AdaptiveSampling(
+                tolerance=settings.ADAPTIVE_TOLERANCE,
+                min_steps=settings.ADAPTIVE_MIN_STEPS,
+                max_stride=settings.ADAPTIVE_MAX_STRIDE
+            )
+        )
+        
+    def _create_worker_pool(self):
+        """Start the inference worker processes and return a service routing to them"""
+        from app.services.workers import ShardedService, WorkerPool, parse_device_specs
+        import torch
+        cpu_cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        devices = parse_device_specs(
+            settings.WORKER_DEVICES,
+            settings.WORKER_PROCESSES,
+            cuda_devices=torch.cuda.device_count(),
+            cpu_cores=cpu_cores
+        )
+        logger.info(f"Starting {len(devices)} inference workers on {', '.join(devices)}")
+        pool = WorkerPool(
+            devices,
+            affinity_slack=settings.WORKER_AFFINITY_SLACK,
+            start_timeout=settings.WORKER_START_TIMEOUT_S
+        )
+        pool.start()
+        return ShardedService(pool)
+        
+    @property
+    def sharded(self) -> bool:
+        return settings.WORKER_PROCESSES > 0
+        
+    def start(self):
+        """Load the model and warm it up on a background thread"""
+        if self.state != "not_started":
+            return
+        self.state = "loading"
+        threading.Thread(target=self._load, name="tts-loader", daemon=True).start()
+        
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            service = self.get_service()
+            # Worker processes warm themselves up before reporting ready
+            if settings.WARMUP_ENABLED and not self.sharded:
+                self.state = "warming_up"
+                self.warm_up(service)
+            self.state = "ready"
+        except Exception as e:
+            logger.error(f"Error loading TTS service: {e}")
+            self.error = str(e)
+            self.state = "failed"
+        finally:
+            self.startup_seconds = time.perf_counter() - started
+            logger.info(f"TTS service startup finished in {self.startup_seconds:.2f}s ({self.state})")
+            
+    def warm_up(self, service: F5TTSService):
+        """Run one synthesis so kernels and the voice cache are initialized"""
+        voice_profile = settings.WARMUP_VOICE
+        if not voice_profile and service.voice_profiles_dir is None:
+            logger.info("No voice profiles directory, skipping warm-up")
+            return
+        if not voice_profile:
+            profiles = sorted(
+                d for d in os.listdir(service.voice_profiles_dir)
+                if os.path.isdir(os.path.join(service.voice_profiles_dir, d)) and not d.startswith('.')
+            )
+            if not profiles:
+                logger.warning("No voice profiles found, skipping warm-up")
+                return
+            voice_profile = profiles[0]
+            
+        logger.info(f"Warming up with voice profile: {voice_profile}")
+        started = time.perf_counter()
+        try:
+            service.synthesize(settings.WARMUP_TEXT, voice_profile)
+        except Exception as e:
+            # A broken warm-up voice should not keep the service unready
+            logger.warning(f"Warm-up synthesis failed: {e}")
+        self.warmup_seconds = time.perf_counter() - started
+        
+    def readiness(self) -> Dict[str, Any]:
+        """Report loading state and startup timings"""
+        return {
+            "status": self.state,
+            "ready": self.state == "ready",
+            "error": self.error,
+            "startup_seconds": self.startup_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "load_timings": self._service.load_timings if self._service is not None else {},
+            "execution": self._service.execution.to_dict() if self._service is not None else None,
+        }
+        
+    def worker_stats(self) -> Optional[Dict[str, Any]]:
+        """Report per-worker routing statistics when sharding"""
+        if not self.sharded or self._service is None:
+            return None
+        return self._service.pool.stats()
+        
+    def text_stats(self) -> Optional[Dict[str, Any]]:
+        """Report text front end cache statistics (summed over workers when sharding)"""
+        if self._service is None:
+            return None
+        if not self.sharded:
+            return self._service.frontend.stats()
+        stats = {"size": 0, "max_size": 0, "hits": 0, "misses": 0, "expand": self._service.frontend.expand}
+        for _, worker_stats in self._service.pool.call_all("frontend.stats"):
+            for key in ("size", "max_size", "hits", "misses"):
+                stats[key] += worker_stats[key]
+        return stats
+        
+    def _model_memory(self) -> Optional[Dict[tuple, float]]:
+        if self._service is None:
+            return None
+        return {(component,): nbytes for component, nbytes in self._service.memory_usage().items()}
+        
+    async def shutdown(self):
+        """Stop the job workers, scheduler, pipeline stages, catalog watcher and worker processes"""
+        if self._catalog is not None:
+            self._catalog.stop()
+        if self._jobs is not None:
+            await self._jobs.stop()
+        if self._scheduler is not None:
+            await self._scheduler.stop()
+        if self._executor is not None:
+            self._executor.shutdown()
+        if self._vocoder is not None:
+            await self._vocoder.stop()
+        if self._service is not None and hasattr(self._service, "close"):
+            await asyncio.to_thread(self._service.close)
+        
+    async def _process_batch(self, voice_profile: str, texts, params):
+        return await synthesize_pipelined(
+            texts, voice_profile, params, self.get_service(), self.get_executor(), self.get_vocoder()
+        )
+        
+    def get_cache(self) -> Optional[ResultCache]:
+        """Return the shared result cache, or None if caching is disabled"""
+        if not settings.RESULT_CACHE_ENABLED:
+            return None
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    self._cache = ResultCache(
+                        memory_max_bytes=settings.RESULT_CACHE_MEMORY_MB * 1024 * 1024,
+                        disk_dir=settings.RESULT_CACHE_DIR if settings.RESULT_CACHE_DISK_MB > 0 else None,
+                        disk_max_bytes=settings.RESULT_CACHE_DISK_MB * 1024 * 1024,
+                        ttl_seconds=settings.RESULT_CACHE_TTL_S or None
+                    )
+        return self._cache
+        
+    def get_catalog(self) -> VoiceCatalog:
+        """Return the index of the voice profiles on disk"""
+        if self._catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    self._catalog = VoiceCatalog(
+                        # Same directory the service loads profiles from
+                        os.path.join("/app", settings.VOICE_PROFILES_DIR),
+                        poll_interval_s=settings.VOICE_CATALOG_POLL_S,
+                        min_seconds=settings.VOICE_MIN_SECONDS,
+                        max_seconds=settings.VOICE_MAX_SECONDS,
+                        on_change=self._voice_changed
+                    )
+        return self._catalog
+        
+    def _voice_changed(self, voice_profile: str):
+        # Reloaded from disk on next use
+        if self._service is not None:
+            self._service.voices.invalidate(voice_profile)
+        
+    def get_rate_limiter(self) -> Optional[RateLimiter]:
+        """Return the per-client rate limiter, or None if rate limiting is disabled"""
+        if not settings.RATE_LIMIT_ENABLED:
+            return None
+        if self._rate_limiter is None:
+            with self._lock:
+                if self._rate_limiter is None:
+                    self._rate_limiter = RateLimiter(
+                        backend=load_backend(settings.RATE_LIMIT_BACKEND),
+                        requests_per_minute=settings.RATE_LIMIT_REQUESTS_PER_MINUTE,
+                        request_burst=settings.RATE_LIMIT_REQUEST_BURST,
+                        audio_seconds_per_minute=settings.RATE_LIMIT_AUDIO_SECONDS_PER_MINUTE,
+                        audio_seconds_burst=settings.RATE_LIMIT_AUDIO_SECONDS_BURST
+                    )
+        return self._rate_limiter
+        
+    def _concurrency(self) -> int:
+        # Keep every worker process busy when sharding
+        return max(settings.INFERENCE_WORKERS, settings.WORKER_PROCESSES)
+        
+    def get_executor(self) -> InferenceExecutor:
+        """Return the shared inference worker pool"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = InferenceExecutor(
+                        max_workers=self._concurrency(),
+                        max_queue=settings.INFERENCE_QUEUE_SIZE,
+                        timeout=settings.INFERENCE_TIMEOUT_S
+                    )
+        return self._executor
+        
+    def get_vocoder(self) -> VocoderStage:
+        """Return the stage decoding mels while the inference pool samples"""
+        if self._vocoder is None:
+            with self._lock:
+                if self._vocoder is None:
+                    self._vocoder = VocoderStage(
+                        lambda mels, voice_profile: self.get_service().vocode(mels, voice_profile),
+                        max_batch_size=settings.VOCODER_BATCH_SIZE
+                    )
+        return self._vocoder
+        
+    def get_scheduler(self) -> BatchScheduler:
+        """Return the shared batching scheduler"""
+        executor = self.get_executor()
+        if self._scheduler is None:
+            with self._lock:
+                if self._scheduler is None:
+                    self._scheduler = BatchScheduler(
+                        self._process_batch,
+                        max_batch_size=settings.BATCH_MAX_SIZE,
+                        max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+                        length_bucket_chars=settings.BATCH_LENGTH_BUCKET_CHARS,
+                        # One more batch than samplers, so a batch can be vocoded while the next samples
+                        max_concurrent_batches=self._concurrency() + 1,
+                        runner=executor.run
+                    )
+        return self._scheduler
+
+        
+    def get_jobs(self) -> JobQueue:
+        """Return the persistent job queue"""
+        if self._jobs is None:
+            with self._lock:
+                if self._jobs is None:
+                    self._jobs = JobQueue(
+                        JobStore(os.path.join(settings.JOBS_DIR, "jobs.db")),
+                        settings.JOBS_DIR,
+                        self._process_job,
+                        workers=settings.JOB_WORKERS,
+                        ttl_seconds=settings.JOB_TTL_S,
+                        webhook_timeout=settings.JOB_WEBHOOK_TIMEOUT_S,
+                        webhook_retries=settings.JOB_WEBHOOK_RETRIES,
+                        webhook_allowed_hosts=[
+                            host.strip() for host in settings.JOB_WEBHOOK_ALLOWED_HOSTS.split(",") if host.strip()
+                        ]
+                    )
+        return self._jobs
+        
+    async def _process_job(self, job: Job, work_dir: str, progress):
+        service = await asyncio.to_thread(self.get_service)
+        params = InferenceParams(**job.request["params"])
+        limiter = self.get_rate_limiter()
+        on_audio = None
+        if limiter is not None and job.request.get("client"):
+            on_audio = functools.partial(limiter.charge_audio, job.request["client"])
+        return await synthesize_job(job, work_dir, progress, service, self.get_executor(), params, on_audio)
+
+runtime = TTSRuntime()
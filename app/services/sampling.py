@@ -0,0 +1,223 @@
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.nn.utils.rnn import pad_sequence
+from f5_tts.model import CFM, DiT
+from f5_tts.model.utils import get_epss_timesteps, lens_to_mask
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class AdaptiveSampling:
+    """Step-size control of adaptive sampling"""
+    # Largest estimated relative error of one step
+    tolerance: float = 0.05
+    # Steps of the schedule taken before step sizes may grow
+    min_steps: int = 6
+    # Limit on how many schedule steps one step may span
+    max_stride: int = 8
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+@dataclass
+class SamplingReport:
+    """How a batch was sampled compared to its full step schedule"""
+    scheduled_steps: int
+    steps: int
+    # Estimated relative deviation of the result from the full schedule
+    estimated_error: float = 0.0
+
+    @property
+    def speedup(self) -> float:
+        return self.scheduled_steps / self.steps if self.steps else 1.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "speedup": round(self.speedup, 3)}
+
+def time_schedule(
+    steps: int,
+    sway_sampling_coef: Optional[float],
+    device: torch.device,
+    dtype: torch.dtype
+) -> torch.Tensor:
+    """Flow time points of a sampling run, as used by CFM.sample"""
+    t = get_epss_timesteps(steps, device=device, dtype=dtype)
+    if sway_sampling_coef is not None:
+        t = t + sway_sampling_coef * (torch.cos(torch.pi / 2 * t) - 1 + t)
+    return t
+
+class GuidedFlow:
+    def __init__(
+        self,
+        transformer: DiT,
+        cond: torch.Tensor,
+        text: torch.Tensor,
+        mask: Optional[torch.Tensor] = None,
+        cfg_strength: float = 2.0
+    ):
+        """
+        Classifier-free guided flow of one request batch
+
+        Computes what DiT.forward would recompute at every step once per
+        request: the text embeddings (including the ConvNeXt text layers)
+        and the input projection of the reference mel and text for both
+        guidance branches, plus the rotary embedding. Each step then only
+        projects the noisy mel, once for both branches, and runs the
+        conditional and unconditional branch as one batch through the
+        transformer blocks. Results match DiT.forward up to the summation
+        order of the split input projection.
+
+        Args:
+            transformer: DiT of the model
+            cond: Masked reference mels of shape [batch, frames, n_mels]
+            text: Text token ids of shape [batch, tokens]
+            mask: Valid frames per batch item, None for a single item
+            cfg_strength: Classifier-free guidance strength, 0 for no guidance
+        """
+        self.transformer = transformer
+        self.guided = cfg_strength >= 1e-5
+        self.cfg_strength = cfg_strength
+        batch, frames, mel_dim = cond.shape
+        seq_len = frames if mask is None else mask.sum(dim=1)
+
+        # Conditional branch, then the unconditional one without reference and text
+        conditions = [(cond, transformer.text_embed(text, seq_len=seq_len, drop_text=False))]
+        if self.guided:
+            conditions.append((torch.zeros_like(cond), transformer.text_embed(text, seq_len=seq_len, drop_text=True)))
+        proj = transformer.input_embed.proj
+        if type(proj) is nn.Linear:
+            # proj(cat(x, cond, text)) = x W_x^T + (cat(cond, text) W_c^T + b)
+            self.x_weight = proj.weight[:, :mel_dim].contiguous()
+            self.conditioning = torch.cat([
+                F.linear(torch.cat(condition, dim=-1), proj.weight[:, mel_dim:], proj.bias)
+                for condition in conditions
+            ], dim=0)
+        else:
+            # Quantized projections cannot be split; only the text embeddings are reused.
+            # Each branch is projected on its own since its activations are quantized per call.
+            self.x_weight = None
+            self.conditioning = [torch.cat(condition, dim=-1) for condition in conditions]
+
+        self.branches = len(conditions)
+        self.mask = torch.cat([mask] * self.branches, dim=0) if mask is not None else None
+        self.rope = transformer.rotary_embed.forward_from_seq_len(frames)
+
+    def __call__(self, t: torch.Tensor, x: torch.Tensor) -> torch.Tensor:
+        """Guided flow at time t for the noisy mels x of shape [batch, frames, n_mels]"""
+        transformer = self.transformer
+        time = transformer.time_embed(t.repeat(x.shape[0]) if t.ndim == 0 else t)
+        time = torch.cat([time] * self.branches, dim=0)
+
+        if self.x_weight is not None:
+            h = torch.cat([F.linear(x, self.x_weight)] * self.branches, dim=0) + self.conditioning
+        else:
+            h = torch.cat([
+                transformer.input_embed.proj(torch.cat((x, conditioning), dim=-1)) for conditioning in self.conditioning
+            ], dim=0)
+        h = transformer.input_embed.conv_pos_embed(h, mask=self.mask) + h
+
+        residual = h
+        for block in transformer.transformer_blocks:
+            h = block(h, time, mask=self.mask, rope=self.rope)
+        if transformer.long_skip_connection is not None:
+            h = transformer.long_skip_connection(torch.cat((h, residual), dim=-1))
+        output = transformer.proj_out(transformer.norm_out(h, time))
+
+        if not self.guided:
+            return output
+        pred, null_pred = torch.chunk(output, 2, dim=0)
+        return pred + (pred - null_pred) * self.cfg_strength
+
+def _flow_change(velocity: torch.Tensor, previous: torch.Tensor, region: torch.Tensor) -> torch.Tensor:
+    """Relative change of the flow between two evaluations, per batch item"""
+    region = region.unsqueeze(-1)
+    delta = torch.linalg.vector_norm(((velocity - previous) * region).float(), dim=(1, 2))
+    scale = torch.linalg.vector_norm((previous * region).float(), dim=(1, 2))
+    return delta / scale.clamp(min=1e-6)
+
+def sample_flow(
+    model: CFM,
+    cond: torch.Tensor,
+    text: torch.Tensor,
+    duration: torch.Tensor,
+    lens: torch.Tensor,
+    steps: int = 32,
+    cfg_strength: float = 2.0,
+    sway_sampling_coef: Optional[float] = -1.0,
+    control: Optional[AdaptiveSampling] = None
+) -> Tuple[torch.Tensor, SamplingReport]:
+    """
+    Euler sampling of the guided flow, optionally adaptive
+
+    Runs the same Euler integration over the same time points as
+    CFM.sample, evaluating the flow with GuidedFlow. With a step-size
+    control, it also tracks how fast the predicted flow changes between
+    evaluations. The error of an Euler step grows with its size times that
+    rate, so after min_steps evaluations each step spans as many schedule
+    steps as keep the estimated error under the tolerance, doubling at
+    most per step. A step that reaches the end of the schedule ends
+    sampling early. In a batch, the item whose flow changes fastest sets
+    the step size.
+
+    Args:
+        model: CFM model
+        cond: Reference mels of shape [batch, frames, n_mels]
+        text: Text token ids of shape [batch, tokens]
+        duration: Total frames (reference + generated) per batch item
+        lens: Reference frames per batch item
+        steps: Steps of the full schedule (nfe_step)
+        cfg_strength: Classifier-free guidance strength
+        sway_sampling_coef: Sway sampling coefficient of the schedule
+        control: Step-size control, None to take every schedule step
+
+    Returns:
+        Tuple of (mels of shape [batch, max duration, n_mels] with the
+        reference frames restored, sampling report)
+    """
+    cond = cond.to(next(model.parameters()).dtype)
+    batch, cond_seq_len, device = *cond.shape[:2], cond.device
+
+    # Padding, masks and noise exactly as in CFM.sample
+    duration = torch.maximum(torch.maximum((text != -1).sum(dim=-1), lens) + 1, duration)
+    max_duration = int(duration.amax())
+    cond = F.pad(cond, (0, 0, 0, max_duration - cond_seq_len), value=0.0)
+    cond_mask = F.pad(lens_to_mask(lens), (0, max_duration - cond_seq_len), value=False).unsqueeze(-1)
+    step_cond = torch.where(cond_mask, cond, torch.zeros_like(cond))
+    mask = lens_to_mask(duration) if batch > 1 else None
+    # Generated frames of each item, where the flow change is measured
+    region = lens_to_mask(duration, length=max_duration) & ~cond_mask.squeeze(-1)
+
+    flow = GuidedFlow(model.transformer, step_cond, text, mask=mask, cfg_strength=cfg_strength)
+    x = pad_sequence(
+        [torch.randn(int(frames), model.num_channels, device=device, dtype=step_cond.dtype) for frames in duration],
+        padding_value=0, batch_first=True
+    )
+    t = time_schedule(steps, sway_sampling_coef, device, step_cond.dtype)
+    report = SamplingReport(scheduled_steps=len(t) - 1, steps=0)
+
+    adaptive = control is not None and control.tolerance > 0
+    index, stride, previous = 0, 1, None
+    while index < len(t) - 1:
+        velocity = flow(t[index], x)
+        report.steps += 1
+        if adaptive and previous is not None and report.steps > control.min_steps:
+            # Relative flow change per unit of flow time
+            rate = float((_flow_change(velocity, previous[1], region) / (t[index] - previous[0])).max())
+            limit = min(2 * stride, control.max_stride, len(t) - 1 - index)
+            stride = 1
+            while stride < limit and 0.5 * float(t[index + stride + 1] - t[index]) * rate <= control.tolerance:
+                stride += 1
+            if stride > 1:
+                # Error of one long step beyond that of the schedule steps it replaces
+                spans = t[index + 1:index + stride + 1] - t[index:index + stride]
+                long_step = float(t[index + stride] - t[index])
+                report.estimated_error += 0.5 * rate * (long_step ** 2 - float(torch.sum(spans ** 2)))
+        previous = (t[index], velocity)
+        x = x + (t[index + stride] - t[index]) * velocity
+        index += stride
+
+    return torch.where(cond_mask, cond, x), report
@@ -0,0 +1,56 @@
+import struct
+import numpy as np
+from app.services.inference import CROSS_FADE_DURATION, TARGET_SAMPLE_RATE
+
+def wav_stream_header(sample_rate: int = TARGET_SAMPLE_RATE, channels: int = 1) -> bytes:
+    """
+    Build a 16-bit PCM WAV header for a stream of unknown length
+    
+    The RIFF and data sizes are set to the maximum value, which common
+    players and decoders treat as "read until end of stream".
+    """
+    bits_per_sample = 16
+    byte_rate = sample_rate * channels * bits_per_sample // 8
+    block_align = channels * bits_per_sample // 8
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate, block_align, bits_per_sample)
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+def pcm16_bytes(wave: np.ndarray) -> bytes:
+    """Convert a float wave in [-1, 1] to little-endian 16-bit PCM"""
+    return (np.clip(wave, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+class StreamingCrossfader:
+    """
+    Incrementally joins chunk waves with the same linear cross-fade used
+    for whole utterances
+    
+    Each pushed chunk is emitted except for its tail, which is held back
+    to be blended with the head of the next chunk.
+    """
+    def __init__(self, duration: float = CROSS_FADE_DURATION, sample_rate: int = TARGET_SAMPLE_RATE):
+        self.fade_samples = int(duration * sample_rate)
+        self._tail = None
+        
+    def push(self, wave: np.ndarray) -> np.ndarray:
+        """Add the next chunk and return the audio that is ready to send"""
+        if self._tail is not None:
+            samples = min(self.fade_samples, len(self._tail), len(wave))
+            if samples > 0:
+                fade_out = np.linspace(1, 0, samples)
+                fade_in = np.linspace(0, 1, samples)
+                overlap = self._tail[-samples:] * fade_out + wave[:samples] * fade_in
+                wave = np.concatenate([self._tail[:-samples], overlap, wave[samples:]])
+            else:
+                wave = np.concatenate([self._tail, wave])
+                
+        hold = min(self.fade_samples, len(wave))
+        self._tail = wave[len(wave) - hold:]
+        return wave[:len(wave) - hold]
+        
+    def flush(self) -> np.ndarray:
+        """Return the audio still held back after the last chunk"""
+        tail, self._tail = self._tail, None
+        return tail if tail is not None else np.zeros(0, dtype=np.float32)
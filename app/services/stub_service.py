@@ -0,0 +1,113 @@
+import logging
+import time
+import zlib
+from typing import Dict, List, Optional
+import numpy as np
+import torch
+from app.services.acceleration import ExecutionMode
+from app.services.cache import cache_key
+from app.services.inference import HOP_LENGTH, TARGET_SAMPLE_RATE, InferenceParams, estimate_duration
+from app.services.sampling import AdaptiveSampling
+from app.services.text_frontend import TextFrontend
+from app.services.tts_service import F5TTSService
+from app.services.voice_registry import VoiceProfile, VoiceRegistry
+
+logger = logging.getLogger(__name__)
+
+# Synthetic reference: 3 seconds of audio for this transcript
+STUB_REF_TEXT = "This is a synthetic reference sample. "
+STUB_REF_SECONDS = 3.0
+
+class StubTTSService(F5TTSService):
+    def __init__(
+        self,
+        batch_latency_ms: float = 50.0,
+        step_latency_ms: float = 2.0,
+        item_latency_ms: float = 5.0,
+        max_voices: int = 32,
+        max_batch_size: int = 8
+    ):
+        """
+        Deterministic stand-in for F5TTSService without model weights
+
+        Text splitting, batching and cross-fading run through the real
+        service code; only sample() and vocode() are replaced. They sleep
+        for a configurable time and produce a tone whose length follows the
+        same duration estimate as the model, so benchmarks on CPU-only
+        machines exercise the full request path with realistic audio sizes.
+
+        Args:
+            batch_latency_ms: Fixed latency of every sample() call
+            step_latency_ms: Latency per sampling step (nfe_step)
+            item_latency_ms: Vocoder latency per chunk
+            max_voices: Maximum number of voice profiles kept in memory
+            max_batch_size: Maximum number of text chunks sampled in one batch
+        """
+        self.device = torch.device("cpu")
+        self.model_dir = None
+        self.max_batch_size = max(1, max_batch_size)
+        self.voice_profiles_dir = None
+        self.model_fingerprint = "stub"
+        self.execution = ExecutionMode()
+        self.adaptive = AdaptiveSampling()
+        # Normalization and expansion only; there is no vocabulary to check against
+        self.frontend = TextFrontend(None)
+        self.model = None
+        self.vocoder = None
+        self.load_timings: Dict[str, float] = {}
+        self.batch_latency = batch_latency_ms / 1000.0
+        self.step_latency = step_latency_ms / 1000.0
+        self.item_latency = item_latency_ms / 1000.0
+        self.voices = VoiceRegistry(self._load_reference_audio, max_profiles=max_voices)
+
+    def _load_reference_audio(self, voice_profile: str) -> VoiceProfile:
+        """Build a synthetic reference for any profile name"""
+        ref_wave = torch.zeros(1, int(STUB_REF_SECONDS * TARGET_SAMPLE_RATE))
+        return VoiceProfile(
+            name=voice_profile,
+            ref_audio=None,
+            ref_text=STUB_REF_TEXT,
+            ref_wave=ref_wave,
+            ref_rms=0.1,
+            nbytes=ref_wave.numel() * ref_wave.element_size(),
+            metadata={"fingerprint": cache_key(stub=voice_profile)[:16]}
+        )
+
+    def sample(
+        self,
+        texts: List[str],
+        voice_profile: str,
+        params: Optional[InferenceParams] = None
+    ) -> List[torch.Tensor]:
+        """Sleep for the sampling latency and return (frames, pitch) per chunk"""
+        if not texts:
+            return []
+        params = params or self.default_params
+        voice = self.voices.get(voice_profile)
+        ref_frames = voice.ref_wave.shape[-1] // HOP_LENGTH
+
+        time.sleep(self.batch_latency + self.step_latency * params.nfe_step)
+
+        mels = []
+        for text in texts:
+            frames = estimate_duration(ref_frames, voice.ref_text, text, params.speed) - ref_frames
+            # Pitch derived from the text so results are reproducible
+            frequency = 110.0 + zlib.crc32(text.encode("utf-8")) % 330
+            mels.append(torch.tensor([frames, frequency], dtype=torch.float64))
+        return mels
+
+    def vocode(self, mels: List[torch.Tensor], voice_profile: str) -> List[np.ndarray]:
+        """Sleep for the per-chunk latency and render each chunk as a tone"""
+        time.sleep(self.item_latency * len(mels))
+        waves = []
+        for mel in mels:
+            frames, frequency = mel.tolist()
+            t = np.arange(int(frames) * HOP_LENGTH, dtype=np.float32) / TARGET_SAMPLE_RATE
+            waves.append((0.1 * np.sin(2 * np.pi * frequency * t)).astype(np.float32))
+        return waves
+
+    def prepare_voice(self, voice_profile_dir: str):
+        """Nothing to precompute: the stub synthesizes its own reference"""
+
+    def memory_usage(self) -> Dict[str, int]:
+        return {}
@@ -0,0 +1,270 @@
+import logging
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import numpy as np
+import torch
+from torch.nn.utils.rnn import pad_sequence
+from f5_tts.model.utils import convert_char_to_pinyin
+
+logger = logging.getLogger(__name__)
+
+# Typographic characters the vocabulary has no entry for
+_TRANSLATION = str.maketrans({
+    "\u2018": "'", "\u2019": "'", "\u201a": "'", "\u201b": "'",
+    "\u201c": '"', "\u201d": '"', "\u201e": '"', "\u201f": '"',
+    "\u2013": "-", "\u2014": ", ", "\u2015": ", ",
+    "\u2026": "...", "\u00a0": " ", "\u00ad": "",
+})
+
+# Characters converted to pinyin instead of being looked up (as in convert_char_to_pinyin)
+_CJK = re.compile("[\u3100-\u9fff]")
+
+_ONES = [
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen",
+]
+_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+_SCALES = [(10 ** 12, "trillion"), (10 ** 9, "billion"), (10 ** 6, "million"), (1000, "thousand")]
+_ORDINALS = {
+    "one": "first", "two": "second", "three": "third", "five": "fifth",
+    "eight": "eighth", "nine": "ninth", "twelve": "twelfth",
+}
+_CURRENCIES = {"$": ("dollar", "cent"), "\u00a3": ("pound", "penny"), "\u20ac": ("euro", "cent")}
+_ABBREVIATIONS = {
+    "Mr": "Mister", "Mrs": "Missus", "Ms": "Miss", "Dr": "Doctor", "Prof": "Professor",
+    "Jr": "Junior", "Sr": "Senior", "St": "Saint", "Mt": "Mount", "vs": "versus",
+    "approx": "approximately", "etc": "et cetera",
+}
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize document text for synthesis
+
+    Applies NFKC normalization, replaces typographic punctuation, joins
+    words hyphenated across line breaks and collapses whitespace inside
+    paragraphs. Paragraph breaks (blank lines) are kept as "\\n\\n".
+    """
+    text = unicodedata.normalize("NFKC", text).translate(_TRANSLATION)
+    text = "".join(c for c in text if c in "\n\t" or unicodedata.category(c)[0] != "C")
+    text = re.sub(r"(\w)-\n\s*(\w)", r"\1\2", text)
+    paragraphs = re.split(r"\n\s*\n", text)
+    paragraphs = (re.sub(r"\s+", " ", paragraph).strip() for paragraph in paragraphs)
+    paragraphs = (re.sub(r" ([,;:.!?])", r"\1", paragraph) for paragraph in paragraphs)
+    return "\n\n".join(paragraph for paragraph in paragraphs if paragraph)
+
+def number_to_words(n: int) -> str:
+    """Spell out an integer in English words"""
+    if n < 0:
+        return "minus " + number_to_words(-n)
+    if n < 20:
+        return _ONES[n]
+    if n < 100:
+        return _TENS[n // 10] + (" " + _ONES[n % 10] if n % 10 else "")
+    if n < 1000:
+        return _ONES[n // 100] + " hundred" + (" " + number_to_words(n % 100) if n % 100 else "")
+    if n >= 1000 * _SCALES[0][0]:
+        return " ".join(_ONES[int(digit)] for digit in str(n))
+    for scale, name in _SCALES:
+        if n >= scale:
+            rest = n % scale
+            return f"{number_to_words(n // scale)} {name}" + (" " + number_to_words(rest) if rest else "")
+    return str(n)
+
+def ordinal_to_words(n: int) -> str:
+    """Spell out an ordinal number (1 -> first, 22 -> twenty second)"""
+    words = number_to_words(n)
+    head, _, last = words.rpartition(" ")
+    if last in _ORDINALS:
+        last = _ORDINALS[last]
+    elif last.endswith("y"):
+        last = last[:-1] + "ieth"
+    else:
+        last += "th"
+    return f"{head} {last}" if head else last
+
+def _year_to_words(n: int) -> str:
+    high, low = divmod(n, 100)
+    if low == 0:
+        return f"{number_to_words(high)} hundred"
+    if low < 10:
+        return f"{number_to_words(high)} oh {number_to_words(low)}"
+    return f"{number_to_words(high)} {number_to_words(low)}"
+
+def _currency(match: re.Match) -> str:
+    unit, subunit = _CURRENCIES[match.group(1)]
+    amount = int(match.group(2))
+    words = f"{number_to_words(amount)} {unit}{'' if amount == 1 else 's'}"
+    cents = int((match.group(3) or "0").ljust(2, "0"))
+    if cents:
+        plural = subunit + "s" if subunit != "penny" else "pence"
+        words += f" and {number_to_words(cents)} {subunit if cents == 1 else plural}"
+    return words
+
+def _decimal(match: re.Match) -> str:
+    digits = " ".join(_ONES[int(digit)] for digit in match.group(2))
+    return f"{number_to_words(int(match.group(1)))} point {digits}"
+
+def expand_text(text: str) -> str:
+    """
+    Expand numbers, currencies, symbols and common abbreviations into words
+
+    Only meant for English text; abbreviation periods are removed so they no
+    longer end sentences when the text is split into chunks.
+    """
+    text = re.sub(r"\b(e\.g|i\.e)\.", lambda m: "for example" if m.group(1) == "e.g" else "that is", text)
+    text = re.sub(
+        r"(?<![\w.])(" + "|".join(_ABBREVIATIONS) + r")\.(?=[\s,;:]|$)",
+        lambda m: _ABBREVIATIONS[m.group(1)],
+        text
+    )
+    text = re.sub(r"\bNo\.\s?(?=\d)", "number ", text)
+    # Thousands separators
+    text = re.sub(r"(?<=\d),(?=\d{3}\b)", "", text)
+    text = re.sub(r"([$\u00a3\u20ac])\s?(\d+)(?:\.(\d{1,2}))?\b", _currency, text)
+    text = re.sub(r"(\d)\s?%", r"\1 percent", text)
+    text = text.replace("&", " and ").replace("@", " at ")
+    text = re.sub(r"\b(\d+)(st|nd|rd|th)\b", lambda m: ordinal_to_words(int(m.group(1))), text)
+    text = re.sub(r"\b(1[1-9]\d\d|20[1-9]\d)\b(?!\.\d)", lambda m: _year_to_words(int(m.group(1))), text)
+    text = re.sub(r"\b(\d+)\.(\d+)\b", _decimal, text)
+    text = re.sub(r"\b\d+\b", lambda m: number_to_words(int(m.group(0))), text)
+    return re.sub(r" {2,}", " ", text)
+
+class UnsupportedTextError(ValueError):
+    """Raised for text with characters the model vocabulary cannot represent"""
+
+class TextFrontend:
+    def __init__(
+        self,
+        vocab_char_map: Optional[Dict[str, int]],
+        cache_size: int = 4096,
+        expand: bool = True
+    ):
+        """
+        Text preprocessing ahead of the model
+
+        Normalizes and expands text before it is split into chunks, and
+        turns chunks into vocabulary indices. Tokenized inputs (reference
+        transcript plus chunk) are kept in an LRU cache, so repeated phrases
+        with the same voice skip pinyin conversion and lookup.
+        Single-character tokens are looked up through a codepoint table in
+        one vectorized step.
+
+        Args:
+            vocab_char_map: Token to index map of the model, None to skip
+                validation and tokenization (e.g. for the stub backend)
+            cache_size: Number of tokenized inputs kept in memory
+            expand: Whether numbers and abbreviations are spelled out
+        """
+        self.vocab_char_map = vocab_char_map
+        self.cache_size = max(0, cache_size)
+        self.expand = expand
+        self._cache: "OrderedDict[str, torch.Tensor]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._table: Optional[np.ndarray] = None
+        self._chars = set()
+        if vocab_char_map:
+            self._chars = {token for token in vocab_char_map if len(token) == 1}
+            size = max(ord(c) for c in self._chars) + 1 if self._chars else 0
+            # Covers the basic multilingual plane; other characters use the map
+            if 0 < size <= 0x10000:
+                self._table = np.full(size, -1, dtype=np.int64)
+                for c in self._chars:
+                    self._table[ord(c)] = vocab_char_map[c]
+
+    def normalize(self, text: str) -> str:
+        """Normalize text into a single line ready to be split into chunks"""
+        text = normalize_text(text).replace("\n\n", " ")
+        if self.expand and not _CJK.search(text):
+            text = expand_text(text)
+        return text.strip()
+
+    def unsupported_characters(self, text: str) -> List[str]:
+        """Characters of normalized text that have no vocabulary entry"""
+        if not self.vocab_char_map:
+            return []
+        # convert_char_to_pinyin maps ";" to ","
+        return sorted(
+            c for c in set(text)
+            if c not in self._chars and c != ";" and not c.isspace() and not _CJK.match(c)
+        )
+
+    def validate(self, text: str):
+        """
+        Check that text can be synthesized
+
+        Raises:
+            UnsupportedTextError: If the normalized text is empty or
+                contains characters outside the vocabulary
+        """
+        text = self.normalize(text)
+        if not text:
+            raise UnsupportedTextError("Text is empty after normalization")
+        unsupported = self.unsupported_characters(text)
+        if unsupported:
+            shown = " ".join(repr(c) for c in unsupported[:10])
+            raise UnsupportedTextError(f"Text contains unsupported characters: {shown}")
+
+    def tokenize(self, text: str) -> torch.Tensor:
+        """Return the vocabulary indices of one normalized text (cached)"""
+        with self._lock:
+            ids = self._cache.get(text)
+            if ids is not None:
+                self._cache.move_to_end(text)
+                self.hits += 1
+                return ids
+            self.misses += 1
+
+        ids = torch.from_numpy(self._lookup(convert_char_to_pinyin([text])[0]))
+        if self.cache_size:
+            with self._lock:
+                self._cache[text] = ids
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return ids
+
+    def _lookup(self, tokens: List[str]) -> np.ndarray:
+        joined = "".join(tokens)
+        if self._table is not None and len(joined) == len(tokens):
+            codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+            known = codes < len(self._table)
+            ids = np.where(known, self._table[np.where(known, codes, 0)], -1)
+        else:
+            ids = np.array([self.vocab_char_map.get(token, -1) for token in tokens], dtype=np.int64)
+        # Unknown tokens map to index 0, as in the F5 pipeline
+        ids[ids < 0] = 0
+        return ids
+
+    def encode(self, prefix: str, texts: List[str]) -> torch.Tensor:
+        """
+        Build the padded text input of a batch
+
+        Args:
+            prefix: Reference transcript prepended to every text
+            texts: Normalized text chunks
+
+        Returns:
+            Index tensor of shape [len(texts), tokens], padded with -1
+        """
+        # Tokenized joined, as in the F5 pipeline: pinyin conversion and the
+        # spacing of punctuation depend on the characters around the boundary
+        return pad_sequence(
+            [self.tokenize(prefix + text) for text in texts],
+            batch_first=True,
+            padding_value=-1
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._cache),
+                "max_size": self.cache_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expand": self.expand,
+            }
@@ -1,46 +1,163 @@
 import torch
 import torchaudio
-import soundfile as sf
+import numpy as np
 import os
+import time
 import tempfile
+import json
 import logging
-from typing import Optional
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple
 from f5_tts.model import DiT, CFM
-from f5_tts.infer.utils_infer import (
-    load_vocoder,
-    preprocess_ref_audio_text,
-    infer_process,
+from f5_tts.model.modules import precompute_freqs_cis
+from f5_tts.infer.utils_infer import load_vocoder
+from app.core.metrics import SAMPLING_ESTIMATED_ERROR, SAMPLING_SPEEDUP, SAMPLING_STEPS, STAGE_SECONDS
+from app.services.acceleration import (
+    ExecutionMode,
+    configure_threads,
+    module_bytes,
+    optimize_model,
+    optimize_vocoder,
+    resolve_mode,
 )
+from app.services.cache import cache_key
+from app.services.inference import (
+    HOP_LENGTH,
+    MEL_SPEC_KWARGS,
+    TARGET_RMS,
+    InferenceParams,
+    TARGET_SAMPLE_RATE,
+    chunk_text,
+    estimate_duration,
+    max_chunk_chars,
+    stitch_waves,
+)
+from app.services.sampling import AdaptiveSampling, SamplingReport, sample_flow
+from app.services.text_frontend import TextFrontend
+from app.services.voice_registry import VoiceProfile, VoiceRegistry, split_voice_key
+from app.services.voice_store import load_or_build_artifact, read_samples, select_reference
 
 logger = logging.getLogger(__name__)
 
+# Looked up in MODEL_DIR in this order; the first is written by scripts/convert_checkpoint.py
+CHECKPOINT_FILES = ("final_finetuned_model.safetensors", "final_finetuned_model.pt")
+
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+    "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8,
+    "U8": torch.uint8, "BOOL": torch.bool,
+}
+
+def map_safetensors(path: str) -> Dict[str, torch.Tensor]:
+    """
+    Map the tensors of a safetensors file without reading them
+
+    safetensors' own loader copies every tensor into process memory. Here the
+    tensors are views of one private file mapping, so their pages stay in the
+    page cache, are read on first use and are shared by all processes mapping
+    the same file until one of them writes to a tensor.
+    """
+    with open(path, "rb") as f:
+        header_size = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_size))
+    header.pop("__metadata__", None)
+    data = torch.empty(0, dtype=torch.uint8).set_(
+        torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    )[8 + header_size:]
+
+    tensors = {}
+    for name, info in header.items():
+        if info["dtype"] not in SAFETENSORS_DTYPES:
+            raise ValueError(f"Unsupported dtype {info['dtype']} of tensor {name} in {path}")
+        begin, end = info["data_offsets"]
+        tensors[name] = data[begin:end].view(SAFETENSORS_DTYPES[info["dtype"]]).reshape(info["shape"])
+    return tensors
+
 class F5TTSService:
-    def __init__(self, model_dir: str, voice_profile: str):
+    sample_rate = TARGET_SAMPLE_RATE
+    default_params = InferenceParams()
+    
+    def __init__(
+        self,
+        model_dir: str,
+        voice_profiles_dir: str = "voice_profiles",
+        max_voices: int = 32,
+        max_voice_bytes: Optional[int] = None,
+        max_batch_size: int = 8,
+        vocoder_dir: str = "vocos-mel-24khz",
+        execution: Optional[ExecutionMode] = None,
+        text_cache_size: int = 4096,
+        expand_text: bool = True,
+        reference_min_seconds: float = 3.0,
+        reference_min_snr_db: float = 20.0,
+        reference_max_clipping: float = 0.001,
+        checkpoint_file: Optional[str] = None,
+        adaptive: Optional[AdaptiveSampling] = None
+    ):
         """
         Initialize F5 TTS service
         
+        The model, vocabulary and vocoder are loaded once and shared by every
+        voice profile. Voice profiles are preprocessed on first use and kept
+        in an LRU registry. A profile conditions on the shortest of its
+        samples that meets the reference quality thresholds, unless a
+        request names a sample ("profile:sample").
+        
         Args:
-            model_dir: Directory containing model files and voice profiles
-            voice_profile: Name of the voice profile to use
+            model_dir: Directory containing model files
+            voice_profiles_dir: Directory containing voice profiles
+            max_voices: Maximum number of voice profiles kept in memory
+            max_voice_bytes: Optional memory budget for cached voice profiles
+            max_batch_size: Maximum number of text chunks sampled in one batch
+            vocoder_dir: Directory inside model_dir holding the Vocos config and weights
+            execution: Precision, compilation, quantization and thread settings
+            text_cache_size: Number of tokenized text chunks kept in memory
+            expand_text: Whether numbers and abbreviations are spelled out
+            reference_min_seconds: Shortest sample chosen as reference by default
+            reference_min_snr_db: Minimum estimated SNR of a default reference
+            reference_max_clipping: Maximum fraction of clipped samples of a default reference
+            checkpoint_file: Checkpoint inside model_dir, None for the first of CHECKPOINT_FILES that exists
+            adaptive: Step-size control of requests sampled with adaptive=True
         """
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        logger.info(f"Using device: {self.device}")
+        self.execution = resolve_mode(execution or ExecutionMode(), self.device)
+        configure_threads(self.execution)
+        logger.info(f"Using device: {self.device} ({self.execution})")
         
         # Setup paths
         self.model_dir = model_dir
-        self.checkpoint_path = os.path.join("/app", model_dir, "final_finetuned_model.pt")
+        self.max_batch_size = max(1, max_batch_size)
+        if checkpoint_file:
+            self.checkpoint_path = os.path.join("/app", model_dir, checkpoint_file)
+        else:
+            candidates = [os.path.join("/app", model_dir, name) for name in CHECKPOINT_FILES]
+            self.checkpoint_path = next((path for path in candidates if os.path.exists(path)), candidates[-1])
         self.vocab_path = os.path.join("/app", model_dir, "F5TTS_Base_vocab.txt")
-        self.voice_profile_dir = os.path.join("/app/voice_profiles", voice_profile)
+        self.vocoder_path = os.path.join("/app", model_dir, vocoder_dir)
+        self.voice_profiles_dir = os.path.join("/app", voice_profiles_dir)
         
         # Validate paths
         self._validate_paths()
+        # Results of other precisions differ slightly, so they are cached separately
+        self.model_fingerprint = (
+            f"{self._file_fingerprint(self.checkpoint_path)}:{self.execution.dtype}:{self.execution.quantize}"
+        )
         
         # Initialize components
         self.vocab_char_map = None
+        self.frontend: Optional[TextFrontend] = None
+        self.text_cache_size = text_cache_size
+        self.expand_text = expand_text
+        self.reference_thresholds = (reference_min_seconds, reference_min_snr_db, reference_max_clipping)
+        self.adaptive = adaptive or AdaptiveSampling()
         self.model = None
         self.vocoder = None
-        self.ref_audio = None
-        self.ref_text = None
+        self.load_timings: Dict[str, float] = {}
+        self.voices = VoiceRegistry(
+            self._load_reference_audio,
+            max_profiles=max_voices,
+            max_bytes=max_voice_bytes
+        )
         
         # Load everything
         self._initialize_components()
@@ -59,8 +176,23 @@ class F5TTSService:
             raise ValueError(f"Checkpoint not found: {self.checkpoint_path}")
         if not os.path.exists(self.vocab_path):
             raise ValueError(f"Vocabulary file not found: {self.vocab_path}")
-        if not os.path.exists(self.voice_profile_dir):
-            raise ValueError(f"Voice profile not found: {self.voice_profile_dir}")
+        if not os.path.exists(self.voice_profiles_dir):
+            raise ValueError(f"Voice profiles directory not found: {self.voice_profiles_dir}")
+            
+    @staticmethod
+    def _file_fingerprint(path: str) -> str:
+        """Identify a file version by name, size and modification time"""
+        stat = os.stat(path)
+        return f"{os.path.basename(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+        
+    def get_voice_profile_dir(self, voice_profile: str) -> str:
+        """Resolve the directory of a voice profile"""
+        if not voice_profile or os.path.basename(voice_profile) != voice_profile or voice_profile.startswith('.'):
+            raise ValueError(f"Invalid voice profile name: {voice_profile}")
+        voice_profile_dir = os.path.join(self.voice_profiles_dir, voice_profile)
+        if not os.path.isdir(voice_profile_dir):
+            raise FileNotFoundError(f"Voice profile not found: {voice_profile}")
+        return voice_profile_dir
             
     def _load_vocab(self):
         """Load vocabulary from file"""
@@ -93,22 +225,15 @@ class F5TTSService:
                 conv_layers=4
             )
 
-            mel_spec_kwargs = dict(
-                n_fft=1024,
-                hop_length=256,
-                win_length=1024,
-                n_mel_channels=100,
-                target_sample_rate=24000,
-                mel_spec_type="vocos"
-            )
-
-            model = CFM(
-                transformer=DiT(**model_cfg, text_num_embeds=vocab_size, mel_dim=100),
-                mel_spec_kwargs=mel_spec_kwargs,
-                vocab_char_map=self.vocab_char_map,
-            )
-            
-            return model.to(self.device)
+            # Built on the meta device: no memory is allocated for weights
+            # that the checkpoint's tensors replace anyway
+            with torch.device("meta"):
+                model = CFM(
+                    transformer=DiT(**model_cfg, text_num_embeds=vocab_size, mel_dim=100),
+                    mel_spec_kwargs=MEL_SPEC_KWARGS,
+                    vocab_char_map=self.vocab_char_map,
+                )
+            return model
             
         except Exception as e:
             logger.error(f"Error creating model: {e}")
@@ -118,122 +243,514 @@ class F5TTSService:
         """Initialize all components"""
         try:
             # Load vocabulary
+            started = time.perf_counter()
             self.vocab_char_map, vocab_size = self._load_vocab()
+            self.frontend = TextFrontend(
+                self.vocab_char_map,
+                cache_size=self.text_cache_size,
+                expand=self.expand_text
+            )
+            self.load_timings["vocab"] = time.perf_counter() - started
             
             # Create model
+            started = time.perf_counter()
             self.model = self._create_model(vocab_size)
+            self.load_timings["model"] = time.perf_counter() - started
             
             # Load checkpoint
             logger.info("Loading model checkpoint...")
-            checkpoint = torch.load(self.checkpoint_path, map_location=self.device)
-            self.model.load_state_dict(checkpoint['model_state_dict'])
+            started = time.perf_counter()
+            state_dict = self._load_checkpoint()
+            # Assign the (memory-mapped) tensors instead of copying them
+            self.model.load_state_dict(state_dict, assign=True)
+            del state_dict
+            self._materialize_buffers()
+            stored_dtype = next(self.model.transformer.parameters()).dtype
+            if self.execution.dtype == "fp32" and stored_dtype != torch.float32:
+                # A copy per process; INFERENCE_DTYPE matching the file keeps the shared mapping
+                logger.warning(f"Checkpoint weights are {stored_dtype}, converting them to fp32")
+                self.model.transformer.float()
+            self.model = self.model.to(self.device).eval()
+            self.load_timings["checkpoint"] = time.perf_counter() - started
             
             # Load vocoder
             logger.info("Loading vocoder...")
-            self.vocoder = load_vocoder(vocoder_name="vocos", is_local=False)
+            started = time.perf_counter()
+            self.vocoder = self._load_vocoder()
+            self.load_timings["vocoder"] = time.perf_counter() - started
             
-            # Load reference audio
-            self._load_reference_audio()
+            # Apply the execution mode (compilation itself happens on first use)
+            started = time.perf_counter()
+            self.model = optimize_model(self.model, self.execution)
+            self.vocoder = optimize_vocoder(self.vocoder, self.execution)
+            self.load_timings["optimize"] = time.perf_counter() - started
             
-            logger.info("All components initialized successfully")
+            logger.info(f"All components initialized successfully: {self.load_timings}")
             
         except Exception as e:
             logger.error(f"Error initializing components: {e}")
             raise
             
-    def _load_reference_audio(self):
-        """Load reference audio from voice profile"""
-        logger.info("Loading reference audio...")
+    def _load_checkpoint(self) -> Dict[str, torch.Tensor]:
+        """
+        Load the model weights without materializing a second copy
+        
+        The file is memory-mapped, so pages are read on first use and every
+        worker process loading the same file shares them through the page
+        cache. safetensors files hold only inference weights; .pt training
+        checkpoints are restricted to plain tensors, and older ones that
+        pickle other objects fall back to a full load.
+        """
+        logger.info(f"Loading weights from: {self.checkpoint_path}")
+        if self.checkpoint_path.endswith(".safetensors"):
+            return map_safetensors(self.checkpoint_path)
+        try:
+            checkpoint = torch.load(self.checkpoint_path, map_location="cpu", mmap=True, weights_only=True)
+        except Exception as e:
+            logger.warning(f"Memory-mapped checkpoint load failed, falling back to a full load: {e}")
+            checkpoint = torch.load(self.checkpoint_path, map_location="cpu")
+        return checkpoint['model_state_dict']
+        
+    def _materialize_buffers(self):
+        """Compute the buffers checkpoints do not store, left on the meta device by _create_model"""
+        text_embed = self.model.transformer.text_embed
+        max_pos, dim = text_embed.freqs_cis.shape
+        text_embed.register_buffer("freqs_cis", precompute_freqs_cis(dim, max_pos), persistent=False)
+        self.model.mel_spec.register_buffer("dummy", torch.tensor(0), persistent=False)
+        missing = [
+            name for name, tensor in list(self.model.named_parameters()) + list(self.model.named_buffers())
+            if tensor.is_meta
+        ]
+        if missing:
+            raise ValueError(f"Checkpoint does not provide: {', '.join(missing)}")
+            
+    def _load_vocoder(self):
+        """Load the vocoder from MODEL_DIR, downloading it only if it is missing"""
+        if (
+            os.path.exists(os.path.join(self.vocoder_path, "config.yaml"))
+            and os.path.exists(os.path.join(self.vocoder_path, "pytorch_model.bin"))
+        ):
+            return load_vocoder(
+                vocoder_name="vocos",
+                is_local=True,
+                local_path=self.vocoder_path,
+                device=str(self.device)
+            )
+        logger.warning(f"Local vocoder not found in {self.vocoder_path}, downloading from Hugging Face")
+        return load_vocoder(vocoder_name="vocos", is_local=False, device=str(self.device))
+        
+    def _mel_spec(self, wave: torch.Tensor) -> torch.Tensor:
+        """Compute the model's mel spectrogram of a reference wave"""
+        with torch.inference_mode():
+            return self.model.mel_spec(wave.to(self.device)).cpu()
+        
+    def _load_reference_audio(self, voice_profile: str) -> VoiceProfile:
+        """Load the reference sample of a voice profile, or the one named in its key"""
+        logger.info(f"Loading reference audio for voice profile: {voice_profile}")
         try:
-            samples_file = os.path.join(self.voice_profile_dir, "samples.txt")
-            logger.info(f"Reading samples from: {samples_file}")
-            if not os.path.exists(samples_file):
-                raise FileNotFoundError(f"Voice profile samples not found: {samples_file}")
-                
-            with open(samples_file, 'r') as f:
-                first_sample = f.readline().strip().split('|')
-                if len(first_sample) != 2:
-                    raise ValueError("Invalid sample format in samples.txt")
-                    
-                audio_file, text = first_sample
-                # Get absolute path of the audio file
-                if not os.path.isabs(audio_file):
-                    audio_file = os.path.join(self.voice_profile_dir, audio_file)
-                logger.info(f"Loading audio from: {audio_file}")
-                
-                if not os.path.exists(audio_file):
-                    raise FileNotFoundError(f"Audio file not found: {audio_file}")
-                
-                self.ref_audio, self.ref_text = preprocess_ref_audio_text(audio_file, text)
+            name, reference = split_voice_key(voice_profile)
+            voice_profile_dir = self.get_voice_profile_dir(name)
+            samples = read_samples(voice_profile_dir)
+            if reference is not None:
+                samples = [
+                    (audio_file, text) for audio_file, text in samples
+                    if reference in (os.path.basename(audio_file), os.path.splitext(os.path.basename(audio_file))[0])
+                ]
+                if not samples:
+                    raise FileNotFoundError(f"Reference sample not found in voice profile {name}: {reference}")
+            
+            # Reuse the stored artifacts unless a sample changed
+            artifacts = [
+                (audio_file, load_or_build_artifact(voice_profile_dir, audio_file, text, self._mel_spec))
+                for audio_file, text in samples
+            ]
+            audio_file, artifact = select_reference(
+                [(candidate, candidate[1].quality) for candidate in artifacts], *self.reference_thresholds
+            )
+            logger.info(
+                f"Using reference {artifact.source} of {voice_profile} ({artifact.quality.duration:.1f}s, "
+                f"SNR {artifact.quality.snr_db:.0f} dB, {len(artifacts)} candidates)"
+            )
+            
+            return VoiceProfile(
+                name=voice_profile,
+                ref_audio=audio_file,
+                ref_text=artifact.ref_text,
+                ref_wave=torch.from_numpy(artifact.wave).unsqueeze(0),
+                ref_mel=torch.from_numpy(artifact.mel).unsqueeze(0),
+                ref_rms=artifact.ref_rms,
+                nbytes=artifact.nbytes,
+                metadata={
+                    "fingerprint": artifact.fingerprint,
+                    "reference": artifact.source,
+                    "quality": asdict(artifact.quality),
+                    "candidates": len(artifacts),
+                }
+            )
                 
         except Exception as e:
             logger.error(f"Error loading reference audio: {e}")
             raise
-            
-    def synthesize(self, text: str) -> Optional[str]:
+
+    def prepare_voice(self, voice_profile_dir: str):
+        """Precompute the reference artifacts of every sample in a profile directory"""
+        for audio_file, text in read_samples(voice_profile_dir):
+            load_or_build_artifact(voice_profile_dir, audio_file, text, self._mel_spec)
+
+    def sample(
+        self,
+        texts: List[str],
+        voice_profile: str,
+        params: Optional[InferenceParams] = None
+    ) -> List[torch.Tensor]:
         """
-        Synthesize speech from text
+        Run CFM sampling for text chunks of one voice as a single padded batch
+        
+        Every chunk must already fit the model context (see split_text).
         
         Args:
-            text: Text to synthesize
+            texts: Text chunks to synthesize
+            voice_profile: Name of the voice profile to use
+            params: Sampling parameters, defaults to default_params
             
         Returns:
-            Path to generated audio file or None if synthesis failed
+            Generated mel spectrograms of shape [1, n_mels, frames], one per
+            chunk, without the reference part
         """
-        if not text:
-            logger.error("Empty text provided")
-            return None
-            
-        try:
-            logger.info(f"Synthesizing text: {text[:50]}...")
-            
-            # Create output directory if needed
-            output_dir = os.path.join(self.voice_profile_dir, "generated")
-            os.makedirs(output_dir, exist_ok=True)
+        return self.sample_with_report(texts, voice_profile, params)[0]
+        
+    def sample_with_report(
+        self,
+        texts: List[str],
+        voice_profile: str,
+        params: Optional[InferenceParams] = None
+    ) -> Tuple[List[torch.Tensor], SamplingReport]:
+        """Like sample(), also returning how many steps sampling took"""
+        if not texts:
+            return [], SamplingReport(scheduled_steps=0, steps=0)
+        params = params or self.default_params
             
-            # Generate unique output path
-            output_path = os.path.join(output_dir, f"speech_{hash(text)}.wav")
+        voice = self.voices.get(voice_profile)
+        ref_wave = voice.ref_wave.to(self.device)
+        ref_frames = ref_wave.shape[-1] // HOP_LENGTH
+        
+        with STAGE_SECONDS.time(stage="text_preprocess"):
+            ref_text = voice.ref_text
+            if len(ref_text[-1].encode("utf-8")) == 1:
+                ref_text = ref_text + " "
+                
+            text_ids = self.frontend.encode(ref_text, texts).to(self.device)
+            durations = torch.tensor(
+                [estimate_duration(ref_frames, ref_text, text, params.speed) for text in texts],
+                dtype=torch.long,
+                device=self.device
+            )
+        
+        with torch.inference_mode():
+            # Share the precomputed reference mel across the batch
+            if voice.ref_mel is not None:
+                cond = voice.ref_mel.to(self.device)
+            else:
+                cond = self.model.mel_spec(ref_wave).permute(0, 2, 1)
+            cond = cond.expand(len(texts), -1, -1)
+            lens = torch.full((len(texts),), cond.shape[1], dtype=torch.long, device=self.device)
             
-            # Generate audio
-            with torch.no_grad():
-                audio, sample_rate, _ = infer_process(
-                    self.ref_audio,
-                    self.ref_text,
-                    text,
+            with STAGE_SECONDS.time(stage="sampling"):
+                # Text and reference conditioning is computed once for all steps
+                generated, report = sample_flow(
                     self.model,
-                    self.vocoder,
-                    mel_spec_type="vocos",
-                    speed=1.0,
-                    nfe_step=32,
-                    cfg_strength=2.0,
-                    sway_sampling_coef=-1.0
+                    cond,
+                    text_ids,
+                    durations,
+                    lens,
+                    steps=params.nfe_step,
+                    cfg_strength=params.cfg_strength,
+                    sway_sampling_coef=params.sway_sampling_coef,
+                    control=self.adaptive if params.adaptive else None
                 )
+                generated = generated.to(torch.float32)
+            self._observe_sampling(report, params)
                 
-                if audio is None or len(audio) == 0:
-                    logger.error("Generated audio is empty")
-                    return None
-                    
-                # Save audio file
-                sf.write(
-                    output_path,
-                    audio,
-                    sample_rate,
-                    'PCM_16',
-                    format='WAV'
-                )
-                
-                logger.info(f"Audio saved to: {output_path}")
-                return output_path
-                
+        return [
+            mel[ref_frames:duration, :].permute(1, 0).unsqueeze(0)
+            for mel, duration in zip(generated, durations.tolist())
+        ], report
+        
+    def _observe_sampling(self, report: SamplingReport, params: InferenceParams):
+        """Record the steps taken by one sample() call against its full schedule"""
+        mode = "adaptive" if params.adaptive else "fixed"
+        SAMPLING_STEPS.observe(report.steps, mode=mode)
+        if params.adaptive:
+            SAMPLING_SPEEDUP.observe(report.speedup)
+            SAMPLING_ESTIMATED_ERROR.observe(report.estimated_error)
+            logger.info(
+                f"Adaptive sampling took {report.steps}/{report.scheduled_steps} steps "
+                f"({report.speedup:.2f}x), estimated error {report.estimated_error:.4f}"
+            )
+        
+    def vocode(self, mels: List[torch.Tensor], voice_profile: str) -> List[np.ndarray]:
+        """
+        Decode generated mel spectrograms into waves at the voice's loudness
+        
+        Args:
+            mels: Mel spectrograms returned by sample()
+            voice_profile: Name of the voice profile they were sampled with
+            
+        Returns:
+            Waves at sample_rate, one per mel
+        """
+        voice = self.voices.get(voice_profile)
+        waves = []
+        with torch.inference_mode(), STAGE_SECONDS.time(stage="vocoder"):
+            if len(mels) > 1 and self.device.type == "cuda":
+                decoded = self._decode_padded(mels)
+            else:
+                # On CPU a padded batch is no faster than decoding one by one
+                decoded = [self.vocoder.decode(mel.to(self.device)).squeeze(0) for mel in mels]
+            for wave in decoded:
+                if voice.ref_rms < TARGET_RMS:
+                    wave = wave * voice.ref_rms / TARGET_RMS
+                waves.append(wave.squeeze().cpu().numpy())
+        return waves
+        
+    def _decode_padded(self, mels: List[torch.Tensor]) -> List[torch.Tensor]:
+        """
+        Decode mels of different lengths as one zero-padded batch
+        
+        Padding only affects the last few milliseconds of the shorter waves,
+        which fall into the cross-fade between chunks.
+        """
+        frames = [mel.shape[-1] for mel in mels]
+        longest = max(frames)
+        batch = torch.cat([
+            torch.nn.functional.pad(mel.to(self.device), (0, longest - length))
+            for mel, length in zip(mels, frames)
+        ])
+        decoded = self.vocoder.decode(batch)
+        return [
+            wave[:decoded.shape[-1] - (longest - length) * HOP_LENGTH]
+            for wave, length in zip(decoded, frames)
+        ]
+        
+    def generate(
+        self,
+        texts: List[str],
+        voice_profile: str,
+        params: Optional[InferenceParams] = None
+    ) -> List[np.ndarray]:
+        """
+        Generate audio for text chunks of one voice as a single padded batch
+        
+        The CFM sampling loop runs once for the whole batch and each chunk
+        is then vocoded separately.
+        
+        Args:
+            texts: Text chunks to synthesize
+            voice_profile: Name of the voice profile to use
+            params: Sampling parameters, defaults to default_params
+            
+        Returns:
+            Generated waves, one per chunk, in input order
+        """
+        return self.vocode(self.sample(texts, voice_profile, params), voice_profile)
+        
+    def result_key(
+        self,
+        text: str,
+        voice_profile: str,
+        params: Optional[InferenceParams] = None,
+        **output
+    ) -> str:
+        """
+        Stable cache key of a synthesis result
+        
+        Covers everything that changes the generated audio: the text and
+        whether it is expanded, the voice profile's reference sample, the
+        model checkpoint and the sampling parameters, plus any output
+        options such as the encoding.
+        """
+        voice = self.voices.get(voice_profile)
+        params = params or self.default_params
+        if params.adaptive:
+            # The step-size control changes adaptive results
+            output = {**output, "sampling": self.adaptive.to_dict()}
+        return cache_key(
+            **output,
+            **params.to_dict(),
+            text=text,
+            voice_profile=voice_profile,
+            voice=voice.metadata.get("fingerprint"),
+            model=self.model_fingerprint,
+            # TEXT_NORMALIZATION changes what is spoken for the same text
+            text_normalization=self.frontend.expand
+        )
+        
+    def split_text(
+        self,
+        text: str,
+        voice_profile: str,
+        max_chars: Optional[int] = None,
+        speed: float = 1.0
+    ) -> List[str]:
+        """
+        Split text into chunks that fit the model context for a voice
+        
+        The text is normalized and expanded by the text front end first, so
+        chunk boundaries fall on sentence ends of the spoken form.
+        
+        Args:
+            text: Text to split
+            voice_profile: Name of the voice profile to use
+            max_chars: Optional smaller chunk size, e.g. for streaming
+            speed: Speaking rate multiplier
+        """
+        voice = self.voices.get(voice_profile)
+        limit = max_chunk_chars(voice.ref_wave, voice.ref_text, speed)
+        if max_chars is not None:
+            limit = min(limit, max_chars)
+        return chunk_text(self.frontend.normalize(text), max_chars=limit)
+        
+    def validate_text(self, text: str):
+        """
+        Check that text can be synthesized before it is queued
+        
+        Raises:
+            UnsupportedTextError: If the text is empty after normalization
+                or contains characters outside the model vocabulary
+        """
+        self.frontend.validate(text)
+        
+    def synthesize_batch(
+        self,
+        texts: List[str],
+        voice_profile: str,
+        params: Optional[InferenceParams] = None
+    ) -> List[Optional[np.ndarray]]:
+        """
+        Synthesize several texts with one voice profile
+        
+        All texts are split into chunks, the chunks are packed into padded
+        batches of similar length and the generated chunks are stitched back
+        into one utterance per text.
+        
+        Args:
+            texts: Texts to synthesize
+            voice_profile: Name of the voice profile to use
+            params: Sampling parameters, defaults to default_params
+            
+        Returns:
+            Generated waves at sample_rate, None for texts that failed
+            
+        Raises:
+            FileNotFoundError: If the voice profile does not exist
+        """
+        # Unknown or broken voice profiles are reported to the caller
+        voice = self.voices.get(voice_profile)
+        
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        try:
+            mels = self.sample_batch(texts, voice_profile, params)
+            waves = iter(self.vocode([mel for text_mels in mels for mel in text_mels], voice_profile))
+            results = stitch_waves([[next(waves) for _ in text_mels] for text_mels in mels])
         except Exception as e:
-            logger.error(f"Error synthesizing speech: {e}")
+            logger.error(f"Error synthesizing speech for {voice.name}: {e}")
+            
+        return results
+        
+    def sample_batch(
+        self,
+        texts: List[str],
+        voice_profile: str,
+        params: Optional[InferenceParams] = None
+    ) -> List[List[torch.Tensor]]:
+        """
+        Split texts into chunks and sample them in padded batches
+        
+        Chunks of all texts are sorted by length so each padded batch wastes
+        as little as possible. This is the sampling half of
+        synthesize_batch(); decode the mels with vocode() and join them with
+        stitch_waves().
+        
+        Returns:
+            Mels per text in playback order, empty for empty texts
+        """
+        params = params or self.default_params
+        chunks = []
+        for index, text in enumerate(texts):
+            if not text:
+                logger.error("Empty text provided")
+                continue
+            logger.info(f"Synthesizing text: {text[:50]}...")
+            for position, chunk in enumerate(self.split_text(text, voice_profile, speed=params.speed)):
+                chunks.append((index, position, chunk))
+                
+        chunks.sort(key=lambda item: len(item[2].encode("utf-8")))
+        mels: List[Dict[int, torch.Tensor]] = [{} for _ in texts]
+        for start in range(0, len(chunks), self.max_batch_size):
+            batch = chunks[start:start + self.max_batch_size]
+            generated = self.sample([chunk for _, _, chunk in batch], voice_profile, params)
+            for (index, position, _), mel in zip(batch, generated):
+                mels[index][position] = mel
+        return [[parts[position] for position in sorted(parts)] for parts in mels]
+        
+    def synthesize(
+        self,
+        text: str,
+        voice_profile: str,
+        params: Optional[InferenceParams] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Synthesize speech from text
+        
+        Args:
+            text: Text to synthesize
+            voice_profile: Name of the voice profile to use
+            params: Sampling parameters, defaults to default_params
+            
+        Returns:
+            Generated wave at sample_rate or None if synthesis failed
+            
+        Raises:
+            FileNotFoundError: If the voice profile does not exist
+        """
+        if not text:
+            logger.error("Empty text provided")
             return None
             
-    def cleanup(self):
+        return self.synthesize_batch([text], voice_profile, params)[0]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Return bytes held by the loaded model components
+
+        Returns:
+            Dictionary with parameter and buffer bytes of the model and
+            vocoder, plus allocated device memory when running on CUDA
+        """
+        usage = {}
+        for name, module in (("model", self.model), ("vocoder", self.vocoder)):
+            if module is None:
+                continue
+            usage[name] = module_bytes(module)
+        if self.device.type == "cuda":
+            usage["cuda_allocated"] = torch.cuda.memory_allocated(self.device)
+        return usage
+
+    def cleanup(self, voice_profile: Optional[str] = None):
         """Cleanup temporary files"""
         try:
-            output_dir = os.path.join(self.voice_profile_dir, "generated")
-            if os.path.exists(output_dir):
+            if voice_profile is None:
+                voice_profiles = [
+                    d for d in os.listdir(self.voice_profiles_dir)
+                    if os.path.isdir(os.path.join(self.voice_profiles_dir, d))
+                ]
+            else:
+                voice_profiles = [voice_profile]
+                
+            for profile in voice_profiles:
+                output_dir = os.path.join(self.voice_profiles_dir, profile, "generated")
+                if not os.path.exists(output_dir):
+                    continue
                 for file in os.listdir(output_dir):
                     try:
                         os.remove(os.path.join(output_dir, file))
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from app.core.metrics import VOCODER_BATCH_SIZE, VOCODER_BUSY_SECONDS
+from app.services.inference import InferenceParams, stitch_waves
+
+logger = logging.getLogger(__name__)
+
+# decode(mels, voice_profile) -> one wave per mel
+DecodeFn = Callable[[List[Any], str], List[np.ndarray]]
+
+
+class _VocoderJob:
+    __slots__ = ("mels", "voice_profile", "future", "enqueued_at")
+
+    def __init__(self, mels: List[Any], voice_profile: str, future: asyncio.Future):
+        self.mels = mels
+        self.voice_profile = voice_profile
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class VocoderStage:
+    def __init__(self, decode: DecodeFn, max_batch_size: int = 8, utilization_window_s: float = 60.0):
+        """
+        Vocoder decoding as a separate pipeline stage
+
+        Mels are decoded on a dedicated thread with its own queue, so the
+        inference pool can sample the next request or chunk while earlier
+        mels are being vocoded. Jobs that queue up while the vocoder is busy
+        are decoded together, up to max_batch_size mels per call to decode.
+
+        Args:
+            decode: Callable decoding mels of one voice profile into waves
+            max_batch_size: Maximum number of mels per decode call
+            utilization_window_s: Window of the reported utilization
+        """
+        self.decode_fn = decode
+        self.max_batch_size = max(1, max_batch_size)
+        self.utilization_window = max(1.0, utilization_window_s)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vocoder")
+        self._lock = threading.Lock()
+        self._busy: deque = deque()
+        self._started_at = time.perf_counter()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.batches = 0
+        self.jobs = 0
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.total_wait = 0.0
+
+    def _ensure_started(self):
+        """Start the collector task on the running event loop"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._collect())
+
+    async def decode(self, mels: List[Any], voice_profile: str) -> List[np.ndarray]:
+        """
+        Queue mels for decoding and wait for their waves
+
+        Args:
+            mels: Mel spectrograms returned by the service's sample()
+            voice_profile: Name of the voice profile they were sampled with
+
+        Returns:
+            Waves in the order of mels
+        """
+        if not mels:
+            return []
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_VocoderJob(list(mels), voice_profile, future))
+        return await future
+
+    async def stop(self):
+        """Stop the collector and release the vocoder thread"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _collect(self):
+        """Take every job queued while the previous batch ran and decode them"""
+        loop = asyncio.get_running_loop()
+        while True:
+            jobs = [await self._queue.get()]
+            while not self._queue.empty() and sum(len(job.mels) for job in jobs) < self.max_batch_size:
+                jobs.append(self._queue.get_nowait())
+            # Callers that timed out no longer need their waves
+            jobs = [job for job in jobs if not job.future.done()]
+            if not jobs:
+                continue
+
+            started = time.perf_counter()
+            for job in jobs:
+                self.total_wait += started - job.enqueued_at
+            results = await loop.run_in_executor(self._pool, self._decode_jobs, jobs)
+            for job, (ok, result) in zip(jobs, results):
+                if job.future.done():
+                    continue
+                if ok:
+                    job.future.set_result(result)
+                else:
+                    job.future.set_exception(result)
+
+    def _decode_jobs(self, jobs: List[_VocoderJob]) -> List[tuple]:
+        """Decode a set of jobs grouped by voice profile (vocoder thread)"""
+        started = time.perf_counter()
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for position, job in enumerate(jobs):
+            groups[job.voice_profile].append(position)
+
+        results: List[tuple] = [None] * len(jobs)
+        for voice_profile, positions in groups.items():
+            mels = [mel for position in positions for mel in jobs[position].mels]
+            try:
+                waves = []
+                for start in range(0, len(mels), self.max_batch_size):
+                    batch = mels[start:start + self.max_batch_size]
+                    VOCODER_BATCH_SIZE.observe(len(batch))
+                    waves.extend(self.decode_fn(batch, voice_profile))
+                    self.batches += 1
+            except Exception as e:
+                logger.error(f"Error vocoding for voice profile {voice_profile}: {e}")
+                for position in positions:
+                    results[position] = (False, e)
+                continue
+            offset = 0
+            for position in positions:
+                count = len(jobs[position].mels)
+                results[position] = (True, waves[offset:offset + count])
+                offset += count
+
+        finished = time.perf_counter()
+        VOCODER_BUSY_SECONDS.inc(finished - started)
+        with self._lock:
+            self.jobs += len(jobs)
+            self.items += sum(len(job.mels) for job in jobs)
+            self.busy_seconds += finished - started
+            self._busy.append((started, finished))
+        return results
+
+    def utilization(self) -> float:
+        """Fraction of the utilization window the vocoder thread was busy"""
+        now = time.perf_counter()
+        window_start = max(now - self.utilization_window, self._started_at)
+        with self._lock:
+            while self._busy and self._busy[0][1] < window_start:
+                self._busy.popleft()
+            busy = sum(end - max(start, window_start) for start, end in self._busy)
+        return min(1.0, busy / max(now - window_start, 1e-6))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batching and utilization statistics"""
+        with self._lock:
+            stats = {
+                "batches": self.batches,
+                "jobs": self.jobs,
+                "items": self.items,
+                "max_batch_size": self.max_batch_size,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "mean_queue_wait_ms": self.total_wait / self.jobs * 1000.0 if self.jobs else 0.0,
+                "busy_seconds": self.busy_seconds,
+                "queued": self._queue.qsize() if self._queue is not None else 0,
+            }
+        stats["utilization"] = self.utilization()
+        return stats
+
+
+async def synthesize_pipelined(
+    texts: List[str],
+    voice_profile: str,
+    params: Optional[InferenceParams],
+    service,
+    executor,
+    vocoder: VocoderStage,
+    client: Optional[str] = None,
+    weight: float = 1.0
+) -> List[Optional[np.ndarray]]:
+    """
+    Pipelined equivalent of service.synthesize_batch()
+
+    Sampling runs on the inference pool and decoding on the vocoder stage,
+    so the inference pool is free for the next batch while this one is
+    vocoded. client and weight are passed on to executor.run() for fair
+    queuing.
+    """
+    mels = await executor.run(service.sample_batch, texts, voice_profile, params, client=client, weight=weight)
+    waves = iter(await vocoder.decode([mel for text_mels in mels for mel in text_mels], voice_profile))
+    return stitch_waves([[next(waves) for _ in text_mels] for text_mels in mels])
@@ -0,0 +1,417 @@
+import io
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import soundfile as sf
+from app.services.voice_store import ARTIFACT_DIR, fresh_artifact_meta, read_samples
+
+logger = logging.getLogger(__name__)
+
+VOICE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+# prepare(voice_profile_dir) precomputes the reference artifacts of a profile
+PrepareFn = Callable[[str], None]
+
+
+@dataclass
+class VoiceSample:
+    """One reference sample of a catalogued profile"""
+    audio_file: str
+    text: str
+    duration: Optional[float]
+    ready: bool
+    # Reference quality scores (duration, snr_db, clipping) once the artifact is built
+    quality: Optional[Dict[str, float]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "audio_file": self.audio_file,
+            "text": self.text,
+            "duration": self.duration,
+            "ready": self.ready,
+            "quality": self.quality,
+        }
+
+
+@dataclass
+class VoiceEntry:
+    """Catalog entry of a voice profile on disk"""
+    name: str
+    # "ready" when every sample has a fresh artifact, "pending" while some are
+    # built on first use, "invalid" when the profile cannot be loaded
+    status: str
+    samples: List[VoiceSample] = field(default_factory=list)
+    error: Optional[str] = None
+    updated_at: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        return sum(sample.duration or 0.0 for sample in self.samples)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public view of the profile, without server paths"""
+        return {
+            "name": self.name,
+            "status": self.status,
+            "sample_count": len(self.samples),
+            "duration": self.duration,
+            "samples": [sample.to_dict() for sample in self.samples],
+            "error": self.error,
+            "updated_at": self.updated_at,
+        }
+
+
+def validate_voice_name(name: str):
+    """
+    Raises:
+        ValueError: If the name is not a valid profile directory name
+    """
+    if not VOICE_NAME_PATTERN.match(name or ""):
+        raise ValueError(
+            f"Invalid voice profile name: {name} (letters, digits, '-' and '_', at most 64 characters)"
+        )
+
+
+def validate_audio(data: bytes, min_seconds: float, max_seconds: float) -> Tuple[np.ndarray, int]:
+    """
+    Decode an uploaded reference sample and check it is usable
+
+    Returns:
+        The mono wave and its sample rate
+
+    Raises:
+        ValueError: If the audio cannot be decoded, is too short or too long,
+            or is silent
+    """
+    try:
+        wave, sample_rate = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    except Exception as e:
+        # libsndfile errors name the in-memory file; keep only the reason
+        raise ValueError(f"Unreadable audio: {getattr(e, 'error_string', e)}")
+    wave = wave.mean(axis=1)
+    duration = len(wave) / sample_rate
+    if duration < min_seconds or duration > max_seconds:
+        raise ValueError(
+            f"Reference audio must be {min_seconds:g} to {max_seconds:g} seconds long, got {duration:.1f}"
+        )
+    if not np.isfinite(wave).all():
+        raise ValueError("Reference audio contains invalid samples")
+    if np.max(np.abs(wave)) < 1e-4:
+        raise ValueError("Reference audio is silent")
+    return wave, sample_rate
+
+
+class VoiceCatalog:
+    def __init__(
+        self,
+        profiles_dir: str,
+        poll_interval_s: float = 2.0,
+        min_seconds: float = 1.0,
+        max_seconds: float = 30.0,
+        on_change: Optional[Callable[[str], None]] = None
+    ):
+        """
+        In-memory index of the voice profiles on disk
+
+        A watcher thread polls the profiles directory and rescans only
+        profiles whose samples.txt, audio files or reference artifacts changed,
+        so requests read the index instead of the filesystem. Profiles
+        created, replaced or deleted through the catalog are indexed
+        immediately.
+
+        Args:
+            profiles_dir: Directory containing the voice profiles
+            poll_interval_s: Seconds between watcher polls, 0 disables the watcher
+            min_seconds: Shortest accepted uploaded reference sample
+            max_seconds: Longest accepted uploaded reference sample
+            on_change: Called with the name of a profile whose source changed
+                or that was deleted, e.g. to drop it from the voice registry
+        """
+        self.profiles_dir = profiles_dir
+        self.poll_interval = max(0.0, poll_interval_s)
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.on_change = on_change
+        self._entries: Dict[str, VoiceEntry] = {}
+        self._signatures: Dict[str, tuple] = {}
+        self._listing: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # Serializes refreshes and the swaps of create() and delete()
+        self._write_lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refreshes = 0
+        self.rescans = 0
+
+    def start(self):
+        """Index the profiles and start the watcher thread"""
+        if self._thread is not None:
+            return
+        self.refresh()
+        if self.poll_interval > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="voice-catalog", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Error refreshing voice catalog: {e}")
+
+    @staticmethod
+    def _signature(path: str, entry: Optional[VoiceEntry]) -> tuple:
+        """Versions of a profile's samples.txt and indexed audio files, and of its artifacts"""
+        files = ["samples.txt"] + ([sample.audio_file for sample in entry.samples] if entry is not None else [])
+        source = []
+        for file in files:
+            try:
+                stat = os.stat(os.path.join(path, file))
+                source.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                source.append(None)
+        artifacts = []
+        try:
+            with os.scandir(os.path.join(path, ARTIFACT_DIR)) as it:
+                artifacts = sorted((entry.name, entry.stat().st_mtime_ns) for entry in it)
+        except OSError:
+            pass
+        return tuple(source), tuple(artifacts)
+
+    def _scan(self, name: str, path: str) -> VoiceEntry:
+        """Read a profile's samples, their durations and artifact freshness"""
+        try:
+            samples = read_samples(path)
+        except (FileNotFoundError, ValueError) as e:
+            return VoiceEntry(name, "invalid", error=str(e), updated_at=time.time())
+
+        entries, missing = [], []
+        for audio_file, text in samples:
+            if not os.path.exists(audio_file):
+                missing.append(os.path.basename(audio_file))
+                entries.append(VoiceSample(os.path.basename(audio_file), text, None, False))
+                continue
+            try:
+                # Header only; formats libsndfile cannot read still load through the model's loader
+                info = sf.info(audio_file)
+                duration = info.frames / info.samplerate
+            except Exception:
+                duration = None
+            meta = fresh_artifact_meta(path, audio_file, text)
+            entries.append(VoiceSample(
+                os.path.basename(audio_file), text, duration, meta is not None, meta.get("quality") if meta else None
+            ))
+
+        if missing:
+            status, error = "invalid", f"Audio file not found: {', '.join(missing)}"
+        else:
+            status, error = ("ready" if all(sample.ready for sample in entries) else "pending"), None
+        return VoiceEntry(name, status, entries, error, time.time())
+
+    def _rebuild_listing(self):
+        """Rebuild the listing snapshot (lock held)"""
+        self._listing = [self._entries[name].to_dict() for name in sorted(self._entries)]
+
+    def refresh(self) -> List[str]:
+        """
+        Rescan changed profiles
+
+        Returns:
+            Names of profiles whose source changed or that were removed
+        """
+        found = {}
+        try:
+            with os.scandir(self.profiles_dir) as it:
+                for entry in it:
+                    if entry.is_dir() and not entry.name.startswith('.'):
+                        found[entry.name] = entry.path
+        except FileNotFoundError:
+            pass
+
+        changed = []
+        with self._write_lock:
+            updated = False
+            for name, path in found.items():
+                previous = self._signatures.get(name)
+                signature = self._signature(path, self._entries.get(name))
+                if previous == signature:
+                    continue
+                entry = self._scan(name, path)
+                with self._lock:
+                    self._entries[name] = entry
+                    # Taken again: the rescan may have found other audio files
+                    self._signatures[name] = self._signature(path, entry)
+                self.rescans += 1
+                updated = True
+                # Only artifacts changed (built on first use): the loaded profile is still current
+                if previous is not None and previous[0] != signature[0]:
+                    changed.append(name)
+            with self._lock:
+                for name in set(self._entries) - set(found):
+                    del self._entries[name]
+                    self._signatures.pop(name, None)
+                    changed.append(name)
+                    updated = True
+                if updated:
+                    self._rebuild_listing()
+                self.refreshes += 1
+
+        for name in changed:
+            logger.info(f"Voice profile changed on disk: {name}")
+            self._notify(name)
+        return changed
+
+    def _notify(self, name: str):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(name)
+        except Exception as e:
+            logger.warning(f"Error handling change of voice profile {name}: {e}")
+
+    def _index(self, name: str):
+        """Index one profile right away instead of waiting for the watcher"""
+        path = os.path.join(self.profiles_dir, name)
+        with self._lock:
+            if os.path.isdir(path):
+                self._entries[name] = self._scan(name, path)
+                self._signatures[name] = self._signature(path, self._entries[name])
+            else:
+                self._entries.pop(name, None)
+                self._signatures.pop(name, None)
+            self._rebuild_listing()
+
+    def get(self, name: str) -> Optional[VoiceEntry]:
+        with self._lock:
+            return self._entries.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            return name in self._entries
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Public view of every profile, sorted by name; the snapshot is shared, do not modify it"""
+        return self._listing
+
+    def create(
+        self,
+        name: str,
+        samples: List[Tuple[bytes, str]],
+        prepare: Optional[PrepareFn] = None,
+        replace: bool = False
+    ) -> VoiceEntry:
+        """
+        Create a voice profile from uploaded reference samples
+
+        The samples are validated and written to a hidden directory next to
+        the profiles, prepare() precomputes their artifacts there, and the
+        directory is then renamed into place, so a profile is never visible
+        half-written.
+
+        Args:
+            name: Name of the new profile
+            samples: (audio file contents, transcript) pairs; an empty
+                transcript is transcribed when the artifact is built
+            prepare: Precomputes the reference artifacts of a profile directory
+            replace: Replace an existing profile of the same name
+
+        Raises:
+            ValueError: If the name, an audio file or a transcript is invalid
+            FileExistsError: If the profile exists and replace is False
+        """
+        validate_voice_name(name)
+        if not samples:
+            raise ValueError("A voice profile needs at least one sample")
+        target = os.path.join(self.profiles_dir, name)
+        if not replace and os.path.exists(target):
+            raise FileExistsError(f"Voice profile already exists: {name}")
+
+        waves = []
+        for index, (data, text) in enumerate(samples):
+            text = " ".join((text or "").split())
+            if "|" in text:
+                raise ValueError(f"Transcript of sample {index} contains '|'")
+            try:
+                waves.append((validate_audio(data, self.min_seconds, self.max_seconds), text))
+            except ValueError as e:
+                raise ValueError(f"Sample {index}: {e}")
+
+        os.makedirs(self.profiles_dir, exist_ok=True)
+        staging = os.path.join(self.profiles_dir, f".upload-{name}-{uuid.uuid4().hex[:8]}")
+        try:
+            os.makedirs(os.path.join(staging, "generated"))
+            lines = []
+            for index, ((wave, sample_rate), text) in enumerate(waves):
+                audio_file = f"sample_{index:03d}.wav"
+                sf.write(os.path.join(staging, audio_file), wave, sample_rate, subtype="PCM_16")
+                lines.append(f"{audio_file}|{text}\n")
+            with open(os.path.join(staging, "samples.txt"), 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+            # Artifacts keep matching their sources after the rename
+            if prepare is not None:
+                prepare(staging)
+
+            with self._write_lock:
+                if os.path.exists(target):
+                    if not replace:
+                        raise FileExistsError(f"Voice profile already exists: {name}")
+                    self._remove(target)
+                os.rename(staging, target)
+                self._index(name)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        logger.info(f"Created voice profile {name} with {len(samples)} samples")
+        self._notify(name)
+        return self.get(name)
+
+    def delete(self, name: str):
+        """
+        Delete a voice profile
+
+        Raises:
+            ValueError: If the name is invalid
+            FileNotFoundError: If the profile does not exist
+        """
+        validate_voice_name(name)
+        target = os.path.join(self.profiles_dir, name)
+        with self._write_lock:
+            if not os.path.isdir(target):
+                raise FileNotFoundError(f"Voice profile not found: {name}")
+            self._remove(target)
+            self._index(name)
+        logger.info(f"Deleted voice profile: {name}")
+        self._notify(name)
+
+    def _remove(self, path: str):
+        # Moved aside first so neither the watcher nor the loader sees a partly deleted profile
+        trash = os.path.join(self.profiles_dir, f".deleted-{uuid.uuid4().hex[:8]}")
+        os.rename(path, trash)
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [entry.status for entry in self._entries.values()]
+        return {
+            "profiles": len(statuses),
+            "ready": statuses.count("ready"),
+            "pending": statuses.count("pending"),
+            "invalid": statuses.count("invalid"),
+            "poll_interval_s": self.poll_interval,
+            "refreshes": self.refreshes,
+            "rescans": self.rescans,
+        }
@@ -0,0 +1,147 @@
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Separates a profile name from a requested reference sample in registry keys
+REFERENCE_SEPARATOR = ":"
+
+
+def voice_key(voice_profile: str, reference: Optional[str] = None) -> str:
+    """Registry key of a voice profile conditioned on a specific reference sample"""
+    return f"{voice_profile}{REFERENCE_SEPARATOR}{reference}" if reference else voice_profile
+
+
+def split_voice_key(key: str) -> Tuple[str, Optional[str]]:
+    """Split a registry key into the profile name and the requested reference, if any"""
+    voice_profile, _, reference = key.partition(REFERENCE_SEPARATOR)
+    return voice_profile, reference or None
+
+
+@dataclass
+class VoiceProfile:
+    """Preprocessed reference data for a single voice profile"""
+    name: str
+    ref_audio: Any
+    ref_text: str
+    ref_wave: Any = None
+    ref_mel: Any = None
+    ref_rms: float = 0.0
+    nbytes: int = 0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class VoiceRegistry:
+    def __init__(
+        self,
+        loader: Callable[[str], VoiceProfile],
+        max_profiles: int = 32,
+        max_bytes: Optional[int] = None
+    ):
+        """
+        LRU registry of preprocessed voice profiles
+
+        Args:
+            loader: Callable building a VoiceProfile from a profile name
+            max_profiles: Maximum number of profiles kept in memory
+            max_bytes: Optional memory budget for all cached profiles
+        """
+        self._loader = loader
+        self.max_profiles = max(1, max_profiles)
+        self.max_bytes = max_bytes
+        self._profiles: "OrderedDict[str, VoiceProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, name: str) -> VoiceProfile:
+        """
+        Return a loaded voice profile, loading it on first use
+
+        Args:
+            name: Name of the voice profile
+
+        Returns:
+            The preprocessed VoiceProfile
+        """
+        with self._lock:
+            profile = self._profiles.get(name)
+            if profile is not None:
+                self._profiles.move_to_end(name)
+                self.hits += 1
+                return profile
+            self.misses += 1
+            load_lock = self._loading.setdefault(name, threading.Lock())
+
+        # Load outside the registry lock so other voices stay available,
+        # but only once per profile when several requests race for it
+        with load_lock:
+            with self._lock:
+                profile = self._profiles.get(name)
+                if profile is not None:
+                    self._profiles.move_to_end(name)
+                    return profile
+
+            logger.info(f"Loading voice profile: {name}")
+            profile = self._loader(name)
+
+            with self._lock:
+                self._profiles[name] = profile
+                self._profiles.move_to_end(name)
+                self._loading.pop(name, None)
+                self._evict()
+            return profile
+
+    def invalidate(self, name: str) -> bool:
+        """Drop a profile, with every reference of it, so it is reloaded on next use"""
+        with self._lock:
+            keys = [key for key in self._profiles if split_voice_key(key)[0] == name]
+            for key in keys:
+                del self._profiles[key]
+            return bool(keys)
+
+    def clear(self):
+        """Drop all cached profiles"""
+        with self._lock:
+            self._profiles.clear()
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            return name in self._profiles
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._profiles)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(p.nbytes for p in self._profiles.values())
+
+    def _evict(self):
+        """Evict least recently used profiles until within limits (lock held)"""
+        while len(self._profiles) > 1 and (
+            len(self._profiles) > self.max_profiles
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            name, _ = self._profiles.popitem(last=False)
+            self.evictions += 1
+            logger.info(f"Evicted voice profile from registry: {name}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return registry statistics"""
+        with self._lock:
+            return {
+                "profiles": list(self._profiles.keys()),
+                "size": len(self._profiles),
+                "max_profiles": self.max_profiles,
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import tempfile
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import torch
+from f5_tts.infer.utils_infer import preprocess_ref_audio_text
+from app.services.inference import TARGET_SAMPLE_RATE, load_reference_wave
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = ".reference"
+ARTIFACT_VERSION = 1
+
+# mel_spec(wave [1, samples]) -> mel [1, n_mels, frames]
+MelFn = Callable[[torch.Tensor], torch.Tensor]
+
+@dataclass
+class ReferenceQuality:
+    """Length and signal quality of a preprocessed reference sample"""
+    duration: float
+    snr_db: float
+    clipping: float
+
+    def passes(self, min_seconds: float, min_snr_db: float, max_clipping: float) -> bool:
+        return self.duration >= min_seconds and self.snr_db >= min_snr_db and self.clipping <= max_clipping
+
+@dataclass
+class ReferenceArtifact:
+    """Preprocessed reference sample as stored on disk"""
+    source: str
+    fingerprint: str
+    ref_text: str
+    ref_rms: float
+    wave: np.ndarray
+    mel: np.ndarray
+    quality: Optional[ReferenceQuality] = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.wave.nbytes + self.mel.nbytes
+
+def score_reference(wave: np.ndarray, sample_rate: int = TARGET_SAMPLE_RATE) -> ReferenceQuality:
+    """
+    Estimate the duration, signal-to-noise ratio and clipping of a reference wave
+
+    The SNR compares the energy of the loudest 20 ms frames (speech) with the
+    quietest ones (the noise floor in pauses). Clipping is the fraction of
+    samples on a flat top at the peak level, which is independent of the gain
+    applied during preprocessing.
+    """
+    wave = np.asarray(wave, dtype=np.float32).reshape(-1)
+    duration = len(wave) / sample_rate
+    frame = max(1, int(0.02 * sample_rate))
+    frames = len(wave) // frame
+    peak = float(np.max(np.abs(wave))) if len(wave) else 0.0
+    if frames < 2 or peak <= 0.0:
+        return ReferenceQuality(duration=duration, snr_db=0.0, clipping=0.0)
+
+    energy = np.mean(np.square(wave[:frames * frame].reshape(frames, frame)), axis=1) + 1e-10
+    snr_db = 10.0 * math.log10(float(np.percentile(energy, 95)) / float(np.percentile(energy, 10)))
+    at_peak = np.abs(wave[1:]) >= 0.99 * peak
+    flat = np.abs(np.diff(wave)) <= 1e-4 * peak
+    clipping = float(np.count_nonzero(at_peak & flat)) / len(wave)
+    return ReferenceQuality(duration=duration, snr_db=snr_db, clipping=clipping)
+
+def select_reference(
+    candidates: Sequence[Tuple[Any, ReferenceQuality]],
+    min_seconds: float,
+    min_snr_db: float,
+    max_clipping: float
+) -> Any:
+    """
+    Pick the shortest reference sample that meets the quality thresholds
+
+    The reference mel is part of every sampling step's input, so a shorter
+    reference makes every step cheaper. If no sample passes, the cleanest
+    sample long enough to condition on is used.
+
+    Args:
+        candidates: (sample, quality) pairs, at least one
+
+    Returns:
+        The chosen sample
+    """
+    passing = [c for c in candidates if c[1].passes(min_seconds, min_snr_db, max_clipping)]
+    if passing:
+        return min(passing, key=lambda c: c[1].duration)[0]
+    return min(
+        candidates,
+        key=lambda c: (c[1].duration < min_seconds, c[1].clipping > max_clipping, -c[1].snr_db)
+    )[0]
+
+def read_samples(voice_profile_dir: str) -> List[Tuple[str, str]]:
+    """
+    Read all (audio file, transcript) pairs from a profile's samples.txt
+
+    Raises:
+        FileNotFoundError: If samples.txt is missing
+        ValueError: If samples.txt has no valid sample
+    """
+    samples_file = os.path.join(voice_profile_dir, "samples.txt")
+    if not os.path.exists(samples_file):
+        raise FileNotFoundError(f"Voice profile samples not found: {samples_file}")
+
+    samples = []
+    with open(samples_file, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            parts = line.split('|')
+            if len(parts) != 2:
+                logger.warning(f"Invalid sample format in {samples_file}:{line_number}")
+                continue
+            audio_file, text = parts
+            # Get absolute path of the audio file
+            if not os.path.isabs(audio_file):
+                audio_file = os.path.join(voice_profile_dir, audio_file)
+            samples.append((audio_file, text))
+
+    if not samples:
+        raise ValueError("Invalid sample format in samples.txt")
+    return samples
+
+def source_fingerprint(audio_file: str, text: str) -> str:
+    """Identify a reference sample by its file version and transcript"""
+    stat = os.stat(audio_file)
+    payload = f"{ARTIFACT_VERSION}|{os.path.basename(audio_file)}|{stat.st_size}|{stat.st_mtime_ns}|{text}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def artifact_dir(voice_profile_dir: str, audio_file: str) -> str:
+    """Directory holding the artifact of one reference sample"""
+    # Named with the extension so ref.wav and ref.mp3 in one profile do not share it
+    return os.path.join(voice_profile_dir, ARTIFACT_DIR, os.path.basename(audio_file))
+
+def load_artifact(path: str, fingerprint: Optional[str] = None) -> Optional[ReferenceArtifact]:
+    """
+    Load a stored artifact, memory-mapping its arrays
+
+    Args:
+        path: Artifact directory
+        fingerprint: Expected source fingerprint, None to accept any
+
+    Returns:
+        The artifact, or None if it is missing or stale
+    """
+    meta_file = os.path.join(path, "meta.json")
+    try:
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") != ARTIFACT_VERSION:
+            return None
+        if fingerprint is not None and meta.get("fingerprint") != fingerprint:
+            return None
+        # Copy-on-write mappings: pages are shared with the page cache and
+        # the arrays stay writable for torch.from_numpy
+        wave = np.load(os.path.join(path, "wave.npy"), mmap_mode='c')
+        mel = np.load(os.path.join(path, "mel.npy"), mmap_mode='c')
+        # Artifacts stored before scoring was added are scored on load
+        quality = ReferenceQuality(**meta["quality"]) if "quality" in meta else score_reference(wave)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.debug(f"No usable reference artifact in {path}: {e}")
+        return None
+
+    return ReferenceArtifact(
+        source=meta["source"],
+        fingerprint=meta["fingerprint"],
+        ref_text=meta["ref_text"],
+        ref_rms=meta["ref_rms"],
+        wave=wave,
+        mel=mel,
+        quality=quality
+    )
+
+def fresh_artifact_meta(voice_profile_dir: str, audio_file: str, text: str) -> Optional[Dict[str, Any]]:
+    """Metadata of a sample's stored artifact if it matches the source, without loading the arrays"""
+    try:
+        fingerprint = source_fingerprint(audio_file, text)
+        with open(os.path.join(artifact_dir(voice_profile_dir, audio_file), "meta.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != ARTIFACT_VERSION or meta.get("fingerprint") != fingerprint:
+        return None
+    return meta
+
+def _save_array(path: str, array: np.ndarray):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+def build_artifact(voice_profile_dir: str, audio_file: str, text: str, mel_spec: MelFn) -> ReferenceArtifact:
+    """
+    Preprocess a reference sample and store the result next to the profile
+
+    Runs silence trimming, clipping, resampling and (for empty transcripts)
+    ASR once, then saves the processed wave, its mel spectrogram and the
+    normalized transcript.
+
+    Args:
+        voice_profile_dir: Directory of the voice profile
+        audio_file: Path of the source reference audio
+        text: Transcript from samples.txt
+        mel_spec: Mel spectrogram module used by the model
+    """
+    if not os.path.exists(audio_file):
+        raise FileNotFoundError(f"Audio file not found: {audio_file}")
+
+    fingerprint = source_fingerprint(audio_file, text)
+    logger.info(f"Preprocessing reference audio: {audio_file}")
+    processed_audio, ref_text = preprocess_ref_audio_text(audio_file, text)
+    ref_wave, ref_rms = load_reference_wave(processed_audio)
+    with torch.inference_mode():
+        mel = mel_spec(ref_wave)
+
+    wave = ref_wave.squeeze(0).cpu().numpy().astype(np.float32)
+    artifact = ReferenceArtifact(
+        source=os.path.basename(audio_file),
+        fingerprint=fingerprint,
+        ref_text=ref_text,
+        ref_rms=ref_rms,
+        wave=wave,
+        mel=mel.squeeze(0).permute(1, 0).cpu().numpy().astype(np.float32),
+        quality=score_reference(wave)
+    )
+
+    path = artifact_dir(voice_profile_dir, audio_file)
+    try:
+        os.makedirs(path, exist_ok=True)
+        _save_array(os.path.join(path, "wave.npy"), artifact.wave)
+        _save_array(os.path.join(path, "mel.npy"), artifact.mel)
+        # meta.json is written last and marks the artifact as complete
+        fd, tmp_path = tempfile.mkstemp(dir=path, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": ARTIFACT_VERSION,
+                "source": artifact.source,
+                "fingerprint": fingerprint,
+                "ref_text": ref_text,
+                "ref_rms": ref_rms,
+                "sample_rate": TARGET_SAMPLE_RATE,
+                "samples": int(artifact.wave.shape[-1]),
+                "frames": int(artifact.mel.shape[0]),
+                "quality": asdict(artifact.quality),
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(path, "meta.json"))
+        logger.info(f"Saved reference artifact to: {path}")
+    except OSError as e:
+        # Read-only profile directories still work, just without persistence
+        logger.warning(f"Failed to save reference artifact to {path}: {e}")
+
+    return artifact
+
+def load_or_build_artifact(voice_profile_dir: str, audio_file: str, text: str, mel_spec: MelFn) -> ReferenceArtifact:
+    """Load a fresh stored artifact for a sample, building it if needed"""
+    if not os.path.exists(audio_file):
+        raise FileNotFoundError(f"Audio file not found: {audio_file}")
+    fingerprint = source_fingerprint(audio_file, text)
+    artifact = load_artifact(artifact_dir(voice_profile_dir, audio_file), fingerprint)
+    if artifact is not None:
+        logger.info(f"Using stored reference artifact for: {audio_file}")
+        return artifact
+    return build_artifact(voice_profile_dir, audio_file, text, mel_spec)
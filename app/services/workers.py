@@ -0,0 +1,492 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cheap calls answered by a worker's receive loop even while it synthesizes
+CONTROL_METHODS = ("voices.stats", "voices.invalidate", "frontend.stats", "memory_usage")
+# Read-only calls that may load a voice profile; they run on their own thread so
+# request setup and cache lookups never queue behind running synthesis
+LOOKUP_METHODS = ("result_key", "split_text", "validate_text", "voice")
+
+def parse_device_specs(spec: str, count: int, cuda_devices: int = 0, cpu_cores: Optional[List[int]] = None) -> List[str]:
+    """
+    Resolve WORKER_DEVICES into one device spec per worker
+
+    Entries are comma-separated: "cuda:N", "cpu" or "cpu:<cores>", where
+    cores are ranges or single cores joined with "+" (e.g. "cpu:0-3+8").
+    Fewer entries than workers are repeated. "auto" spreads workers over the
+    visible GPUs, or splits the available CPU cores evenly between them.
+    """
+    if spec and spec != "auto":
+        entries = [entry.strip() for entry in spec.split(",") if entry.strip()]
+        return [entries[index % len(entries)] for index in range(count)]
+    if cuda_devices > 0:
+        return [f"cuda:{index % cuda_devices}" for index in range(count)]
+
+    cores = sorted(cpu_cores or [])
+    if len(cores) < count:
+        return ["cpu"] * count
+    per_worker = len(cores) // count
+    specs = []
+    for index in range(count):
+        chunk = cores[index * per_worker:(index + 1) * per_worker]
+        specs.append(f"cpu:{chunk[0]}-{chunk[-1]}" if chunk == list(range(chunk[0], chunk[-1] + 1))
+                     else "cpu:" + "+".join(str(core) for core in chunk))
+    return specs
+
+def _parse_cores(spec: str) -> List[int]:
+    cores = []
+    for part in spec.split("+"):
+        if "-" in part:
+            first, last = part.split("-")
+            cores.extend(range(int(first), int(last) + 1))
+        elif part:
+            cores.append(int(part))
+    return cores
+
+def _pin_device(device: str):
+    """Restrict this process to one GPU or a CPU core set (before torch initializes CUDA)"""
+    if device.startswith("cuda:"):
+        os.environ["CUDA_VISIBLE_DEVICES"] = device.split(":", 1)[1]
+        return None
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    if device.startswith("cpu:"):
+        cores = _parse_cores(device.split(":", 1)[1])
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)
+        # Keep intra-op threads within the pinned cores
+        os.environ["OMP_NUM_THREADS"] = str(len(cores))
+        return len(cores)
+    return None
+
+def _to_cpu(value):
+    if isinstance(value, list):
+        return [_to_cpu(item) for item in value]
+    if hasattr(value, "cpu") and hasattr(value, "device"):
+        return value.cpu()
+    return value
+
+def _worker_main(index: int, device: str, conn):
+    """Entry point of an inference worker process"""
+    # In-process mode inside the worker; settings are read on import
+    os.environ["WORKER_PROCESSES"] = "0"
+    threads = _pin_device(device)
+    logging.basicConfig(level=logging.INFO, format=f"[worker {index}] %(levelname)s:%(name)s:%(message)s")
+
+    import torch
+    if threads:
+        torch.set_num_threads(threads)
+    from app.core.config import settings
+    # Settings may already be loaded by the re-imported main module
+    settings.WORKER_PROCESSES = 0
+    from app.services.runtime import runtime
+
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    try:
+        service = runtime.get_service()
+        if settings.WARMUP_ENABLED:
+            runtime.warm_up(service)
+    except Exception as e:
+        logger.error(f"Inference worker {index} failed to start: {e}")
+        send(("failed", str(e)))
+        return
+
+    send(("ready", {
+        "pid": os.getpid(),
+        "device": device,
+        "sample_rate": service.sample_rate,
+        "default_params": service.default_params,
+        "max_batch_size": service.max_batch_size,
+        "voice_profiles_dir": service.voice_profiles_dir,
+        "model_fingerprint": service.model_fingerprint,
+        "execution": service.execution,
+        "load_timings": service.load_timings,
+        "vocab_char_map": service.frontend.vocab_char_map,
+        "expand_text": service.frontend.expand,
+    }))
+
+    def call(method: str, args, kwargs):
+        if method == "voice":
+            # Profiles cross the pipe without their (large) arrays
+            return replace(service.voices.get(*args), ref_wave=None, ref_mel=None)
+        if method == "voices.stats":
+            return service.voices.stats()
+        if method == "voices.invalidate":
+            return service.voices.invalidate(*args)
+        if method == "frontend.stats":
+            return service.frontend.stats()
+        # Device tensors (sampled mels) are sent as CPU tensors
+        return _to_cpu(getattr(service, method)(*args, **kwargs))
+
+    def run(request_id, method, args, kwargs):
+        try:
+            result = call(method, args, kwargs)
+        except Exception as e:
+            send((request_id, False, e))
+            return
+        send((request_id, True, result))
+
+    # Sampling, decoding and lookups run on their own threads; control calls are answered inline
+    model_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model")
+    vocoder_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vocoder")
+    lookup_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lookup")
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        request_id, method, args, kwargs = message
+        if method in CONTROL_METHODS:
+            run(request_id, method, args, kwargs)
+        elif method in LOOKUP_METHODS:
+            lookup_thread.submit(run, request_id, method, args, kwargs)
+        elif method == "vocode":
+            vocoder_thread.submit(run, request_id, method, args, kwargs)
+        else:
+            model_thread.submit(run, request_id, method, args, kwargs)
+    model_thread.shutdown(wait=False, cancel_futures=True)
+    vocoder_thread.shutdown(wait=False, cancel_futures=True)
+    lookup_thread.shutdown(wait=False, cancel_futures=True)
+
+class WorkerDiedError(RuntimeError):
+    """Raised for calls pending on a worker process that exited"""
+
+class _Worker:
+    def __init__(self, index: int, device: str):
+        self.index = index
+        self.device = device
+        self.process = None
+        self.conn = None
+        self.info: Dict[str, Any] = {}
+        self.alive = False
+        self.inflight = 0
+        self.calls = 0
+        self.restarts = 0
+        self.pending: Dict[int, Future] = {}
+        self.send_lock = threading.Lock()
+
+class WorkerPool:
+    def __init__(
+        self,
+        devices: List[str],
+        affinity_slack: int = 2,
+        start_timeout: float = 600.0,
+        restart_delay: float = 5.0
+    ):
+        """
+        Supervisor of inference worker processes
+
+        Each worker loads its own model on one device (or CPU core set) and
+        serves calls over a pipe. Calls naming a voice profile go to the
+        worker chosen for that voice by rendezvous hashing, so each voice
+        stays warm in one worker's cache; if that worker has more than
+        affinity_slack calls in flight beyond the least loaded worker, the
+        call spills over to the least loaded one. Workers that exit are
+        restarted after restart_delay seconds.
+
+        Args:
+            devices: Device spec per worker ("cuda:N", "cpu" or "cpu:A-B")
+            affinity_slack: Extra in-flight calls tolerated before spilling
+            start_timeout: How long to wait for workers to load
+            restart_delay: Delay before restarting a worker that exited
+        """
+        self.affinity_slack = max(0, affinity_slack)
+        self.start_timeout = start_timeout
+        self.restart_delay = restart_delay
+        self.workers = [_Worker(index, device) for index, device in enumerate(devices)]
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._stopping = False
+
+        self.affinity_hits = 0
+        self.spills = 0
+
+    def start(self):
+        """Start all workers and wait until they have loaded the model"""
+        threads = [threading.Thread(target=self._spawn, args=(worker,)) for worker in self.workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        failed = [worker.index for worker in self.workers if not worker.alive]
+        if failed:
+            self.stop()
+            raise RuntimeError(f"Inference workers failed to start: {failed}")
+
+    def _spawn(self, worker: _Worker):
+        """Start one worker process and wait for its ready message"""
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker.index, worker.device, child_conn),
+            name=f"inference-worker-{worker.index}",
+            daemon=True
+        )
+        logger.info(f"Starting inference worker {worker.index} on {worker.device}")
+        process.start()
+        child_conn.close()
+        worker.process = process
+        worker.conn = parent_conn
+
+        if not parent_conn.poll(self.start_timeout):
+            logger.error(f"Inference worker {worker.index} did not start within {self.start_timeout:.0f}s")
+            process.terminate()
+            return
+        try:
+            status, info = parent_conn.recv()
+        except (EOFError, OSError):
+            status, info = "failed", "exited during startup"
+        if status != "ready":
+            logger.error(f"Inference worker {worker.index} failed: {info}")
+            process.join(timeout=5)
+            return
+
+        worker.info = info
+        worker.alive = True
+        logger.info(f"Inference worker {worker.index} ready (pid {info['pid']}, {worker.device})")
+        threading.Thread(
+            target=self._read, args=(worker,), name=f"worker-reader-{worker.index}", daemon=True
+        ).start()
+
+    def _read(self, worker: _Worker):
+        """Resolve pending calls from a worker's replies until it exits"""
+        conn = worker.conn
+        while True:
+            try:
+                request_id, ok, result = conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = worker.pending.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+
+        with self._lock:
+            worker.alive = False
+            pending, worker.pending = worker.pending, {}
+            worker.inflight = 0
+        for future in pending.values():
+            future.set_exception(WorkerDiedError(f"Inference worker {worker.index} exited"))
+        if not self._stopping:
+            logger.error(f"Inference worker {worker.index} exited, restarting in {self.restart_delay:.0f}s")
+            threading.Thread(target=self._restart, args=(worker,), daemon=True).start()
+
+    def _restart(self, worker: _Worker):
+        time.sleep(self.restart_delay)
+        if self._stopping:
+            return
+        worker.restarts += 1
+        self._spawn(worker)
+        if not worker.alive and not self._stopping:
+            threading.Thread(target=self._restart, args=(worker,), daemon=True).start()
+
+    def info(self) -> Dict[str, Any]:
+        """Startup information reported by the first live worker"""
+        for worker in self.workers:
+            if worker.info:
+                return worker.info
+        return {}
+
+    @staticmethod
+    def _score(voice_profile: str, index: int) -> int:
+        digest = hashlib.sha1(f"{voice_profile}:{index}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def _choose(self, voice_profile: Optional[str]) -> _Worker:
+        """Pick a worker by voice affinity and load (lock held)"""
+        alive = [worker for worker in self.workers if worker.alive]
+        if not alive:
+            raise RuntimeError("No inference workers available")
+        least_loaded = min(alive, key=lambda worker: worker.inflight)
+        if voice_profile is None:
+            return least_loaded
+        preferred = max(alive, key=lambda worker: self._score(voice_profile, worker.index))
+        if preferred.inflight - least_loaded.inflight > self.affinity_slack:
+            self.spills += 1
+            return least_loaded
+        self.affinity_hits += 1
+        return preferred
+
+    def call(self, voice_profile: Optional[str], method: str, *args, **kwargs) -> Any:
+        """Run a service method on a worker and wait for the result"""
+        future = Future()
+        with self._lock:
+            worker = self._choose(voice_profile)
+            self._next_id += 1
+            request_id = self._next_id
+            worker.pending[request_id] = future
+            worker.inflight += 1
+            worker.calls += 1
+        try:
+            with worker.send_lock:
+                worker.conn.send((request_id, method, args, kwargs))
+            return future.result()
+        finally:
+            with self._lock:
+                worker.pending.pop(request_id, None)
+                worker.inflight = max(0, worker.inflight - 1)
+
+    def call_all(self, method: str, *args, **kwargs) -> List[Tuple[int, Any]]:
+        """Run a control method on every live worker"""
+        results = []
+        for worker in list(self.workers):
+            if not worker.alive:
+                continue
+            future = Future()
+            with self._lock:
+                self._next_id += 1
+                request_id = self._next_id
+                worker.pending[request_id] = future
+            try:
+                with worker.send_lock:
+                    worker.conn.send((request_id, method, args, kwargs))
+                results.append((worker.index, future.result(timeout=10)))
+            except Exception as e:
+                logger.warning(f"Inference worker {worker.index} did not answer {method}: {e}")
+            finally:
+                with self._lock:
+                    worker.pending.pop(request_id, None)
+        return results
+
+    def stop(self, timeout: float = 10.0):
+        """Stop all workers"""
+        self._stopping = True
+        for worker in self.workers:
+            if worker.conn is None:
+                continue
+            try:
+                with worker.send_lock:
+                    worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            worker.process.join(timeout=timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": [
+                    {
+                        "index": worker.index,
+                        "device": worker.device,
+                        "pid": worker.process.pid if worker.process is not None else None,
+                        "alive": worker.alive,
+                        "inflight": worker.inflight,
+                        "calls": worker.calls,
+                        "restarts": worker.restarts,
+                    }
+                    for worker in self.workers
+                ],
+                "affinity_hits": self.affinity_hits,
+                "spills": self.spills,
+            }
+
+class _ShardedVoices:
+    """Voice registry view over all workers"""
+
+    def __init__(self, pool: WorkerPool):
+        self._pool = pool
+
+    def get(self, name: str):
+        return self._pool.call(name, "voice", name)
+
+    def invalidate(self, name: str) -> bool:
+        return any(dropped for _, dropped in self._pool.call_all("voices.invalidate", name))
+
+    def stats(self) -> Dict[str, Any]:
+        totals = {"profiles": [], "size": 0, "bytes": 0, "hits": 0, "misses": 0, "evictions": 0}
+        for _, stats in self._pool.call_all("voices.stats"):
+            totals["profiles"].extend(stats["profiles"])
+            for field in ("size", "bytes", "hits", "misses", "evictions"):
+                totals[field] += stats[field]
+        return totals
+
+class ShardedService:
+    def __init__(self, pool: WorkerPool):
+        """
+        F5TTSService interface backed by a pool of worker processes
+
+        Every call naming a voice profile is routed to a worker by voice
+        affinity and load; results come back over the worker's pipe.
+
+        Args:
+            pool: Started worker pool
+        """
+        self.pool = pool
+        info = pool.info()
+        self.sample_rate = info["sample_rate"]
+        self.default_params = info["default_params"]
+        self.max_batch_size = info["max_batch_size"]
+        self.voice_profiles_dir = info["voice_profiles_dir"]
+        self.model_fingerprint = info["model_fingerprint"]
+        self.execution = info["execution"]
+        self.load_timings = info["load_timings"]
+        self.voices = _ShardedVoices(pool)
+        # Text is validated here, before a request is routed to a worker
+        from app.services.text_frontend import TextFrontend
+        self.frontend = TextFrontend(info["vocab_char_map"], cache_size=0, expand=info["expand_text"])
+
+    def result_key(self, text, voice_profile, params=None, **output) -> str:
+        return self.pool.call(voice_profile, "result_key", text, voice_profile, params, **output)
+
+    def split_text(self, text, voice_profile, max_chars=None, speed=1.0):
+        return self.pool.call(voice_profile, "split_text", text, voice_profile, max_chars, speed)
+
+    def validate_text(self, text):
+        self.frontend.validate(text)
+
+    def prepare_voice(self, voice_profile_dir):
+        # Workers share the filesystem, so one of them builds the artifacts for all
+        return self.pool.call(None, "prepare_voice", voice_profile_dir)
+
+    def sample(self, texts, voice_profile, params=None):
+        return self.pool.call(voice_profile, "sample", texts, voice_profile, params)
+
+    def sample_batch(self, texts, voice_profile, params=None):
+        return self.pool.call(voice_profile, "sample_batch", texts, voice_profile, params)
+
+    def vocode(self, mels, voice_profile):
+        return self.pool.call(voice_profile, "vocode", mels, voice_profile)
+
+    def generate(self, texts, voice_profile, params=None):
+        return self.pool.call(voice_profile, "generate", texts, voice_profile, params)
+
+    def synthesize_batch(self, texts, voice_profile, params=None):
+        return self.pool.call(voice_profile, "synthesize_batch", texts, voice_profile, params)
+
+    def synthesize(self, text, voice_profile, params=None):
+        return self.pool.call(voice_profile, "synthesize", text, voice_profile, params)
+
+    def memory_usage(self) -> Dict[str, int]:
+        usage = {}
+        for index, worker_usage in self.pool.call_all("memory_usage"):
+            for component, nbytes in worker_usage.items():
+                usage[f"worker{index}_{component}"] = nbytes
+        return usage
+
+    def close(self):
+        self.pool.stop()
@@ -17,7 +17,6 @@ def main():
         "app.main:app",
         host="0.0.0.0",
         port=settings.PORT,
-        reload=True,
         log_level="info"
     )
 
@@ -0,0 +1,277 @@
+import os
+import sys
+import io
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+from datetime import datetime
+import httpx
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_token import generate_test_token
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "She sells sea shells by the sea shore, and the shells she sells are surely seashells.",
+    "A journey of a thousand miles begins with a single step.",
+    "Peter Piper picked a peck of pickled peppers.",
+    "It was the best of times, it was the worst of times.",
+    "How much wood would a woodchuck chuck if a woodchuck could chuck wood?",
+]
+
+# Approximate text length in characters per named size
+TEXT_LENGTHS = {"short": 40, "medium": 200, "long": 800}
+
+def make_text(length: int) -> str:
+    """Build a text of roughly length characters from whole sentences"""
+    text = ""
+    index = 0
+    while len(text) < length:
+        sentence = SENTENCES[index % len(SENTENCES)]
+        if text and len(text) + len(sentence) + 1 > length:
+            break
+        text = f"{text} {sentence}".strip()
+        index += 1
+    return text
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+def audio_seconds(body: bytes, fmt: str, sample_rate: int) -> float:
+    if fmt == "pcm":
+        return len(body) / 2 / sample_rate
+    info = sf.info(io.BytesIO(body))
+    return info.frames / info.samplerate
+
+def server_env(args) -> dict:
+    """Environment for the app under test"""
+    env = {
+        "RESULT_CACHE_ENABLED": "true" if args.cache else "false",
+        "EAGER_LOAD": "true",
+        "WARMUP_VOICE": args.voice,
+    }
+    if not args.real:
+        env.update({
+            "TTS_BACKEND": "stub",
+            "STUB_BATCH_LATENCY_MS": str(args.stub_batch_ms),
+            "STUB_STEP_LATENCY_MS": str(args.stub_step_ms),
+            "STUB_ITEM_LATENCY_MS": str(args.stub_item_ms),
+        })
+    return env
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.get("/ready")
+            if response.status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise TimeoutError(f"Server not ready after {timeout:.0f}s")
+
+async def timed_request(client: httpx.AsyncClient, path: str, payload: dict, headers: dict, args) -> dict:
+    """Send one request and time its first byte and completion"""
+    started = time.perf_counter()
+    ttfb = None
+    body = bytearray()
+    try:
+        async with client.stream("POST", path, json=payload, headers=headers) as response:
+            async for chunk in response.aiter_bytes():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - started
+                body.extend(chunk)
+            status = response.status_code
+    except httpx.HTTPError as e:
+        return {"status": type(e).__name__, "latency": time.perf_counter() - started}
+    latency = time.perf_counter() - started
+
+    result = {"status": status, "latency": latency, "ttfb": ttfb if ttfb is not None else latency}
+    if status == 200:
+        result["audio_seconds"] = audio_seconds(bytes(body), payload["format"], args.sample_rate)
+    return result
+
+async def run_level(client: httpx.AsyncClient, headers: dict, text: str, concurrency: int, args) -> dict:
+    """Run args.requests requests with at most concurrency in flight"""
+    path = f"/api/v1/tts/{args.endpoint}"
+    payload = {
+        "text": text,
+        "voice_profile": args.voice,
+        "format": "pcm" if args.endpoint == "stream" else "wav",
+        "sample_rate": args.sample_rate,
+    }
+    if args.preset:
+        payload["preset"] = args.preset
+
+    queue = asyncio.Queue()
+    for index in range(args.requests):
+        queue.put_nowait(index)
+    results = []
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            results.append(await timed_request(client, path, payload, headers, args))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    ok = [r for r in results if r["status"] == 200]
+    latencies = [r["latency"] for r in ok]
+    ttfbs = [r["ttfb"] for r in ok]
+    total_audio = sum(r["audio_seconds"] for r in ok)
+    statuses = {}
+    for r in results:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+
+    return {
+        "endpoint": args.endpoint,
+        "text_chars": len(text),
+        "concurrency": concurrency,
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "statuses": statuses,
+        "wall_seconds": wall,
+        "throughput_rps": len(ok) / wall if wall else 0.0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "latency_mean": float(np.mean(latencies)) if latencies else None,
+        "ttfb_p50": percentile(ttfbs, 50),
+        "ttfb_p95": percentile(ttfbs, 95),
+        "audio_seconds": total_audio,
+        "rtf": total_audio / sum(latencies) if latencies else None,
+        "audio_seconds_per_second": total_audio / wall if wall else 0.0,
+    }
+
+async def run_suite(client: httpx.AsyncClient, args) -> list:
+    headers = {"Authorization": f"Bearer {generate_test_token()}"}
+    await wait_ready(client, args.ready_timeout)
+
+    results = []
+    for length_name in args.lengths:
+        text = make_text(TEXT_LENGTHS[length_name])
+        for concurrency in args.concurrency:
+            # Untimed warm-up so the first level does not pay one-off costs
+            await timed_request(client, f"/api/v1/tts/{args.endpoint}", {
+                "text": text, "voice_profile": args.voice, "format": "wav", "sample_rate": args.sample_rate
+            }, headers, args)
+            result = await run_level(client, headers, text, concurrency, args)
+            result["length"] = length_name
+            results.append(result)
+            print(
+                f"{args.endpoint:<10} {length_name:<7} c={concurrency:<3} "
+                f"p50={result['latency_p50'] or 0:.3f}s p95={result['latency_p95'] or 0:.3f}s "
+                f"p99={result['latency_p99'] or 0:.3f}s ttfb50={result['ttfb_p50'] or 0:.3f}s "
+                f"rps={result['throughput_rps']:.2f} rtf={result['rtf'] or 0:.2f} errors={result['errors']}"
+            )
+    return results
+
+async def run_inprocess(args) -> list:
+    os.environ.update(server_env(args))
+    # Settings are read at import time, so import the app after the environment is set
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=args.timeout) as client:
+            return await run_suite(client, args)
+
+async def run_uvicorn(args) -> list:
+    env = dict(os.environ, **server_env(args))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning"],
+        cwd=ROOT_DIR,
+        env=env
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=args.timeout) as client:
+            return await run_suite(client, args)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+async def run_url(args) -> list:
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        return await run_suite(client, args)
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(results: list, baseline_file: str):
+    """Print relative changes against a previous run"""
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(r["endpoint"], r["length"], r["concurrency"]): r for r in baseline["results"]}
+
+    print(f"\nComparison with {baseline_file} ({baseline.get('commit', 'unknown')}):")
+    for result in results:
+        old = previous.get((result["endpoint"], result["length"], result["concurrency"]))
+        if old is None:
+            continue
+        changes = []
+        for field in ("latency_p50", "latency_p95", "latency_p99", "ttfb_p50", "throughput_rps", "rtf"):
+            if result.get(field) and old.get(field):
+                changes.append(f"{field}={(result[field] / old[field] - 1) * 100:+.1f}%")
+        print(f"{result['endpoint']:<10} {result['length']:<7} c={result['concurrency']:<3} " + " ".join(changes))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the TTS API")
+    parser.add_argument("--target", choices=["inprocess", "uvicorn", "url"], default="inprocess",
+                        help="Drive the app in-process, through a local uvicorn server or an existing URL")
+    parser.add_argument("--url", default="http://localhost:8081", help="Server URL for --target url")
+    parser.add_argument("--port", type=int, default=8089, help="Port of the uvicorn server for --target uvicorn")
+    parser.add_argument("--endpoint", choices=["synthesize", "stream"], default="synthesize")
+    parser.add_argument("--concurrency", type=lambda s: [int(c) for c in s.split(",")], default=[1, 4, 16],
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--lengths", type=lambda s: s.split(","), default=["short", "medium", "long"],
+                        help=f"Comma-separated text lengths from {', '.join(TEXT_LENGTHS)}")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per concurrency level")
+    parser.add_argument("--voice", default="bane", help="Voice profile to synthesize with")
+    parser.add_argument("--preset", default=None, help="Inference preset")
+    parser.add_argument("--sample-rate", type=int, default=24000, help="Requested output sample rate")
+    parser.add_argument("--real", action="store_true", help="Use the real model instead of the stub")
+    parser.add_argument("--cache", action="store_true", help="Keep the result cache enabled")
+    parser.add_argument("--stub-batch-ms", type=float, default=50.0, help="Stub latency per batch")
+    parser.add_argument("--stub-step-ms", type=float, default=2.0, help="Stub latency per sampling step")
+    parser.add_argument("--stub-item-ms", type=float, default=5.0, help="Stub latency per chunk in a batch")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout in seconds")
+    parser.add_argument("--ready-timeout", type=float, default=600.0, help="How long to wait for /ready")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare with results from an earlier run")
+    args = parser.parse_args()
+
+    unknown = [length for length in args.lengths if length not in TEXT_LENGTHS]
+    if unknown:
+        parser.error(f"Unknown text lengths: {', '.join(unknown)}")
+
+    runner = {"inprocess": run_inprocess, "uvicorn": run_uvicorn, "url": run_url}[args.target]
+    results = asyncio.run(runner(args))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "target": args.target,
+        "backend": "f5" if args.real else "stub",
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved to: {args.output}")
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import time
+import argparse
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.acceleration import ExecutionMode, compare_outputs
+from app.services.inference import InferenceParams
+from app.services.sampling import AdaptiveSampling
+from app.services.tts_service import F5TTSService
+
+# Mostly short, simple utterances like the bulk of the traffic, plus longer sentences
+TEXTS = [
+    "Hello there.",
+    "Your order has shipped.",
+    "Thanks for calling, how can I help you today?",
+    "Please hold while I transfer your call.",
+    "The quick brown fox jumps over the lazy dog.",
+    "She sells sea shells by the sea shore, and the shells she sells are surely seashells.",
+    "A journey of a thousand miles begins with a single step, and it is often the hardest one to take.",
+]
+
+def sample_timed(service: F5TTSService, text: str, voice: str, params: InferenceParams, seed: int):
+    # Same initial noise for the full schedule and every tolerance
+    torch.manual_seed(seed)
+    started = time.perf_counter()
+    mels, report = service.sample_with_report([text], voice, params)
+    return mels, report, time.perf_counter() - started
+
+def calibrate(service: F5TTSService, texts, control: AdaptiveSampling, baselines, args) -> dict:
+    """Sample the texts adaptively and compare each result with its full-schedule baseline"""
+    service.adaptive = control
+    params = InferenceParams(nfe_step=args.nfe_step, adaptive=True)
+    results = []
+    for text, (baseline, baseline_seconds) in zip(texts, baselines):
+        mels, report, seconds = sample_timed(service, text, args.voice, params, args.seed)
+        results.append({
+            "text": text,
+            **report.to_dict(),
+            "wall_speedup": round(baseline_seconds / seconds, 3),
+            "relative_error": round(compare_outputs(baseline, mels)["relative_error"], 5),
+        })
+    return {
+        "control": control.to_dict(),
+        "texts": results,
+        "mean_speedup": round(sum(r["speedup"] for r in results) / len(results), 3),
+        "mean_wall_speedup": round(sum(r["wall_speedup"] for r in results) / len(results), 3),
+        "max_error": max(r["relative_error"] for r in results),
+        "passed": max(r["relative_error"] for r in results) <= args.max_error,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check adaptive sampling against the full step schedule")
+    parser.add_argument("--voice", default="bane", help="Voice profile to synthesize with")
+    parser.add_argument("--texts", help="File with one calibration text per line (default: built-in set)")
+    parser.add_argument("--nfe-step", type=int, default=32, help="Steps of the full schedule")
+    parser.add_argument("--tolerances", default="0.02,0.05,0.1",
+                        help="Comma-separated tolerances to try besides ADAPTIVE_TOLERANCE")
+    parser.add_argument("--min-steps", type=int, default=settings.ADAPTIVE_MIN_STEPS)
+    parser.add_argument("--max-stride", type=int, default=settings.ADAPTIVE_MAX_STRIDE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-error", type=float, default=0.05,
+                        help="Largest accepted relative L2 error of a mel against the full schedule")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    texts = TEXTS
+    if args.texts:
+        with open(args.texts, "r", encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    service = F5TTSService(
+        model_dir=settings.MODEL_DIR,
+        voice_profiles_dir=settings.VOICE_PROFILES_DIR,
+        vocoder_dir=settings.VOCODER_DIR,
+        execution=ExecutionMode(
+            dtype=settings.INFERENCE_DTYPE,
+            quantize=settings.INFERENCE_QUANTIZE,
+            threads=settings.CPU_THREADS
+        )
+    )
+    # One untimed pass so lazy initialization is excluded
+    service.sample(texts[:1], args.voice, InferenceParams(nfe_step=args.nfe_step))
+    full = InferenceParams(nfe_step=args.nfe_step)
+    baselines = []
+    for text in texts:
+        mels, _, seconds = sample_timed(service, text, args.voice, full, args.seed)
+        baselines.append((mels, seconds))
+
+    tolerances = sorted({settings.ADAPTIVE_TOLERANCE, *(float(t) for t in args.tolerances.split(",") if t)})
+    runs = [
+        calibrate(service, texts, AdaptiveSampling(tolerance, args.min_steps, args.max_stride), baselines, args)
+        for tolerance in tolerances
+    ]
+    passing = [run["control"]["tolerance"] for run in runs if run["passed"]]
+    configured = next(run for run in runs if run["control"]["tolerance"] == settings.ADAPTIVE_TOLERANCE)
+    report = {
+        "nfe_step": args.nfe_step,
+        "max_error": args.max_error,
+        "runs": runs,
+        # Largest tolerance whose results all stay within max_error
+        "recommended_tolerance": max(passing) if passing else None,
+        "passed": configured["passed"],
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if report["passed"] else 1)
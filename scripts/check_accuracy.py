@@ -0,0 +1,103 @@
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.acceleration import ExecutionMode, compare_outputs
+from app.services.inference import InferenceParams
+from app.services.tts_service import F5TTSService
+
+TEXTS = [
+    "The quick brown fox jumps over the lazy dog.",
+    "She sells sea shells by the sea shore, and the shells she sells are surely seashells.",
+    "A journey of a thousand miles begins with a single step, and it is often the hardest one to take.",
+]
+
+def run_mode(mode: ExecutionMode, args) -> dict:
+    """Load the model in one execution mode and synthesize the test texts"""
+    started = time.perf_counter()
+    service = F5TTSService(
+        model_dir=settings.MODEL_DIR,
+        voice_profiles_dir=settings.VOICE_PROFILES_DIR,
+        vocoder_dir=settings.VOCODER_DIR,
+        execution=mode
+    )
+    load_seconds = time.perf_counter() - started
+    params = InferenceParams(nfe_step=args.nfe_step)
+
+    # One untimed pass so compilation and lazy initialization are excluded
+    torch.manual_seed(args.seed)
+    service.generate(TEXTS[:1], args.voice, params)
+
+    mels, waves, seconds = [], [], 0.0
+    for text in TEXTS:
+        # Same initial noise for every mode
+        torch.manual_seed(args.seed)
+        started = time.perf_counter()
+        mel = service.sample([text], args.voice, params)
+        wave = service.vocode(mel, args.voice)
+        seconds += time.perf_counter() - started
+        mels.extend(mel)
+        waves.extend(torch.from_numpy(w) for w in wave)
+
+    audio_seconds = sum(len(wave) for wave in waves) / service.sample_rate
+    result = {
+        "mode": service.execution.to_dict(),
+        "load_seconds": round(load_seconds, 2),
+        "synthesis_seconds": round(seconds, 3),
+        "real_time_factor": round(seconds / audio_seconds, 4),
+        "memory": service.memory_usage(),
+        "mels": mels,
+        "waves": waves,
+    }
+    del service
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check an execution mode against the fp32 baseline")
+    parser.add_argument("--voice", default="bane", help="Voice profile to synthesize with")
+    parser.add_argument("--dtype", choices=["fp32", "bf16", "fp16"], default="fp32")
+    parser.add_argument("--compile", action="store_true", help="Compile the transformer and vocoder")
+    parser.add_argument("--quantize", choices=["none", "int8"], default="none")
+    parser.add_argument("--threads", type=int, default=0, help="CPU intra-op threads, 0 for the default")
+    parser.add_argument("--nfe-step", type=int, default=32, help="Sampling steps")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-error", type=float, default=0.1,
+                        help="Largest accepted relative L2 error of the generated mels")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    baseline = run_mode(ExecutionMode(threads=args.threads), args)
+    candidate = run_mode(
+        ExecutionMode(dtype=args.dtype, compile=args.compile, quantize=args.quantize, threads=args.threads),
+        args
+    )
+
+    mel_metrics = compare_outputs(baseline["mels"], candidate["mels"])
+    # Waves can differ in length by a frame if durations round differently
+    wave_metrics = compare_outputs(
+        [b[:min(len(b), len(c))] for b, c in zip(baseline["waves"], candidate["waves"])],
+        [c[:min(len(b), len(c))] for b, c in zip(baseline["waves"], candidate["waves"])]
+    )
+    report = {
+        "baseline": {k: v for k, v in baseline.items() if k not in ("mels", "waves")},
+        "candidate": {k: v for k, v in candidate.items() if k not in ("mels", "waves")},
+        "mel": mel_metrics,
+        "wave": wave_metrics,
+        "speedup": round(baseline["synthesis_seconds"] / candidate["synthesis_seconds"], 2),
+        "passed": mel_metrics["relative_error"] <= args.max_error,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if report["passed"] else 1)
@@ -0,0 +1,90 @@
+import os
+import sys
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from safetensors.torch import save_file
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DTYPES = {"fp32": torch.float32, "fp16": torch.float16, "bf16": torch.bfloat16}
+
+def inference_state(checkpoint: dict, ema: bool = False) -> dict:
+    """
+    Extract the model weights from a training checkpoint
+
+    Optimizer, scheduler and step counters are dropped. F5-TTS training
+    checkpoints hold the EMA weights as "ema_model_state_dict" with an
+    "ema_model." prefix and bookkeeping entries of their own.
+    """
+    if ema:
+        if "ema_model_state_dict" not in checkpoint:
+            raise ValueError("Checkpoint has no EMA weights")
+        return {
+            key[len("ema_model."):]: value
+            for key, value in checkpoint["ema_model_state_dict"].items()
+            if key.startswith("ema_model.")
+        }
+    if "model_state_dict" in checkpoint:
+        return checkpoint["model_state_dict"]
+    # Already a plain state dict
+    return {key: value for key, value in checkpoint.items() if isinstance(value, torch.Tensor)}
+
+def convert_checkpoint(source: str, output: str, dtype: str = "fp32", ema: bool = False):
+    """Convert a .pt checkpoint to a safetensors file holding only the inference weights"""
+    logger.info(f"Loading checkpoint: {source}")
+    try:
+        checkpoint = torch.load(source, map_location="cpu", mmap=True, weights_only=True)
+    except Exception as e:
+        logger.warning(f"Memory-mapped load failed, falling back to a full load: {e}")
+        checkpoint = torch.load(source, map_location="cpu")
+
+    skipped = [key for key in checkpoint if key not in ("model_state_dict", "ema_model_state_dict")]
+    state = inference_state(checkpoint, ema)
+    tensors, storages = {}, set()
+    for key, value in state.items():
+        if value.is_floating_point():
+            value = value.to(DTYPES[dtype])
+        value = value.contiguous()
+        # safetensors refuses tensors sharing memory, so shared ones are stored as copies
+        if value.data_ptr() in storages:
+            value = value.clone()
+        storages.add(value.data_ptr())
+        tensors[key] = value
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp_path = f"{output}.tmp"
+    save_file(tensors, tmp_path, metadata={
+        "format": "pt",
+        "source": os.path.basename(source),
+        "dtype": dtype,
+        "weights": "ema" if ema else "model",
+    })
+    os.replace(tmp_path, output)
+
+    logger.info(f"Dropped checkpoint entries: {', '.join(skipped) or 'none'}")
+    logger.info(
+        f"Wrote {len(tensors)} tensors to {output}: "
+        f"{os.path.getsize(source) / 1e6:.0f} MB -> {os.path.getsize(output) / 1e6:.0f} MB"
+    )
+
+if __name__ == "__main__":
+    default_source = os.path.join(settings.MODEL_DIR, "final_finetuned_model.pt")
+    parser = argparse.ArgumentParser(description="Convert a training checkpoint to an inference-only safetensors file")
+    parser.add_argument("source", nargs="?", default=default_source, help="Checkpoint to convert")
+    parser.add_argument("--output", help="Output file (default: the source with a .safetensors extension)")
+    parser.add_argument("--dtype", choices=sorted(DTYPES), default="fp32", help="Precision of the stored weights")
+    parser.add_argument("--ema", action="store_true", help="Store the EMA weights instead of the model weights")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.source)[0] + ".safetensors"
+    try:
+        convert_checkpoint(args.source, output, args.dtype, args.ema)
+    except Exception as e:
+        logger.error(f"Failed to convert checkpoint: {e}")
+        sys.exit(1)
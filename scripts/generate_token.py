@@ -1,8 +1,9 @@
 import jwt
+import argparse
 from datetime import datetime, timedelta
 import os
 
-def generate_test_token():
+def generate_test_token(tier=None, voices=None, voice_admin=False):
     """Generate a test JWT token"""
     # Use the same secret key as in settings
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
@@ -15,14 +16,28 @@ def generate_test_token():
         "iat": datetime.utcnow(),  # issued at
         "scope": "tts"  # scope of access
     }
+    if voice_admin:
+        # may create, replace and delete voice profiles
+        payload["scope"] += " " + os.getenv("VOICE_ADMIN_SCOPE", "voices:write")
+    if tier:
+        payload["tier"] = tier  # scheduling tier
+    if voices:
+        payload["voices"] = list(voices)  # allowed voice profiles
     
     # Generate token
     token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
     return token
 
 if __name__ == "__main__":
-    token = generate_test_token()
+    parser = argparse.ArgumentParser(description="Generate a test JWT token")
+    parser.add_argument("--tier", help="Rate tier claim, e.g. premium, standard or free")
+    parser.add_argument("--voices", nargs="+", help="Voice profiles the token may use (default: all)")
+    parser.add_argument("--voice-admin", action="store_true",
+                        help="Allow the token to create, replace and delete voice profiles")
+    args = parser.parse_args()
+    
+    token = generate_test_token(tier=args.tier, voices=args.voices, voice_admin=args.voice_admin)
     print("\nGenerated test token:")
     print(token)
     print("\nUse this token in the Authorization header as:")
-    print(f"Bearer {token}") 
\ No newline at end of file
+    print(f"Bearer {token}") 
@@ -0,0 +1,56 @@
+import os
+import sys
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from f5_tts.model.modules import MelSpec
+from app.core.config import settings
+from app.services.inference import MEL_SPEC_KWARGS
+from app.services.voice_store import build_artifact, load_or_build_artifact, read_samples
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def precompute_voices(profiles_dir: str, profiles=None, force: bool = False):
+    """Precompute reference artifacts for every sample of the given voice profiles"""
+    if not os.path.exists(profiles_dir):
+        logger.error(f"Voice profiles directory not found: {profiles_dir}")
+        return False
+        
+    mel_spec = MelSpec(**MEL_SPEC_KWARGS)
+    profiles = profiles or sorted(
+        d for d in os.listdir(profiles_dir)
+        if os.path.isdir(os.path.join(profiles_dir, d)) and not d.startswith('.')
+    )
+    
+    ok = True
+    for profile in profiles:
+        profile_dir = os.path.join(profiles_dir, profile)
+        try:
+            for audio_file, text in read_samples(profile_dir):
+                if force:
+                    artifact = build_artifact(profile_dir, audio_file, text, mel_spec)
+                else:
+                    artifact = load_or_build_artifact(profile_dir, audio_file, text, mel_spec)
+                logger.info(
+                    f"{profile}: {artifact.source} -> {artifact.mel.shape[0]} frames, "
+                    f"text: {artifact.ref_text.strip()[:50]}"
+                )
+        except Exception as e:
+            logger.error(f"Failed to precompute voice profile {profile}: {e}")
+            ok = False
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute voice profile reference artifacts")
+    parser.add_argument("profiles", nargs="*", help="Voice profiles to process (default: all)")
+    parser.add_argument("--dir", default=settings.VOICE_PROFILES_DIR, help="Voice profiles directory")
+    parser.add_argument("--force", action="store_true", help="Rebuild artifacts even if they are fresh")
+    args = parser.parse_args()
+    
+    if precompute_voices(args.dir, args.profiles, args.force):
+        logger.info("All voice profiles precomputed")
+    else:
+        sys.exit(1)
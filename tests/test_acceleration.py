@@ -0,0 +1,94 @@
+import pytest
+import torch
+from f5_tts.model import CFM, DiT
+from app.services.acceleration import ExecutionMode, compare_outputs, module_bytes, optimize_model, optimize_vocoder, resolve_mode
+from app.services.inference import MEL_SPEC_KWARGS
+
+
+def tiny_model():
+    torch.manual_seed(0)
+    vocab = {c: i for i, c in enumerate(" abcdefghijklmnopqrstuvwxyz.")}
+    transformer = DiT(
+        dim=64, depth=2, heads=2, dim_head=32, ff_mult=2, text_dim=32, conv_layers=1,
+        text_num_embeds=len(vocab) + 1, mel_dim=100
+    )
+    # DiT zero-initializes its output and gating layers; randomize them so the transformer matters
+    for parameter in transformer.parameters():
+        torch.nn.init.normal_(parameter, std=0.05)
+    return CFM(transformer=transformer, mel_spec_kwargs=MEL_SPEC_KWARGS, vocab_char_map=vocab).eval()
+
+
+def sample(model):
+    cond = torch.randn(1, 40, 100, generator=torch.Generator().manual_seed(1))
+    with torch.inference_mode():
+        torch.manual_seed(0)
+        mel, _ = model.sample(cond=cond, text=["hello there. a test."], duration=120, steps=8, cfg_strength=2.0)
+    return [mel.float()]
+
+
+@pytest.mark.parametrize("mode, max_error", [
+    (ExecutionMode(dtype="bf16"), 0.05),
+    (ExecutionMode(quantize="int8"), 0.05),
+    (ExecutionMode(compile=True), 1e-4),
+])
+def test_execution_modes_match_fp32(mode, max_error):
+    model = tiny_model()
+    baseline = sample(model)
+    optimized = optimize_model(tiny_model(), resolve_mode(mode, torch.device("cpu")))
+    metrics = compare_outputs(baseline, sample(optimized))
+    assert metrics["relative_error"] < max_error
+    assert metrics["cosine_similarity"] > 0.999
+    if mode.quantize == "int8":
+        assert module_bytes(optimized) < module_bytes(model)
+    if mode.compile:
+        assert all(isinstance(block, torch._dynamo.eval_frame.OptimizedModule)
+                   for block in optimized.transformer.transformer_blocks)
+
+
+def test_compiled_vocoder_backbone_matches():
+    class Vocoder(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.backbone = torch.nn.Sequential(torch.nn.Linear(100, 64), torch.nn.GELU(), torch.nn.Linear(64, 100))
+
+        def forward(self, mel):
+            return self.backbone(mel)
+
+    mel = torch.randn(2, 37, 100)
+    vocoder = Vocoder().eval()
+    with torch.inference_mode():
+        expected = vocoder(mel)
+        compiled = optimize_vocoder(vocoder, ExecutionMode(compile=True))
+        assert torch.allclose(compiled(mel), expected, atol=1e-5)
+    assert isinstance(compiled.backbone, torch._dynamo.eval_frame.OptimizedModule)
+
+
+def test_resolve_mode_adapts_to_device():
+    cpu, cuda = torch.device("cpu"), torch.device("cuda")
+    assert resolve_mode(ExecutionMode(dtype="fp16"), cpu).dtype == "bf16"
+    assert resolve_mode(ExecutionMode(quantize="int8"), cuda).quantize == "none"
+    with pytest.raises(ValueError):
+        resolve_mode(ExecutionMode(dtype="fp8"), cpu)
+
+
+def test_converted_checkpoint_maps_into_meta_model(tmp_path):
+    from scripts.convert_checkpoint import convert_checkpoint
+    from app.services.tts_service import F5TTSService, map_safetensors
+
+    model = tiny_model()
+    source, output = tmp_path / "model.pt", tmp_path / "model.safetensors"
+    torch.save({"model_state_dict": model.state_dict(), "optimizer_state_dict": {"step": 1}}, source)
+    convert_checkpoint(str(source), str(output), dtype="bf16")
+
+    state_dict = map_safetensors(str(output))
+    assert state_dict.keys() == model.state_dict().keys()
+    assert state_dict["transformer.proj_out.weight"].dtype == torch.bfloat16
+
+    with torch.device("meta"):
+        restored = tiny_model()
+    restored.load_state_dict(state_dict, assign=True)
+    # Buffers the checkpoint does not store are recomputed
+    F5TTSService._materialize_buffers(type("Service", (), {"model": restored})())
+    restored.float().eval()
+    report = compare_outputs(sample(model.to(torch.bfloat16).float()), sample(restored))
+    assert report["relative_error"] < 1e-5
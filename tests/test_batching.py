@@ -0,0 +1,146 @@
+import asyncio
+import time
+from app.services.batching import BatchScheduler
+
+
+class StubModel:
+    """Deterministic stand-in for F5TTSService.synthesize_batch"""
+
+    def __init__(self, latency: float = 0.01):
+        self.latency = latency
+        self.calls = []
+
+    def synthesize_batch(self, voice_profile, texts, options=None):
+        self.calls.append((voice_profile, list(texts)))
+        time.sleep(self.latency)
+        return [f"{voice_profile}:{text}" for text in texts]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_requests_share_a_batch():
+    model = StubModel()
+    scheduler = BatchScheduler(model.synthesize_batch, max_batch_size=8, max_wait_ms=50)
+
+    async def main():
+        results = await asyncio.gather(*[
+            scheduler.submit(f"text {i}", "bane") for i in range(5)
+        ])
+        await scheduler.stop()
+        return results
+
+    results = run(main())
+    assert results == [f"bane:text {i}" for i in range(5)]
+    assert len(model.calls) == 1
+    assert scheduler.stats()["batch_size_histogram"] == {5: 1}
+
+
+def test_batches_are_grouped_by_voice_and_length():
+    model = StubModel()
+    scheduler = BatchScheduler(model.synthesize_batch, max_batch_size=8, max_wait_ms=50, length_bucket_chars=50)
+
+    async def main():
+        results = await asyncio.gather(
+            scheduler.submit("short", "bane"),
+            scheduler.submit("short", "tim"),
+            scheduler.submit("x" * 120, "bane"),
+            scheduler.submit("also short", "bane"),
+        )
+        await scheduler.stop()
+        return results
+
+    results = run(main())
+    assert results == ["bane:short", "tim:short", "bane:" + "x" * 120, "bane:also short"]
+    assert sorted(model.calls) == sorted([
+        ("bane", ["short", "also short"]),
+        ("tim", ["short"]),
+        ("bane", ["x" * 120]),
+    ])
+
+
+def test_batches_are_grouped_by_options():
+    model = StubModel()
+    scheduler = BatchScheduler(model.synthesize_batch, max_batch_size=8, max_wait_ms=50)
+
+    async def main():
+        await asyncio.gather(
+            scheduler.submit("a", "bane", ("realtime",)),
+            scheduler.submit("b", "bane", ("quality",)),
+            scheduler.submit("c", "bane", ("realtime",)),
+        )
+        await scheduler.stop()
+
+    run(main())
+    assert sorted(model.calls) == [("bane", ["a", "c"]), ("bane", ["b"])]
+
+
+def test_batches_respect_max_batch_size():
+    model = StubModel()
+    scheduler = BatchScheduler(model.synthesize_batch, max_batch_size=3, max_wait_ms=50)
+
+    async def main():
+        await asyncio.gather(*[scheduler.submit(f"t{i}", "bane") for i in range(7)])
+        await scheduler.stop()
+
+    run(main())
+    assert all(len(texts) <= 3 for _, texts in model.calls)
+    stats = scheduler.stats()
+    assert stats["items"] == 7
+    assert 0 < stats["mean_batch_fill"] <= 1
+
+
+def test_batch_errors_are_returned_to_each_caller():
+    def failing_batch(voice_profile, texts, options):
+        raise FileNotFoundError(f"Voice profile not found: {voice_profile}")
+
+    scheduler = BatchScheduler(failing_batch, max_wait_ms=10)
+
+    async def main():
+        results = await asyncio.gather(
+            scheduler.submit("a", "missing"),
+            scheduler.submit("b", "missing"),
+            return_exceptions=True
+        )
+        await scheduler.stop()
+        return results
+
+    results = run(main())
+    assert all(isinstance(result, FileNotFoundError) for result in results)
+
+
+def test_waiting_batches_are_dispatched_by_priority():
+    model = StubModel(latency=0.05)
+    scheduler = BatchScheduler(model.synthesize_batch, max_batch_size=1, max_wait_ms=0)
+
+    async def main():
+        # Occupies the only batch slot while the others queue up
+        first = asyncio.ensure_future(scheduler.submit("first", "bane"))
+        await asyncio.sleep(0.01)
+        rest = [
+            asyncio.ensure_future(scheduler.submit(text, "bane", priority=priority))
+            for text, priority in [("free", 2), ("standard", 1), ("premium", 0)]
+        ]
+        await asyncio.gather(first, *rest)
+        await scheduler.stop()
+
+    run(main())
+    assert [texts[0] for _, texts in model.calls] == ["first", "premium", "standard", "free"]
+
+
+def test_clients_take_turns():
+    model = StubModel(latency=0.02)
+    scheduler = BatchScheduler(model.synthesize_batch, max_batch_size=1, max_wait_ms=0)
+
+    async def main():
+        first = asyncio.ensure_future(scheduler.submit("first", "bane"))
+        await asyncio.sleep(0.01)
+        # The bulk client queues four requests before the interactive one arrives
+        rest = [asyncio.ensure_future(scheduler.submit(f"bulk {i}", "bane", client="bulk")) for i in range(4)]
+        rest.append(asyncio.ensure_future(scheduler.submit("interactive", "bane", client="web")))
+        await asyncio.gather(first, *rest)
+        await scheduler.stop()
+
+    run(main())
+    assert [texts[0] for _, texts in model.calls][:3] == ["first", "bulk 0", "interactive"]
@@ -0,0 +1,38 @@
+import asyncio
+import io
+import json
+import zipfile
+from app.services.bulk import BulkItem, build_archive, synthesize_bulk
+from app.services.executor import InferenceExecutor
+from app.services.stub_service import StubTTSService
+
+
+class CountingStub(StubTTSService):
+    def __init__(self):
+        super().__init__(batch_latency_ms=0, step_latency_ms=0, item_latency_ms=0)
+        self.texts = []
+
+    def synthesize_batch(self, texts, voice_profile, params=None):
+        self.texts.extend(texts)
+        return super().synthesize_batch(texts, voice_profile, params)
+
+
+def test_bulk_deduplicates_and_reports_failures_per_item():
+    service = CountingStub()
+    items = [
+        BulkItem(index=0, text="A much longer line of text to speak.", voice_profile="a"),
+        BulkItem(index=1, text="Short line.", voice_profile="a"),
+        BulkItem(index=2, text="Short line.", voice_profile="a"),
+        BulkItem(index=3, text="Rejected.", voice_profile="a", error="nfe_step must be between 4 and 64"),
+    ]
+    results = asyncio.run(synthesize_bulk(items, service, InferenceExecutor(), slice_size=8))
+
+    # Duplicates run once and short texts are packed first
+    assert service.texts == ["Short line.", "A much longer line of text to speak."]
+    assert [r.status for r in results] == ["succeeded", "succeeded", "succeeded", "failed"]
+    assert results[2].duplicate_of == 1 and results[2].filename == results[1].filename
+
+    archive = zipfile.ZipFile(io.BytesIO(build_archive(results)))
+    assert sorted(archive.namelist()) == ["0000.wav", "0001.wav", "manifest.json"]
+    manifest = json.loads(archive.read("manifest.json"))
+    assert manifest["items"][3]["error"] == "nfe_step must be between 4 and 64"
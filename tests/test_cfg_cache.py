@@ -0,0 +1,43 @@
+import pytest
+import torch
+from f5_tts.model.utils import lens_to_mask, list_str_to_idx
+from app.services.acceleration import ExecutionMode, optimize_model
+from app.services.sampling import GuidedFlow
+from test_acceleration import tiny_model
+
+
+def _reference_flow(transformer, x, cond, text, t, mask, cfg_strength):
+    # DiT.forward without its text cache, as called by CFM.sample
+    if cfg_strength < 1e-5:
+        return transformer(x=x, cond=cond, text=text, time=t, mask=mask, drop_audio_cond=False, drop_text=False)
+    pred, null_pred = torch.chunk(transformer(x=x, cond=cond, text=text, time=t, mask=mask, cfg_infer=True), 2, dim=0)
+    return pred + (pred - null_pred) * cfg_strength
+
+
+@pytest.mark.parametrize("texts, durations", [
+    (["hello there. a test.", "hi."], [120, 90]),
+    (["hello there. a test."], [120]),
+])
+@pytest.mark.parametrize("cfg_strength", [2.0, 0.0])
+@pytest.mark.parametrize("quantize", ["none", "int8"])
+def test_guided_flow_matches_transformer(texts, durations, cfg_strength, quantize):
+    model = optimize_model(tiny_model(), ExecutionMode(quantize=quantize))
+    generator = torch.Generator().manual_seed(1)
+    duration = torch.tensor(durations)
+    frames = int(duration.max())
+    cond = torch.randn(len(texts), frames, 100, generator=generator)
+    cond[:, 40:] = 0.0
+    text = list_str_to_idx(texts, model.vocab_char_map)
+    mask = lens_to_mask(duration) if len(texts) > 1 else None
+
+    with torch.inference_mode():
+        flow = GuidedFlow(model.transformer, cond, text, mask=mask, cfg_strength=cfg_strength)
+        # The conditioning computed once serves every step
+        for t in (0.0, 0.3, 0.9):
+            x = torch.randn(len(texts), frames, 100, generator=generator)
+            t = torch.tensor(t)
+            expected = _reference_flow(model.transformer, x, cond, text, t, mask, cfg_strength)
+            actual = flow(t, x)
+            if mask is not None:
+                expected, actual = expected * mask.unsqueeze(-1), actual * mask.unsqueeze(-1)
+            assert torch.allclose(actual, expected, rtol=1e-4, atol=1e-5)
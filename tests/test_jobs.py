@@ -0,0 +1,71 @@
+import asyncio
+import os
+import numpy as np
+import pytest
+from app.services.executor import InferenceExecutor
+from app.services.inference import InferenceParams, cross_fade
+from app.services.jobs import JobStore, check_webhook_url, synthesize_job
+from app.services.streaming import StreamingCrossfader
+from app.services.stub_service import StubTTSService
+
+
+def test_jobs_survive_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = JobStore(path)
+    queued = store.create({"text": "a"})
+    running = store.create({"text": "b"})
+    assert store.claim().id == queued.id
+    store.close()
+
+    # A new process requeues the job that was running when it stopped
+    store = JobStore(path)
+    assert store.requeue_running() == 1
+    assert {store.claim().id, store.claim().id} == {queued.id, running.id}
+    assert store.claim() is None
+
+
+def test_job_resumes_from_saved_chunks(tmp_path):
+    class CountingStub(StubTTSService):
+        generated = []
+
+        def generate(self, texts, voice_profile, params=None):
+            self.generated.extend(texts)
+            return super().generate(texts, voice_profile, params)
+
+    service = CountingStub(batch_latency_ms=0, step_latency_ms=0, item_latency_ms=0, max_batch_size=2)
+    store = JobStore(str(tmp_path / "jobs.db"))
+    text = " ".join(f"This is sentence number {i} of a long text." for i in range(40))
+    job = store.create({"text": text, "voice_profile": "a", "format": "wav"})
+    chunks = service.split_text(text, "a")
+    np.save(os.path.join(tmp_path, "00000.npy"), np.zeros(100, dtype=np.float32))
+
+    progress = []
+    audio, media_type = asyncio.run(synthesize_job(
+        job, str(tmp_path), lambda done, total: progress.append((done, total)),
+        service, InferenceExecutor(), InferenceParams()
+    ))
+    assert service.generated == chunks[1:]
+    assert progress[0] == (1, len(chunks)) and progress[-1] == (len(chunks), len(chunks))
+    assert media_type == "audio/wav" and len(audio) > 44
+
+
+def test_cross_fade_matches_streaming_crossfader():
+    generator = np.random.default_rng(0)
+    waves = [generator.uniform(-1, 1, size).astype(np.float32) for size in (5000, 100, 3600, 0, 7000)]
+    audio = cross_fade(waves)
+    crossfader = StreamingCrossfader()
+    streamed = np.concatenate([crossfader.push(wave) for wave in waves] + [crossfader.flush()])
+    assert audio.dtype == np.float32
+    assert np.allclose(audio, streamed, atol=1e-6)
+
+
+def test_webhooks_to_internal_addresses_are_rejected():
+    check_webhook_url("https://93.184.216.34/callback")
+    for url in ("http://127.0.0.1:8000/admin", "http://localhost/", "http://10.0.0.5/", "http://169.254.169.254/",
+                "http://[::1]/", "ftp://93.184.216.34/"):
+        with pytest.raises(ValueError):
+            check_webhook_url(url)
+    # Allow-listed hosts are trusted, everything else is rejected
+    check_webhook_url("http://hooks.internal:8080/done", {"hooks.internal"})
+    with pytest.raises(ValueError):
+        check_webhook_url("https://93.184.216.34/callback", {"hooks.internal"})
@@ -0,0 +1,67 @@
+import asyncio
+import time
+import pytest
+from starlette.requests import ClientDisconnect
+from app.api.routes.tts import _GuardedStreamingResponse, _StreamCompletion
+from app.core.security import TokenClaims
+from app.services.executor import InferenceExecutor
+from app.services.inference import InferenceParams
+from app.services.longform import normalize_text, segment_text, synthesize_segments
+from app.services.stub_service import StubTTSService
+from app.services.vocoder_stage import VocoderStage
+
+
+def test_normalize_text_keeps_paragraphs():
+    text = "He said “hello” — then left…\n\n\nNext para-\ngraph   here."
+    assert normalize_text(text) == 'He said "hello", then left...\n\nNext paragraph here.'
+
+
+def test_vocoding_overlaps_sampling():
+    # 0.1s to sample and 0.1s to vocode each batch of two segments
+    service = StubTTSService(batch_latency_ms=100, step_latency_ms=0, item_latency_ms=50)
+    text = normalize_text("\n\n".join(f"Paragraph number {i} is here." for i in range(8)))
+    segments = segment_text(text, service, "a")
+    assert len(segments) == 8
+
+    async def run():
+        return [wave async for wave in synthesize_segments(
+            segments, "a", InferenceParams(), service,
+            InferenceExecutor(), VocoderStage(service.vocode), batch_size=2
+        )]
+
+    started = time.perf_counter()
+    waves = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    assert waves and len(waves) == 8
+    # Serial execution would take 4 * (0.1 + 0.1) = 0.8s
+    assert elapsed < 0.7
+
+
+def test_stream_slot_is_returned_when_client_leaves_before_the_body():
+    executor = InferenceExecutor(max_queue=1)
+    executor.try_admit()
+    claims = TokenClaims(subject="alice", tier="standard", voices=None, expires_at=0.0)
+    completion = _StreamCompletion("stream", "bane", claims, executor, time.perf_counter(), 24000)
+    started = []
+
+    async def body():
+        started.append(True)
+        try:
+            yield b"audio"
+        finally:
+            completion.close()
+
+    async def send(message):
+        raise OSError("client went away")
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    response = _GuardedStreamingResponse(body(), on_close=completion.close)
+    scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+    with pytest.raises(ClientDisconnect):
+        asyncio.run(response(scope, receive, send))
+    # The body never ran, yet the slot is back, and only once
+    assert not started and executor.admitted == 0
+    completion.close()
+    assert executor.admitted == 0
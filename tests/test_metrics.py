@@ -0,0 +1,65 @@
+import pytest
+from app.core.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = Histogram("stage_seconds", "Stage time", ["stage"], buckets=(0.1, 1.0), registry=registry)
+    histogram.observe(0.05, stage="sampling")
+    histogram.observe(0.5, stage="sampling")
+    histogram.observe(5.0, stage="sampling")
+
+    text = registry.render()
+    assert "# TYPE stage_seconds histogram" in text
+    assert 'stage_seconds_bucket{stage="sampling",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="sampling",le="1"} 2' in text
+    assert 'stage_seconds_bucket{stage="sampling",le="+Inf"} 3' in text
+    assert 'stage_seconds_sum{stage="sampling"} 5.55' in text
+    assert 'stage_seconds_count{stage="sampling"} 3' in text
+
+
+def test_counter_and_gauge_labels():
+    registry = Registry()
+    counter = Counter("requests_total", "Requests", ["outcome"], registry=registry)
+    counter.inc(outcome="success")
+    counter.inc(2, outcome="success")
+    with pytest.raises(ValueError):
+        counter.inc(outcome="success", voice_profile="bane")
+
+    gauge = Gauge("memory_bytes", "Memory", ["component"], registry=registry)
+    gauge.set_function(lambda: {("model",): 1024})
+
+    text = registry.render()
+    assert 'requests_total{outcome="success"} 3' in text
+    assert 'memory_bytes{component="model"} 1024' in text
+
+
+def test_failing_gauge_callback_is_skipped():
+    registry = Registry()
+    gauge = Gauge("broken", "Broken", registry=registry)
+    gauge.set_function(lambda: 1 / 0)
+    assert "\nbroken " not in registry.render()
+
+
+def test_request_labels_only_name_existing_voice_profiles(monkeypatch):
+    from app.api.routes.tts import _observe_request
+    from app.core.metrics import REQUESTS
+    from app.services.runtime import runtime
+
+    monkeypatch.setattr(runtime, "_catalog", {"bane"})
+    before = REQUESTS.value(endpoint="stream", voice_profile="unknown", outcome="rate_limited")
+    _observe_request("stream", "bane", "rate_limited", 0.0)
+    _observe_request("stream", "random-name-123", "rate_limited", 0.0)
+    assert REQUESTS.value(endpoint="stream", voice_profile="bane", outcome="rate_limited") >= 1
+    assert REQUESTS.value(endpoint="stream", voice_profile="random-name-123", outcome="rate_limited") == 0
+    assert REQUESTS.value(endpoint="stream", voice_profile="unknown", outcome="rate_limited") == before + 1
+
+
+def test_metrics_must_render_samples():
+    from app.core.metrics import _Metric
+
+    class Incomplete(_Metric):
+        kind = "gauge"
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete", "Incomplete", registry=None)
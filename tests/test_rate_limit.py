@@ -0,0 +1,58 @@
+import asyncio
+import time
+import pytest
+from app.services.executor import InferenceExecutor
+from app.services.rate_limit import RateLimiter, RateLimitExceededError
+
+
+def test_request_and_audio_buckets():
+    limiter = RateLimiter(
+        requests_per_minute=60, request_burst=2, audio_seconds_per_minute=60, audio_seconds_burst=10
+    )
+    limiter.check("alice")
+    limiter.check("alice")
+    with pytest.raises(RateLimitExceededError) as error:
+        limiter.check("alice")
+    assert error.value.retry_after == 1
+    # Buckets are per client
+    limiter.check("bob")
+
+    # Audio is charged afterwards and may overdraw the bucket
+    limiter.charge_audio("bob", 25.0)
+    with pytest.raises(RateLimitExceededError, match="audio") as error:
+        limiter.check("bob")
+    assert 14 <= error.value.retry_after <= 16
+    assert limiter.stats()["limited"] == 2
+
+
+def test_executor_serves_clients_by_weighted_round_robin():
+    executor = InferenceExecutor(max_workers=1)
+    order = []
+
+    def job(name):
+        time.sleep(0.01)
+        order.append(name)
+
+    async def main():
+        # Occupies the only thread while the rest queue up
+        first = asyncio.ensure_future(executor.run(job, "first"))
+        await asyncio.sleep(0.005)
+        jobs = [executor.run(job, f"bulk{i}", client="bulk") for i in range(6)]
+        jobs += [executor.run(job, f"web{i}", client="web", weight=2.0) for i in range(4)]
+        await asyncio.gather(first, *jobs)
+
+    asyncio.run(main())
+    executor.shutdown()
+    assert order[0] == "first"
+    # Two interactive jobs per bulk job while both have work queued
+    assert order[1:7] == ["web0", "bulk0", "web1", "web2", "bulk1", "web3"]
+
+
+def test_incomplete_backends_fail_on_creation():
+    from app.services.rate_limit import RateLimitBackend
+
+    class NoTake(RateLimitBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        NoTake()
@@ -0,0 +1,67 @@
+import os
+import time
+from app.services.cache import ResultCache, cache_key
+
+
+def test_cache_key_is_stable_and_covers_all_fields():
+    key = cache_key(text="hello", voice_profile="bane", nfe_step=32)
+    assert key == cache_key(nfe_step=32, voice_profile="bane", text="hello")
+    assert key != cache_key(text="hello", voice_profile="tim", nfe_step=32)
+    assert key != cache_key(text="hello", voice_profile="bane", nfe_step=16)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache(memory_max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+    cache.put("c", b"cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+    stats = cache.stats()
+    assert (stats["memory_evictions"], stats["disk_evictions"], stats["evictions"]) == (1, 0, 1)
+
+
+def test_result_key_covers_text_normalization():
+    from app.services.stub_service import StubTTSService
+
+    service = StubTTSService(batch_latency_ms=0, step_latency_ms=0, item_latency_ms=0)
+    expanded = service.result_key("Costs $5.", "bench", fmt="wav")
+    service.frontend.expand = False
+    assert service.result_key("Costs $5.", "bench", fmt="wav") != expanded
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    cache = ResultCache(memory_max_bytes=1024, disk_dir=str(tmp_path))
+    cache.put("k1", b"audio")
+
+    restarted = ResultCache(memory_max_bytes=1024, disk_dir=str(tmp_path))
+    assert restarted.get("k1") == b"audio"
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.get("k1") == b"audio"
+    assert restarted.stats()["memory_hits"] == 1
+
+
+def test_disk_tier_is_size_bounded(tmp_path):
+    cache = ResultCache(memory_max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=10)
+    cache.put("k1", b"11111")
+    cache.put("k2", b"22222")
+    cache.put("k3", b"33333")
+    stats = cache.stats()
+    assert stats["disk_bytes"] <= 10
+    assert stats["evictions"] == 1
+    assert cache.get("k1") is None
+    assert cache.get("k3") == b"33333"
+
+
+def test_disk_entries_expire(tmp_path):
+    cache = ResultCache(memory_max_bytes=0, disk_dir=str(tmp_path), ttl_seconds=60)
+    cache.put("k1", b"audio")
+    path = os.path.join(str(tmp_path), "k1"[:2], "k1.bin")
+    old = time.time() - 120
+    os.utime(path, (old, old))
+
+    restarted = ResultCache(memory_max_bytes=0, disk_dir=str(tmp_path), ttl_seconds=60)
+    assert restarted.get("k1") is None
+    assert not os.path.exists(path)
@@ -0,0 +1,53 @@
+import torch
+from f5_tts.model.utils import list_str_to_idx
+from app.services.acceleration import compare_outputs
+from app.services.presets import resolve_inference_params
+from app.services.sampling import AdaptiveSampling, sample_flow
+from test_acceleration import tiny_model
+
+
+def _sample(model, control=None):
+    cond = torch.randn(2, 40, 100, generator=torch.Generator().manual_seed(1))
+    text = list_str_to_idx(["hello there. a test.", "hi."], model.vocab_char_map)
+    duration, lens = torch.tensor([120, 90]), torch.tensor([40, 40])
+    with torch.inference_mode():
+        torch.manual_seed(0)
+        if control is None:
+            mel, _ = model.sample(
+                cond=cond, text=text, duration=duration, lens=lens, steps=32, cfg_strength=2.0, sway_sampling_coef=-1.0
+            )
+            return mel, None
+        return sample_flow(
+            model, cond, text, duration, lens, steps=32, cfg_strength=2.0, sway_sampling_coef=-1.0, control=control
+        )
+
+
+def test_adaptive_sampling_spans_steps_within_tolerance():
+    model = tiny_model()
+    full, _ = _sample(model)
+
+    # Without a tolerance every schedule step is taken, as in CFM.sample
+    mel, report = _sample(model, AdaptiveSampling(tolerance=0.0))
+    assert torch.allclose(mel, full, atol=1e-5)
+    assert report.steps == report.scheduled_steps == 32 and report.estimated_error == 0.0
+
+    mel, report = _sample(model, AdaptiveSampling(tolerance=0.05, min_steps=6))
+    assert 6 < report.steps < 32 and report.speedup > 2
+    error = compare_outputs([full], [mel])["relative_error"]
+    assert 0 < error < 0.05 and report.estimated_error > 0
+    # Reference frames are passed through unchanged
+    assert torch.equal(mel[:, :40], full[:, :40])
+
+    # Step sizes only grow once min_steps evaluations are taken
+    _, report = _sample(model, AdaptiveSampling(tolerance=0.05, min_steps=32))
+    assert report.steps == 32
+
+
+def test_requests_default_to_the_configured_sampling_mode(monkeypatch):
+    from app.core.config import settings
+
+    assert not resolve_inference_params("quality").adaptive
+    assert resolve_inference_params("quality", adaptive=True).adaptive
+    monkeypatch.setattr(settings, "ADAPTIVE_SAMPLING", True)
+    assert resolve_inference_params("realtime").adaptive
+    assert not resolve_inference_params("realtime", adaptive=False).adaptive
@@ -0,0 +1,65 @@
+import json
+import time
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from app.core.security import TokenVerifier
+
+SECRET = "a-test-secret-of-at-least-32-bytes"
+
+
+def test_verified_tokens_are_cached_until_they_expire():
+    verifier = TokenVerifier(secret_key=SECRET, cache_ttl_s=60)
+    exp = int(time.time()) + 2
+    token = jwt.encode({"sub": "alice", "tier": "premium", "voices": ["bane"], "exp": exp}, SECRET, algorithm="HS256")
+    claims = verifier.verify(token)
+    assert verifier.verify(token) == claims
+    assert (verifier.hits, verifier.misses) == (1, 1)
+    assert claims.priority == 0
+    assert claims.allows_voice("bane") and not claims.allows_voice("tim")
+
+    # The cache never outlives the token
+    time.sleep(exp - time.time() + 0.05)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verifier.verify(token)
+    with pytest.raises(jwt.MissingRequiredClaimError):
+        verifier.verify(jwt.encode({"sub": "alice"}, SECRET, algorithm="HS256"))
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.verify(jwt.encode({"exp": time.time() + 60}, SECRET[::-1], algorithm="HS256"))
+
+
+def test_jwks_backend(tmp_path):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(key.public_key()))
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps({"keys": [{**jwk, "kid": "k1", "use": "sig", "alg": "RS256"}]}))
+
+    verifier = TokenVerifier(backend="jwks", jwks_file=str(path), audience="tts")
+    token = jwt.encode(
+        {"sub": "bob", "aud": "tts", "exp": time.time() + 60}, key, algorithm="RS256", headers={"kid": "k1"}
+    )
+    claims = verifier.verify(token)
+    assert claims.subject == "bob" and claims.voices is None
+
+    with pytest.raises(jwt.InvalidAudienceError):
+        verifier.verify(jwt.encode(
+            {"aud": "other", "exp": time.time() + 60}, key, algorithm="RS256", headers={"kid": "k1"}
+        ))
+    with pytest.raises(jwt.InvalidKeyError):
+        verifier.verify(jwt.encode({"exp": time.time() + 60}, key, algorithm="RS256", headers={"kid": "k2"}))
+
+
+def test_voice_profile_changes_need_the_admin_scope():
+    from fastapi import HTTPException
+    from app.core.security import require_voice_admin
+
+    verifier = TokenVerifier(secret_key=SECRET, cache_size=0)
+    exp = time.time() + 60
+    user = verifier.verify(jwt.encode({"sub": "alice", "scope": "tts", "exp": exp}, SECRET, algorithm="HS256"))
+    admin = verifier.verify(jwt.encode({"sub": "ops", "scope": "tts voices:write", "exp": exp}, SECRET, algorithm="HS256"))
+    # No "voices" claim grants every profile, but not the right to change them
+    assert user.allows_voice("bane") and not user.manages_voices
+    with pytest.raises(HTTPException) as error:
+        require_voice_admin(user)
+    assert error.value.status_code == 403
+    require_voice_admin(admin)
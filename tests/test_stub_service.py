@@ -0,0 +1,46 @@
+import time
+import numpy as np
+from app.services.inference import InferenceParams
+from app.services.stub_service import StubTTSService
+
+
+def test_stub_is_deterministic_and_scales_with_text():
+    service = StubTTSService(batch_latency_ms=0, step_latency_ms=0, item_latency_ms=0)
+    short, long = service.synthesize_batch(["Hello there.", "Hello there. " * 20], "bench")
+    assert np.array_equal(short, service.synthesize("Hello there.", "bench"))
+    assert len(long) > 5 * len(short)
+
+
+def test_stub_latency_follows_sampling_steps():
+    service = StubTTSService(batch_latency_ms=0, step_latency_ms=1, item_latency_ms=0)
+    started = time.perf_counter()
+    service.generate(["Hello there."], "bench", InferenceParams(nfe_step=50))
+    assert time.perf_counter() - started >= 0.05
+
+
+def test_runtime_is_ready_only_after_warm_up(monkeypatch):
+    from app.core.config import settings
+    from app.services.runtime import TTSRuntime
+
+    class RecordingRuntime(TTSRuntime):
+        def __setattr__(self, name, value):
+            if name == "state":
+                states.append(value)
+            super().__setattr__(name, value)
+
+    monkeypatch.setattr(settings, "TTS_BACKEND", "stub")
+    monkeypatch.setattr(settings, "WORKER_PROCESSES", 0)
+    monkeypatch.setattr(settings, "WARMUP_ENABLED", True)
+    states = []
+    runtime = RecordingRuntime()
+    monkeypatch.setattr(runtime, "warm_up", lambda service: None)
+    runtime.start()
+    while runtime.state not in ("ready", "failed"):
+        time.sleep(0.01)
+    assert states == ["not_started", "loading", "warming_up", "ready"]
+
+    # Loaded lazily by a request, there is no warm-up to wait for
+    states = []
+    runtime = RecordingRuntime()
+    runtime.get_service()
+    assert states == ["not_started", "loading", "ready"]
@@ -0,0 +1,44 @@
+import pytest
+from f5_tts.model.utils import convert_char_to_pinyin, list_str_to_idx
+from app.services.text_frontend import TextFrontend, UnsupportedTextError, expand_text
+
+VOCAB = {c: i for i, c in enumerate(" abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ.,'\"!?-:")}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Dr. Smith paid $5.50 on May 21st, 1999.",
+     "Doctor Smith paid five dollars and fifty cents on May twenty first, nineteen ninety nine."),
+    ("It grew 12.5% to 1,250,000 users, i.e. a lot.",
+     "It grew twelve point five percent to one million two hundred fifty thousand users, that is a lot."),
+    ("Rock & roll in 2024, No. 7.", "Rock and roll in twenty twenty four, number seven."),
+])
+def test_expand_text(text, expected):
+    assert expand_text(text) == expected
+
+
+@pytest.mark.parametrize("prefix, texts", [
+    ("This is the reference. ", ["Hello there, friend.", "Short one!"]),
+    # The boundary changes the tokens: a space is added after "." and 银行 is read as yin hang
+    ("the end.", ["Next one."]),
+    ("我们在银", ["行工作。"]),
+])
+def test_encode_matches_f5_pipeline(prefix, texts):
+    vocab = {**VOCAB, **{token: len(VOCAB) + i for i, token in enumerate(["yin2", "hang2", "xing2", "。"])}}
+    frontend = TextFrontend(vocab)
+    expected = list_str_to_idx(convert_char_to_pinyin([prefix + text for text in texts]), vocab)
+    assert frontend.encode(prefix, texts).tolist() == expected.tolist()
+
+
+def test_validation_and_cache():
+    frontend = TextFrontend(VOCAB, cache_size=2)
+    frontend.validate("Costs “$3”…")
+    with pytest.raises(UnsupportedTextError, match="'#'"):
+        frontend.validate("Issue #12")
+    with pytest.raises(UnsupportedTextError):
+        frontend.validate("   ")
+
+    for text in ["one", "two", "one", "three", "two"]:
+        frontend.tokenize(text)
+    stats = frontend.stats()
+    # "two" was evicted by "three"
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 4, 2)
@@ -0,0 +1,47 @@
+import asyncio
+import time
+import numpy as np
+from app.services.executor import InferenceExecutor
+from app.services.stub_service import StubTTSService
+from app.services.vocoder_stage import VocoderStage, synthesize_pipelined
+
+
+def test_pipelined_synthesis_overlaps_and_matches_batch():
+    # 0.1s to sample and 0.1s to vocode each request
+    service = StubTTSService(batch_latency_ms=100, step_latency_ms=0, item_latency_ms=100)
+    texts = [f"Request number {i} is here." for i in range(4)]
+    executor = InferenceExecutor()
+    vocoder = VocoderStage(service.vocode)
+
+    async def run():
+        return await asyncio.gather(*(
+            synthesize_pipelined([text], "a", None, service, executor, vocoder) for text in texts
+        ))
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    # Serial execution would take 4 * (0.1 + 0.1) = 0.8s
+    assert elapsed < 0.7
+    for text, (wave,) in zip(texts, results):
+        assert np.array_equal(wave, service.synthesize(text, "a"))
+
+
+def test_jobs_queued_while_busy_are_decoded_together():
+    calls = []
+
+    def decode(mels, voice_profile):
+        calls.append(len(mels))
+        time.sleep(0.05)
+        return [np.full(4, mel, dtype=np.float32) for mel in mels]
+
+    vocoder = VocoderStage(decode, max_batch_size=8)
+
+    async def run():
+        return await asyncio.gather(*(vocoder.decode([i], "a") for i in range(5)))
+
+    results = asyncio.run(run())
+    assert [int(waves[0][0]) for waves in results] == list(range(5))
+    assert sum(calls) == 5 and len(calls) < 5
+    stats = vocoder.stats()
+    assert stats["jobs"] == 5 and 0 < stats["utilization"] <= 1
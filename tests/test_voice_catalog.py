@@ -0,0 +1,139 @@
+import io
+import os
+import numpy as np
+import pytest
+import soundfile as sf
+import torch
+from app.services.voice_catalog import VoiceCatalog
+from app.services.voice_registry import VoiceProfile, VoiceRegistry, voice_key
+from app.services.voice_store import artifact_dir, load_or_build_artifact, read_samples, score_reference, select_reference
+
+
+def _wav(seconds: float, amplitude: float = 0.3) -> bytes:
+    t = np.arange(int(seconds * 24000)) / 24000
+    buffer = io.BytesIO()
+    sf.write(buffer, (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32), 24000, format="WAV")
+    return buffer.getvalue()
+
+
+def _prepare(voice_profile_dir):
+    for audio_file, text in read_samples(voice_profile_dir):
+        load_or_build_artifact(
+            voice_profile_dir, audio_file, text, lambda wave: torch.zeros(1, 100, wave.shape[-1] // 256)
+        )
+
+
+def test_create_replace_and_delete(tmp_path):
+    changed = []
+    catalog = VoiceCatalog(str(tmp_path), poll_interval_s=0, on_change=changed.append)
+
+    entry = catalog.create("alice", [(_wav(2.0), "Hello there."), (_wav(1.5), "Second sample.")], prepare=_prepare)
+    assert entry.status == "ready" and len(entry.samples) == 2
+    assert entry.duration == pytest.approx(3.5)
+    # Artifacts built before the rename still match their sources
+    assert [voice["name"] for voice in catalog.list()] == ["alice"]
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".")]
+
+    with pytest.raises(FileExistsError):
+        catalog.create("alice", [(_wav(2.0), "Hello.")])
+    with pytest.raises(ValueError, match="seconds"):
+        catalog.create("bob", [(_wav(0.2), "Hi.")])
+    with pytest.raises(ValueError, match="silent"):
+        catalog.create("bob", [(_wav(2.0, amplitude=0.0), "Hi.")])
+    with pytest.raises(ValueError, match="Unreadable"):
+        catalog.create("bob", [(b"not audio", "Hi.")])
+    with pytest.raises(ValueError, match="name"):
+        catalog.create("../bob", [(_wav(2.0), "Hi.")])
+
+    # Without prepare() the artifacts are built on first use
+    entry = catalog.create("alice", [(_wav(2.0), "Replaced.")], replace=True)
+    assert entry.status == "pending" and entry.samples[0].text == "Replaced."
+
+    catalog.delete("alice")
+    assert catalog.list() == [] and "alice" not in catalog
+    assert changed == ["alice", "alice", "alice"]
+    with pytest.raises(FileNotFoundError):
+        catalog.delete("alice")
+
+
+def test_refresh_picks_up_changes_on_disk(tmp_path):
+    changed = []
+    catalog = VoiceCatalog(str(tmp_path), poll_interval_s=0, on_change=changed.append)
+    catalog.start()
+    assert catalog.list() == []
+
+    profile = tmp_path / "carol"
+    profile.mkdir()
+    (profile / "a.wav").write_bytes(_wav(3.0))
+    (profile / "samples.txt").write_text("a.wav|First take.")
+    catalog.refresh()
+    assert catalog.get("carol").status == "pending"
+    assert catalog.get("carol").duration == pytest.approx(3.0)
+
+    # Unchanged profiles are not rescanned
+    rescans = catalog.rescans
+    catalog.refresh()
+    assert catalog.rescans == rescans
+
+    # Artifacts built on first use only update readiness
+    _prepare(str(profile))
+    assert catalog.refresh() == []
+    assert catalog.get("carol").status == "ready"
+
+    (profile / "samples.txt").write_text("missing.wav|Second take.")
+    # File times can be coarser than the test
+    os.utime(profile / "samples.txt", ns=(1, 1))
+    assert catalog.refresh() == ["carol"]
+    assert catalog.get("carol").status == "invalid"
+
+    for file in ("a.wav", "samples.txt"):
+        (profile / file).unlink()
+    (profile / ".reference").rename(tmp_path / ".trash")
+    profile.rmdir()
+    assert catalog.refresh() == ["carol"]
+    assert catalog.list() == [] and changed == ["carol", "carol"]
+    catalog.stop()
+
+
+def _speech(seconds: float, noise: float = 0.001, clip: float = None) -> np.ndarray:
+    # A tone switched on and off every 250 ms over a noise floor
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * 24000)) / 24000
+    wave = 0.3 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 2 * t) > 0)
+    wave = wave + noise * rng.standard_normal(len(t))
+    if clip is not None:
+        wave = np.clip(wave * 3, -clip, clip)
+    return wave.astype(np.float32)
+
+
+def test_reference_scoring_and_selection():
+    clean = score_reference(_speech(6.0))
+    assert clean.duration == pytest.approx(6.0) and clean.snr_db > 40 and clean.clipping < 1e-3
+    assert score_reference(_speech(4.0, noise=0.1)).snr_db < 20
+    assert score_reference(_speech(4.0, clip=0.5)).clipping > 0.1
+
+    candidates = [
+        ("long", clean),
+        ("noisy", score_reference(_speech(4.0, noise=0.1))),
+        ("clipped", score_reference(_speech(3.5, clip=0.5))),
+        ("short", score_reference(_speech(1.0))),
+        ("medium", score_reference(_speech(4.5))),
+    ]
+    thresholds = dict(min_seconds=3.0, min_snr_db=20.0, max_clipping=1e-3)
+    # Shortest sample passing every threshold
+    assert select_reference(candidates, **thresholds) == "medium"
+    # Without a passing sample, the cleanest one that is long enough
+    assert select_reference(candidates[1:4], **thresholds) == "noisy"
+
+    # References requested per request are cached next to the default and dropped with it
+    registry = VoiceRegistry(lambda key: VoiceProfile(name=key, ref_audio=None, ref_text=""))
+    registry.get("bane")
+    registry.get(voice_key("bane", "sample_001"))
+    registry.get("tim")
+    assert registry.invalidate("bane") and len(registry) == 1
+
+
+
+def test_samples_differing_in_extension_keep_separate_artifacts(tmp_path):
+    profile = str(tmp_path)
+    assert artifact_dir(profile, os.path.join(profile, "ref.wav")) != artifact_dir(profile, os.path.join(profile, "ref.mp3"))
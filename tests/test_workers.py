@@ -0,0 +1,37 @@
+import numpy as np
+from app.services.workers import ShardedService, WorkerPool, parse_device_specs
+from app.services.stub_service import StubTTSService
+
+
+def test_device_specs():
+    assert parse_device_specs("auto", 3, cuda_devices=2) == ["cuda:0", "cuda:1", "cuda:0"]
+    assert parse_device_specs("auto", 2, cpu_cores=[0, 1, 2, 3, 6, 7]) == ["cpu:0-2", "cpu:3+6+7"]
+    assert parse_device_specs("cuda:1,cpu", 3) == ["cuda:1", "cpu", "cuda:1"]
+
+
+def test_voice_affinity_spills_to_least_loaded_worker():
+    pool = WorkerPool(["cpu", "cpu", "cpu"], affinity_slack=1)
+    for worker in pool.workers:
+        worker.alive = True
+    preferred = pool._choose("bane")
+    assert all(pool._choose("bane") is preferred for _ in range(5))
+
+    preferred.inflight = 2
+    assert pool._choose("bane") is not preferred
+    assert (pool.affinity_hits, pool.spills) == (6, 1)
+
+
+def test_sharded_service_matches_in_process(monkeypatch):
+    monkeypatch.setenv("TTS_BACKEND", "stub")
+    monkeypatch.setenv("WARMUP_ENABLED", "false")
+    monkeypatch.setenv("STUB_BATCH_LATENCY_MS", "0")
+    pool = WorkerPool(["cpu", "cpu"], start_timeout=120)
+    pool.start()
+    try:
+        service = ShardedService(pool)
+        wave = service.synthesize("Hello there.", "bane")
+        expected = StubTTSService(batch_latency_ms=0, step_latency_ms=0, item_latency_ms=0)
+        assert np.array_equal(wave, expected.synthesize("Hello there.", "bane"))
+        assert service.voices.stats()["size"] == 1
+    finally:
+        pool.stop()